@@ -0,0 +1,114 @@
+"""
+Benchmark pembuatan node/edge vis.js: loop lama df_plot.iterrows() + pyvis
+add_node/add_edge vs sna.graph_build.build_vis_elements. pyvis hanya dipakai untuk
+pembanding lama ini (perlu `pip install pyvis`, tidak dipakai aplikasi).
+
+    python benchmarks/bench_graph_build.py --edges 100000 200000
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from pyvis.network import Network
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from sna.graph_build import build_vis_elements  # noqa: E402
+
+
+def format_miliar(val):
+    if abs(val) >= 1_000_000_000:
+        return f"{val / 1_000_000_000:.2f} Miliar"
+    elif abs(val) >= 1_000_000:
+        return f"{val / 1_000_000:.2f} Juta"
+    return f"{val:,.0f}"
+
+
+def legacy_build(df_plot, search_id, node_sums, break_down):
+    """Salinan loop lama di streamliet_new.py sebelum builder vektor."""
+    net = Network(directed=True)
+    added_nodes = set()
+    for i, (_, row) in enumerate(df_plot.iterrows()):
+        src, tgt = str(row["PEMILIK REKENING"]), str(row["NAMA LAWAN"])
+        total_val = row["MUTASI"]
+        freq = row.get("FREKUENSI", 1)
+        for nid in [src, tgt]:
+            if nid not in added_nodes:
+                is_focus = (nid == search_id)
+                net.add_node(
+                    nid, label=nid,
+                    color="#dc2626" if is_focus else ("#2563eb" if nid in node_sums else "#16a34a"),
+                    size=30 if is_focus else 15, shape="dot",
+                    font={'color': '#333333', 'size': 14, 'strokeWidth': 2, 'strokeColor': '#ffffff'},
+                    title=f"Entity: {nid}",
+                )
+                added_nodes.add(nid)
+        label_text = f"{format_miliar(total_val)}"
+        if not break_down and freq > 1:
+            label_text += f" | {freq}x transaksi"
+        curve_type = "curvedCW" if src <= tgt else "curvedCCW"
+        edge_roundness = 0.15 + (i * 0.2) if break_down else 0.15
+        if search_id:
+            if src == search_id: edge_color = "#FF3366"
+            elif tgt == search_id: edge_color = "#22FF88"
+            else: edge_color = "44CCFF"
+        else:
+            edge_color = "rgba(200, 200, 200, 0.5)"
+        net.add_edge(
+            src, tgt, value=total_val, label=label_text, color=edge_color,
+            width=2 if break_down else max(2, min(total_val / 100_000_000, 15)),
+            arrows="to",
+            font={'size': 10, 'color': '#333333', 'strokeWidth': 2, 'strokeColor': '#ffffff'},
+            smooth={'enabled': True, 'type': curve_type, 'roundness': edge_roundness},
+        )
+    return net.nodes, net.edges
+
+
+def synthetic_edges(n_edges, seed=0):
+    """Edge teragregasi acak dengan distribusi degree miring (mirip data mutasi)."""
+    rng = np.random.default_rng(seed)
+    n_nodes = max(10, n_edges // 4)
+    src = rng.zipf(1.6, n_edges) % n_nodes
+    dst = rng.integers(0, n_nodes, n_edges)
+    df = pd.DataFrame({
+        "PEMILIK REKENING": [f"ENTITAS {i}" for i in src],
+        "NAMA LAWAN": [f"ENTITAS {i}" for i in dst],
+        "MUTASI": rng.lognormal(19, 2, n_edges).round(2),
+        "FREKUENSI": rng.integers(1, 20, n_edges),
+    })
+    return df.drop_duplicates(["PEMILIK REKENING", "NAMA LAWAN"]).reset_index(drop=True)
+
+
+def timed(label, fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    print(f"  {label:<28} {time.perf_counter() - start:8.3f} s")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--edges", type=int, nargs="+", default=[10_000, 100_000, 200_000])
+    parser.add_argument("--skip-legacy-above", type=int, default=100_000,
+                        help="loop lama sangat lambat; lewati untuk ukuran di atas ini")
+    args = parser.parse_args()
+
+    for n in args.edges:
+        df_plot = synthetic_edges(n)
+        node_sums = df_plot.groupby("PEMILIK REKENING")["MUTASI"].sum().to_dict()
+        print(f"edges: {len(df_plot):,}")
+        nodes, edges = timed("build_vis_elements", build_vis_elements, df_plot, "", node_sums, False)
+        payload = timed("json.dumps", lambda: json.dumps(nodes) + json.dumps(edges))
+        print(f"  payload: {len(payload) / 1e6:.1f} MB, nodes: {len(nodes):,}")
+        if len(df_plot) <= args.skip_legacy_above:
+            old_nodes, old_edges = timed("legacy iterrows + pyvis", legacy_build, df_plot, "", node_sums, False)
+            assert old_nodes == nodes and old_edges == edges
+
+
+if __name__ == "__main__":
+    main()
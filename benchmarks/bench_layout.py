@@ -0,0 +1,62 @@
+"""
+Benchmark layout server (sna.layout) pada dataset/facebook_combined.txt
+(4.039 node, 88.234 edge).
+
+    python benchmarks/bench_layout.py --iterations 100
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from sna.layout import force_layout, layered_layout  # noqa: E402
+
+
+def load_facebook():
+    edges = pd.read_csv(BASE_DIR / "dataset" / "facebook_combined.txt", sep=" ", header=None, names=["src", "dst"])
+    return edges["src"].astype(str), edges["dst"].astype(str)
+
+
+def edge_length_ratio(names, pos, src, dst):
+    """Rata-rata panjang edge dibanding jarak dua node acak (makin kecil makin rapi)."""
+    index = pd.Index(names)
+    s, t = index.get_indexer(src), index.get_indexer(dst)
+    edge_len = np.linalg.norm(pos[s] - pos[t], axis=1).mean()
+    pairs = np.random.default_rng(0).integers(0, len(names), size=(20_000, 2))
+    random_len = np.linalg.norm(pos[pairs[:, 0]] - pos[pairs[:, 1]], axis=1).mean()
+    return edge_len / random_len
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=150)
+    parser.add_argument("--spring-length", type=float, default=250)
+    parser.add_argument("--node-distance", type=float, default=200)
+    parser.add_argument("--central-gravity", type=float, default=0.5)
+    args = parser.parse_args()
+
+    src, dst = load_facebook()
+    print(f"edges: {len(src):,}")
+
+    start = time.perf_counter()
+    names, pos = force_layout(src, dst, spring_length=args.spring_length, node_distance=args.node_distance,
+                              central_gravity=args.central_gravity, iterations=args.iterations)
+    elapsed = time.perf_counter() - start
+    print(f"force_layout   {elapsed:8.3f} s  nodes={len(names):,}  edge/random length={edge_length_ratio(names, pos, src, dst):.3f}")
+
+    for direction in ("UD", "LR"):
+        start = time.perf_counter()
+        names, pos = layered_layout(src, dst, level_separation=args.spring_length,
+                                    node_spacing=args.node_distance, direction=direction)
+        elapsed = time.perf_counter() - start
+        print(f"layered ({direction})   {elapsed:8.3f} s  layers={len(np.unique(pos[:, 1 if direction == 'UD' else 0]))}")
+
+
+if __name__ == "__main__":
+    main()
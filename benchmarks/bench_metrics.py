@@ -0,0 +1,110 @@
+"""
+Benchmark & pemeriksaan kebenaran sna.metrics terhadap networkx (perlu
+`pip install networkx`, tidak dipakai aplikasi) pada dataset/facebook_combined.txt:
+edge dibaca berarah, sebagian dibalik, nominal acak. Betweenness diperiksa untuk
+jalur eksak dan jalur sampling. Gagal dengan AssertionError
+jika hasil berbeda.
+
+    python benchmarks/bench_metrics.py --nodes 1000
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import networkx as nx
+import numpy as np
+import pandas as pd
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from sna.graph_core import build_csr  # noqa: E402
+from sna.metrics import betweenness, components, pagerank  # noqa: E402
+
+
+def load_edges(max_nodes, seed=0):
+    """EdgeCSR dari edge facebook antar `max_nodes` node pertama, satu baris per pasangan."""
+    edges = pd.read_csv(BASE_DIR / "dataset" / "facebook_combined.txt", sep=" ", header=None, names=["src", "dst"])
+    edges = edges[(edges["src"] < max_nodes) & (edges["dst"] < max_nodes)]
+    rng = np.random.default_rng(seed)
+    # Sebagian edge dibalik agar ada siklus (SCC tidak trivial)
+    back = edges[rng.random(len(edges)) < 0.3].rename(columns={"src": "dst", "dst": "src"})
+    edges = pd.concat([edges, back], ignore_index=True).drop_duplicates()
+    amount = rng.integers(1, 1_000, size=len(edges)) * 1_000_000.0
+    src, dst = edges["src"].to_numpy(np.int32), edges["dst"].to_numpy(np.int32)
+    return build_csr(max_nodes, src, dst, amount, np.ones(len(edges), dtype=np.int64))
+
+
+def to_networkx(edges):
+    graph = nx.DiGraph()
+    graph.add_nodes_from(range(edges.n))
+    graph.add_weighted_edges_from(zip(edges.src.tolist(), edges.dst.tolist(), edges.amount.tolist()))
+    return graph
+
+
+def timed(label, fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {elapsed:8.3f} s")
+    return result
+
+
+def same_partition(a, b):
+    """Dua pelabelan membentuk grup yang sama (nomor grup boleh beda)."""
+    pairs = pd.DataFrame({"a": a, "b": b}).drop_duplicates()
+    return pairs["a"].is_unique and pairs["b"].is_unique
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--nodes", type=int, default=1_000)
+    args = parser.parse_args()
+
+    edges = load_edges(args.nodes)
+    graph = to_networkx(edges)
+    print(f"nodes: {edges.n:,}  edges: {len(edges.src):,}")
+
+    rank = timed("pagerank", pagerank, edges)
+    nx_rank = timed("networkx pagerank", nx.pagerank, graph, tol=1e-12)
+    between = timed("betweenness (exact)", betweenness, edges, samples=edges.n)
+    nx_between = timed("networkx betweenness", nx.betweenness_centrality, graph)
+    weak, strong = timed("components", components, edges)
+
+    nx_rank = np.array([nx_rank[i] for i in range(edges.n)])
+    nx_between = np.array([nx_between[i] for i in range(edges.n)])
+    print(f"pagerank max diff    : {np.abs(rank - nx_rank).max():.2e}")
+    print(f"betweenness max diff : {np.abs(between - nx_between).max():.2e}")
+    assert np.allclose(rank, nx_rank, atol=1e-8)
+    assert np.allclose(between, nx_between, atol=1e-9)
+    nx_weak = np.empty(edges.n, dtype=np.int64)
+    for label, group in enumerate(nx.weakly_connected_components(graph)):
+        nx_weak[list(group)] = label
+    nx_strong = np.empty(edges.n, dtype=np.int64)
+    for label, group in enumerate(nx.strongly_connected_components(graph)):
+        nx_strong[list(group)] = label
+    assert same_partition(weak, nx_weak) and same_partition(strong, nx_strong)
+
+    # Jalur sampling: node tanpa edge keluar ditambahkan agar sumber disampling
+    # dari sebagian node saja. Semua pengirim dipakai -> harus sama dengan eksak.
+    padded = build_csr(edges.n + edges.n // 2, edges.src, edges.dst, edges.amount, edges.freq)
+    senders = len(np.unique(padded.src[padded.src != padded.dst]))
+    exact = timed("betweenness (padded)", betweenness, padded, samples=padded.n)
+    full = timed("betweenness (all senders)", betweenness, padded, samples=senders)
+    print(f"sampled (all senders) max diff: {np.abs(full - exact).max():.2e}")
+    assert np.allclose(full, exact, atol=1e-9)
+    # Seperempat pengirim: rata-rata beberapa seed harus mendekati total eksak
+    totals = [betweenness(padded, samples=senders // 4, seed=s).sum() for s in range(16)]
+    ratio = np.mean(totals) / exact.sum()
+    print(f"sampled / exact total : {ratio:.3f}")
+    assert 0.85 < ratio < 1.15
+
+    # Graph besar tanpa edge keluar sama sekali: sampel sumber kosong, hasil nol
+    empty = build_csr(3_000, np.zeros(0, np.int32), np.zeros(0, np.int32), np.zeros(0), np.zeros(0, np.int64))
+    assert not betweenness(empty).any()
+    print("ok: sama dengan networkx")
+
+
+if __name__ == "__main__":
+    main()
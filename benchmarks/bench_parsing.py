@@ -0,0 +1,68 @@
+"""
+Benchmark parsing MUTASI/TGL/TRANS: cara lama (str.replace + to_datetime dayfirst)
+vs sna.parsing. Data diambil dari dataset/data.csv lalu diperbanyak.
+
+    python benchmarks/bench_parsing.py --rows 10000000
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from sna.parsing import parse_amount, parse_date  # noqa: E402
+
+
+def legacy_amount(s):
+    return s.astype(str).str.replace(".", "", regex=False).str.replace(",", ".", regex=False).astype(float)
+
+
+def legacy_date(s):
+    return pd.to_datetime(s, dayfirst=True, errors="coerce")
+
+
+def scaled_frame(rows):
+    df = pd.read_csv(BASE_DIR / "dataset" / "data.csv", sep=";", dtype=str, usecols=["MUTASI", "TGL/TRANS"])
+    df = df.dropna()
+    reps = int(np.ceil(rows / len(df)))
+    return pd.concat([df] * reps, ignore_index=True).iloc[:rows]
+
+
+def timed(label, fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<32} {elapsed:8.3f} s")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    args = parser.parse_args()
+
+    df = scaled_frame(args.rows)
+    print(f"rows: {len(df):,}")
+
+    old_amount = timed("legacy MUTASI", legacy_amount, df["MUTASI"])
+    new_amount = timed("parse_amount (float)", parse_amount, df["MUTASI"])
+    cents = timed("parse_amount (int64 cents)", parse_amount, df["MUTASI"], as_cents=True)
+    old_date = timed("legacy TGL/TRANS", legacy_date, df["TGL/TRANS"])
+    new_date = timed("parse_date", parse_date, df["TGL/TRANS"])
+
+    assert np.allclose(old_amount.to_numpy(), new_amount.to_numpy(), equal_nan=True)
+    # Di luar pola cepat (desimal > 2 digit) tetap mengikuti cara lama
+    odd = pd.Series(["1.234,567", "1,2345", "-0,001", "12"])
+    assert np.allclose(legacy_amount(odd).to_numpy(), parse_amount(odd).to_numpy())
+    assert old_date.equals(new_date.astype(old_date.dtype))
+    print(f"total float : {new_amount.sum():,.2f}")
+    print(f"total cents : {int(cents.sum()) / 100:,.2f}")
+
+
+if __name__ == "__main__":
+    main()
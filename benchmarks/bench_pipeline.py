@@ -0,0 +1,283 @@
+"""
+Benchmark pipeline analisis end-to-end per tahap (upload, download, parse,
+clean, filter, groupby, LOD, graph build, layout, render HTML + ukuran payload)
+terhadap MinIO lokal atau moto server (pengganti MinIO, tanpa jaringan).
+
+Data sintetis mengikuti skema dataset/data.csv (sep ";", nominal "1.234,00",
+tanggal dd/mm/yyyy) dan di-generate deterministik dari --seed; kasus
+"facebook" memakai dataset/facebook_combined.txt sebagai graph besar.
+
+    python benchmarks/bench_pipeline.py --moto --rows 10000 1000000
+    python benchmarks/bench_pipeline.py --moto --case facebook --memory
+    python benchmarks/bench_pipeline.py --endpoint http://localhost:9000 --rows 10000000 --json hasil.json
+    python benchmarks/bench_pipeline.py --moto --rows 1000000 --baseline hasil.json
+"""
+import argparse
+import json
+import logging
+import os
+import socket
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from sna.graph_build import build_vis_elements  # noqa: E402
+from sna.graph_core import EntityIndex, aggregate_edges  # noqa: E402
+from sna.ingest import delete_cached, load_cleaned  # noqa: E402
+from sna.layout import force_layout  # noqa: E402
+from sna.lod import apply_render_budget, entity_banks  # noqa: E402
+from sna.profiling import Profiler, set_active, stage  # noqa: E402
+from sna.render import render_network_html  # noqa: E402
+from sna.storage import make_client  # noqa: E402
+
+BUCKET = "sna-bench"
+BANKS = ["BCA", "BRI", "BNI", "MANDIRI", "BSI", "CIMB", "DANAMON", "PERMATA", "SEABANK", "EXIM"]
+# Kira-kira jumlah baris per entitas unik di data sintetis
+ROWS_PER_ENTITY = 20
+WRITE_CHUNK_ROWS = 500_000
+# Opsi vis.js minimal; render hanya merangkai string, isi opsi tidak memengaruhi waktu
+VIS_OPTIONS = json.dumps({"physics": {"enabled": False}, "edges": {"arrows": {"to": {"enabled": True}}}})
+
+
+def statement_header():
+    with open(BASE_DIR / "dataset" / "data.csv", encoding="utf-8") as f:
+        return f.readline().rstrip("\r\n").split(";")
+
+
+def format_amount(values):
+    """Nominal integer -> format export bank "200.000.000,00"."""
+    return pd.Series(values).map("{:,}".format).str.replace(",", ".", regex=False) + ",00"
+
+
+def _statement_chunk(header, start, src, dst, amounts, days, names, accounts, banks, date_labels):
+    rows = len(src)
+    chunk = pd.DataFrame(index=np.arange(rows), columns=header, data="")
+    chunk["NO"] = np.arange(start + 1, start + rows + 1)
+    chunk["PEMILIK REKENING"] = names[src]
+    chunk["BANK"] = banks[src]
+    chunk["NO REK"] = accounts[src]
+    chunk["TGL/TRANS"] = date_labels[days]
+    chunk["URAIAN MUTASI"] = "TRANSFER KE " + names[dst]
+    chunk["JENIS TRANSAKSI"] = "TRANSFER KELUAR"
+    chunk["NAMA LAWAN"] = names[dst]
+    chunk["BANK LAWAN"] = banks[dst]
+    chunk["NO REK LAWAN"] = accounts[dst]
+    chunk["CUR"] = "IDR"
+    chunk["MUTASI"] = format_amount(amounts).to_numpy()
+    chunk["PENYESUAIAN"] = chunk["MUTASI"]
+    return chunk
+
+
+def write_statements(path, src, dst, names, seed=0):
+    """Tulis pasangan (src, dst) sebagai file mutasi berskema data.csv, per chunk."""
+    rng = np.random.default_rng(seed + 1)
+    header = statement_header()
+    n = len(names)
+    banks = np.array(BANKS)[rng.integers(0, len(BANKS), n)]
+    accounts = np.char.mod("%010d", rng.integers(10**9, 10**10, n, dtype=np.int64))
+    date_labels = pd.date_range("2014-01-01", periods=3650, freq="D").strftime("%d/%m/%Y").to_numpy()
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+        for start in range(0, len(src), WRITE_CHUNK_ROWS):
+            stop = min(start + WRITE_CHUNK_ROWS, len(src))
+            rows = stop - start
+            # Nominal log-normal (puluhan ribu s/d ratusan miliar), dibulatkan ke ribuan
+            amounts = (np.exp(rng.normal(17, 2.5, rows)).clip(1e4, 5e11) // 1000 * 1000).astype(np.int64)
+            days = rng.integers(0, len(date_labels), rows)
+            chunk = _statement_chunk(header, start, src[start:stop], dst[start:stop], amounts, days,
+                                     names, accounts, banks, date_labels)
+            chunk.to_csv(f, sep=";", index=False, header=start == 0)
+    os.replace(tmp_path, path)
+    return path
+
+
+def synthetic_statements(data_dir, rows, seed=0):
+    """File sintetis `rows` baris (di-cache per rows+seed agar run berikutnya identik & cepat)."""
+    path = Path(data_dir) / f"statements_{rows}_s{seed}.csv"
+    if path.exists():
+        return path
+    rng = np.random.default_rng(seed)
+    n = max(10, rows // ROWS_PER_ENTITY)
+    names = np.char.add("PT SINTETIS ", np.char.mod("%07d", np.arange(n)))
+    # Derajat berekor panjang: sedikit entitas sangat aktif, banyak entitas jarang muncul
+    src = (n * rng.random(rows) ** 3).astype(np.int64)
+    dst = (n * rng.random(rows) ** 2).astype(np.int64)
+    print(f"generate {path.name} ...")
+    return write_statements(path, src, dst, names, seed)
+
+
+def facebook_statements(data_dir, seed=0):
+    """dataset/facebook_combined.txt (88k edge) sebagai file mutasi: satu transaksi per edge."""
+    path = Path(data_dir) / f"statements_facebook_s{seed}.csv"
+    if path.exists():
+        return path
+    edges = pd.read_csv(BASE_DIR / "dataset" / "facebook_combined.txt", sep=" ", header=None, names=["src", "dst"])
+    nodes = np.union1d(edges["src"], edges["dst"])
+    names = np.char.add("FB ", nodes.astype(str))
+    src, dst = np.searchsorted(nodes, edges["src"]), np.searchsorted(nodes, edges["dst"])
+    print(f"generate {path.name} ...")
+    return write_statements(path, src, dst, names, seed)
+
+
+def start_moto():
+    """moto server di port bebas; mengembalikan (server, endpoint)."""
+    from moto.server import ThreadedMotoServer
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    # Log request per baris dari werkzeug menenggelamkan tabel hasil
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    server = ThreadedMotoServer(ip_address="127.0.0.1", port=port, verbose=False)
+    server.start()
+    return server, f"http://127.0.0.1:{port}"
+
+
+def run_case(s3, path, args):
+    """Jalankan satu file melalui seluruh tahap; mengembalikan Profiler-nya."""
+    profiler = set_active(Profiler(track_memory=args.memory))
+    key = path.name
+    with stage("upload", bytes=path.stat().st_size):
+        s3.upload_file(str(path), BUCKET, key)
+    delete_cached(s3, BUCKET, key)
+    with stage("load cold"):
+        load_cleaned(s3, BUCKET, key)
+    with stage("load warm"):
+        df = load_cleaned(s3, BUCKET, key)
+
+    with stage("entity index", rows=len(df)):
+        index = EntityIndex.from_frame(df)
+    with stage("filter"):
+        amounts = df["MUTASI"].to_numpy()
+        counted = df["TGL/TRANS"].notna().to_numpy()
+        value_mask = amounts >= args.min_value
+    with stage("groupby") as info:
+        edge_csr = aggregate_edges(index, amounts, counted, value_mask)
+        info["edges"] = len(edge_csr.src)
+    with stage("edge table"):
+        df_grouped = edge_csr.to_frame(index.names)
+        node_sums = df_grouped.groupby("PEMILIK REKENING")["MUTASI"].sum().to_dict()
+    clusters = {}
+    if args.max_nodes:
+        with stage("entity banks"):
+            groups = entity_banks(df)
+        with stage("level of detail"):
+            df_plot, supernodes = apply_render_budget(df_grouped, groups, args.max_nodes, args.max_edges)
+            clusters = dict(zip(supernodes["CLUSTER"], supernodes["ANGGOTA"]))
+    else:
+        df_plot = df_grouped
+    with stage("graph build") as info:
+        nodes, edges = build_vis_elements(df_plot, "", node_sums, False, clusters)
+        info["nodes"], info["edges"] = len(nodes), len(edges)
+    if args.layout:
+        with stage("layout"):
+            names, pos = force_layout(df_plot["PEMILIK REKENING"].astype(str), df_plot["NAMA LAWAN"].astype(str),
+                                      weights=df_plot["MUTASI"].fillna(0).to_numpy())
+            xy = dict(zip(names.tolist(), pos.round(1).tolist()))
+            for node in nodes:
+                node["x"], node["y"] = xy[node["id"]]
+    with stage("serialize json") as info:
+        nodes_json, edges_json = json.dumps(nodes), json.dumps(edges)
+        info["bytes"] = len(nodes_json) + len(edges_json)
+    with stage("html render") as info:
+        html = render_network_html(nodes_json, edges_json, VIS_OPTIONS)
+        info["bytes"] = len(html.encode("utf-8"))
+    set_active(None)
+    return profiler
+
+
+def stage_seconds(records):
+    """{"induk/anak": detik} dari catatan profiler (urutan masuk tahap, LEVEL = kedalaman)."""
+    out, path = {}, []
+    for record in records:
+        del path[record["LEVEL"]:]
+        path.append(record["TAHAP"])
+        out["/".join(path)] = record["DETIK"]
+    return out
+
+
+def compare(results, baseline, tolerance, min_seconds):
+    """Cetak tahap yang melambat > tolerance dibanding baseline; kembalikan jumlahnya."""
+    regressions = 0
+    for case, result in results.items():
+        if case not in baseline:
+            print(f"{case}: tidak ada di baseline")
+            continue
+        old = stage_seconds(baseline[case]["stages"])
+        for name, seconds in stage_seconds(result["stages"]).items():
+            if name in old and seconds > old[name] * (1 + tolerance) and seconds - old[name] > min_seconds:
+                regressions += 1
+                print(f"REGRESI {case:<18} {name:<32} {old[name]:8.3f} s -> {seconds:8.3f} s")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="*", default=[10_000, 1_000_000],
+                        help="ukuran file sintetis, mis. 10000 1000000 10000000")
+    parser.add_argument("--case", choices=["synthetic", "facebook", "all"], default="all")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--data-dir", default=os.path.join(tempfile.gettempdir(), "sna-bench"))
+    parser.add_argument("--endpoint", default=os.getenv("MINIO_ENDPOINT", "http://localhost:9000"))
+    parser.add_argument("--moto", action="store_true", help="jalankan moto server lokal sebagai pengganti MinIO")
+    parser.add_argument("--min-value", type=float, default=10_000_000)
+    parser.add_argument("--max-nodes", type=int, default=300, help="0 = render seluruh graph tanpa LOD")
+    parser.add_argument("--max-edges", type=int, default=1_000)
+    parser.add_argument("--layout", action="store_true", help="ikut ukur force layout server")
+    parser.add_argument("--memory", action="store_true", help="ukur puncak memori per tahap (tracemalloc, lebih lambat)")
+    parser.add_argument("--json", help="simpan hasil ke file JSON (bisa dipakai sebagai --baseline)")
+    parser.add_argument("--baseline", help="bandingkan dengan hasil JSON sebelumnya")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="batas perlambatan relatif per tahap")
+    parser.add_argument("--min-seconds", type=float, default=0.05, help="abaikan selisih di bawah ini (noise)")
+    args = parser.parse_args()
+
+    os.makedirs(args.data_dir, exist_ok=True)
+    cases = {}
+    if args.case in ("synthetic", "all"):
+        for rows in args.rows:
+            cases[f"synthetic_{rows}"] = synthetic_statements(args.data_dir, rows, args.seed)
+    if args.case in ("facebook", "all"):
+        cases["facebook"] = facebook_statements(args.data_dir, args.seed)
+
+    server = None
+    if args.moto:
+        server, args.endpoint = start_moto()
+    try:
+        s3 = make_client(args.endpoint, os.getenv("MINIO_ACCESS_KEY", "admin"), os.getenv("MINIO_SECRET_KEY", "admin123"))
+        try:
+            s3.create_bucket(Bucket=BUCKET)
+        except (s3.exceptions.BucketAlreadyOwnedByYou, s3.exceptions.BucketAlreadyExists):
+            pass
+        results = {}
+        for case, path in cases.items():
+            profiler = run_case(s3, path, args)
+            print(f"\n== {case} ({path.stat().st_size / 1024 ** 2:,.1f} MB), total {profiler.total_seconds():.3f} s")
+            frame = profiler.to_frame()
+            for col in frame.columns[frame.dtypes != np.float64]:
+                frame[col] = frame[col].astype(object).where(frame[col].notna(), "")
+            width = frame["TAHAP"].str.len().max()
+            print(frame.to_string(index=False, float_format=lambda v: f"{v:,.3f}",
+                                  formatters={"TAHAP": f"{{:<{width}}}".format}))
+            results[case] = json.loads(profiler.to_json(case=case, file=path.name))
+    finally:
+        if server is not None:
+            server.stop()
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance, args.min_seconds)
+        print(f"\n{regressions} tahap melambat > {args.tolerance:.0%}")
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
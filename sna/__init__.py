@@ -0,0 +1 @@
+"""Engine untuk analisis Financial Flow Network (ingest, graph, analytics)."""
@@ -0,0 +1,114 @@
+"""
+Styling node per bank dari config/bank_nodes.yaml. Config dibaca sekali,
+logo diperkecil & di-encode base64 sekali, lalu disimpan dalam satu tabel
+gambar {id: data URI}; node hanya membawa `imageId`, dan HTML memuat tiap
+logo satu kali saja berapa pun jumlah node bank tersebut.
+"""
+import base64
+import hashlib
+import mimetypes
+import re
+from dataclasses import dataclass, field
+from io import BytesIO
+from pathlib import Path
+
+import pandas as pd
+import yaml
+
+try:
+    from PIL import Image
+except ImportError:  # logo tetap dipakai, hanya tanpa diperkecil
+    Image = None
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+CONFIG_PATH = BASE_DIR / "config" / "bank_nodes.yaml"
+# Sisi terpanjang logo setelah diperkecil (px); node jarang digambar lebih besar dari ini
+LOGO_SIZE = 96
+
+
+def bank_key(name):
+    """Kunci pencocokan nama bank: huruf kecil alfanumerik, tanpa awalan "bank"."""
+    key = re.sub(r"[^a-z0-9]", "", str(name).lower())
+    return key[4:] if key.startswith("bank") and len(key) > 4 else key
+
+
+def _encode_image(path):
+    """Data URI logo (diperkecil ke LOGO_SIZE jika Pillow tersedia)."""
+    raw = path.read_bytes()
+    if Image is not None:
+        try:
+            with Image.open(BytesIO(raw)) as img:
+                img.thumbnail((LOGO_SIZE, LOGO_SIZE))
+                buf = BytesIO()
+                img.save(buf, format="PNG", optimize=True)
+            return "data:image/png;base64," + base64.b64encode(buf.getvalue()).decode()
+        except OSError:
+            pass
+    mime = mimetypes.guess_type(path.name)[0] or "image/png"
+    return f"data:{mime};base64," + base64.b64encode(raw).decode()
+
+
+@dataclass
+class BankStyles:
+    """Style per bank (kunci bank_key) + tabel gambar bersama {image_id: data URI}."""
+    banks: dict
+    default: dict
+    images: dict = field(default_factory=dict)
+
+    @classmethod
+    def load(cls, path=CONFIG_PATH, base_dir=BASE_DIR):
+        with open(path, encoding="utf-8") as f:
+            config = yaml.safe_load(f) or {}
+        banks, images, image_ids = {}, {}, {}
+        for name, style in (config.get("banks") or {}).items():
+            style = dict(style or {})
+            image_file = style.pop("image_file", None)
+            if image_file:
+                image_path = Path(base_dir) / image_file
+                if image_path.exists():
+                    # File yang isinya sama (logo dipakai beberapa bank) cukup satu entry
+                    digest = hashlib.sha1(image_path.read_bytes()).hexdigest()
+                    if digest not in image_ids:
+                        image_ids[digest] = f"img{len(image_ids)}"
+                        images[image_ids[digest]] = _encode_image(image_path)
+                    style["image_id"] = image_ids[digest]
+                else:
+                    print(f"Logo bank '{name}' tidak ditemukan: {image_path}")
+            banks[bank_key(name)] = style
+        return cls(banks=banks, default=dict(config.get("default") or {}), images=images)
+
+    def style_for(self, bank):
+        return self.banks.get(bank_key(bank))
+
+
+def apply_bank_styles(nodes, entity_bank, styles, focus_color=None, keep_color=False):
+    """
+    Warna (dan logo jika ada) node menurut bank dominan entitas. Node tanpa bank
+    yang dikenal (termasuk supernode) tidak diubah; node fokus tetap berbingkai
+    `focus_color`. keep_color=True (warna node sudah dari metrik) hanya memasang
+    logo, dengan warna node yang ada sebagai bingkai.
+    Mengembalikan (nodes, tabel gambar yang benar-benar dipakai).
+    """
+    banks = pd.Series(entity_bank).reindex([node["id"] for node in nodes])
+    used = {}
+    for node, bank in zip(nodes, banks.tolist()):
+        if not isinstance(bank, str):
+            continue
+        style = styles.style_for(bank)
+        if style is None:
+            continue
+        color = style.get("color", styles.default.get("color"))
+        is_focus = focus_color is not None and node.get("color") == focus_color
+        image_id = style.get("image_id")
+        if image_id:
+            node["shape"] = "circularImage"
+            node["imageId"] = image_id
+            border = node["color"] if is_focus or keep_color else color
+            node["color"] = {"border": border, "background": "#ffffff"}
+            node["borderWidth"] = 3
+            used[image_id] = styles.images[image_id]
+        elif not is_focus and not keep_color:
+            # Ikon FontAwesome di config tidak dipakai: font tidak ikut di static/lib
+            node["color"] = color
+        node["title"] = f"{node['title']} | Bank: {bank}"
+    return nodes, used
@@ -0,0 +1,121 @@
+"""
+Deteksi siklus temporal (A -> B -> C -> A) dan round-trip (A -> B -> A):
+rangkaian transaksi yang berurutan waktu, kembali ke akun awal di dalam
+jendela waktu tertentu, dengan nominal tiap langkah mendekati nominal awal.
+
+Memakai adjacency keluar TraceIndex yang sudah terurut per (node, tanggal),
+sehingga perpanjangan jalur cukup searchsorted + slicing untuk semua jalur
+sekaligus.
+"""
+import numpy as np
+import pandas as pd
+
+from sna.trace import _expand
+
+# Batas jumlah jalur terbuka per batch agar memori tetap terkendali
+MAX_OPEN_PATHS = 2_000_000
+_START_BATCH = 100_000
+
+
+def _window_limit(index, window_days):
+    """Rank terakhir yang masih di dalam jendela waktu, untuk tiap rank awal."""
+    end = index.dates + np.timedelta64(int(window_days * 86_400), "s")
+    return np.concatenate([[0], np.searchsorted(index.dates, end, side="right")])
+
+
+def find_cycles(index, max_len=4, window_days=7, tolerance=0.1, min_amount=0, max_cycles=10_000):
+    """
+    Kembalikan (cycles, truncated). `cycles` adalah list array edge-id
+    (posisi di TraceIndex) per panjang siklus, bentuk (jumlah, panjang).
+
+    Syarat siklus: tanggal tiap langkah >= langkah sebelumnya, seluruhnya
+    dalam `window_days` dari transaksi pertama, nominal tiap langkah dalam
+    +/- `tolerance` dari nominal awal, dan tidak ada akun yang dilewati dua
+    kali. Transaksi pertama selalu yang paling awal (rank, lalu posisi),
+    sehingga rotasi siklus yang sama tidak dihitung ulang.
+    """
+    amount, rank, src, dst = index.amount, index.rank, index.src, index.dst
+    stride = index.n_ranks + 1
+    limit = _window_limit(index, window_days)
+    starts = np.flatnonzero((amount >= min_amount) & (src != dst))
+
+    found = {length: [] for length in range(2, max_len + 1)}
+    n_found = 0
+    truncated = False
+    for b in range(0, len(starts), _START_BATCH):
+        paths = starts[b:b + _START_BATCH, None]
+        for length in range(2, max_len + 1):
+            first, last = paths[:, 0], paths[:, -1]
+            node = dst[last]
+            lo = np.searchsorted(index.out_key, node * stride + rank[last], side="left")
+            hi = np.searchsorted(index.out_key, node * stride + limit[rank[first]], side="right")
+            pos, owner = _expand(lo, hi)
+            nxt = index.out_order[pos]
+            base = paths[owner]
+            a0 = amount[base[:, 0]]
+            r0 = rank[base[:, 0]]
+
+            ok = (np.abs(amount[nxt] - a0) <= tolerance * a0) & (src[nxt] != dst[nxt])
+            ok &= (rank[nxt] > r0) | ((rank[nxt] == r0) & (nxt > base[:, 0]))
+            for j in range(base.shape[1]):
+                ok &= dst[nxt] != dst[base[:, j]]
+            paths = np.column_stack([base[ok], nxt[ok]])
+
+            closed = dst[paths[:, -1]] == src[paths[:, 0]]
+            if closed.any():
+                found[length].append(paths[closed])
+                n_found += int(closed.sum())
+            paths = paths[~closed]
+            if n_found >= max_cycles:
+                truncated = True
+                break
+            if len(paths) > MAX_OPEN_PATHS:
+                # Jalur dengan nominal awal terbesar diprioritaskan
+                paths = paths[np.argsort(-amount[paths[:, 0]], kind="stable")[:MAX_OPEN_PATHS]]
+                truncated = True
+            if len(paths) == 0:
+                break
+        if n_found >= max_cycles:
+            break
+
+    cycles = [np.concatenate(parts) for parts in found.values() if parts]
+    return cycles, truncated
+
+
+def cycle_tables(index, df, cycles):
+    """
+    (ringkasan, detail) siklus. Ringkasan satu baris per siklus; detail satu
+    baris per transaksi (untuk ekspor & penandaan edge di graph).
+    """
+    cols = [c for c in ["NO", "PEMILIK REKENING", "NAMA LAWAN", "TGL/TRANS", "MUTASI"] if c in df.columns]
+    if not cycles:
+        return (pd.DataFrame(columns=["SIKLUS", "PANJANG", "JALUR", "MULAI", "SELESAI", "DURASI (HARI)",
+                                      "NOMINAL AWAL", "NOMINAL AKHIR"]),
+                pd.DataFrame(columns=["SIKLUS", "LANGKAH"] + cols))
+
+    lengths = np.concatenate([np.full(len(c), c.shape[1]) for c in cycles])
+    edges = np.concatenate([c.ravel() for c in cycles])
+    cycle_no = np.repeat(np.arange(1, len(lengths) + 1), lengths)
+    step = np.concatenate([np.tile(np.arange(1, c.shape[1] + 1), len(c)) for c in cycles])
+
+    detail = df.iloc[index.rows[edges]][cols].reset_index(drop=True)
+    detail.insert(0, "LANGKAH", step)
+    detail.insert(0, "SIKLUS", cycle_no)
+
+    grouped = detail.groupby("SIKLUS", sort=True)
+    summary = pd.DataFrame({
+        "PANJANG": lengths,
+        "JALUR": (grouped["PEMILIK REKENING"].agg(" → ".join) + " → "
+                  + grouped["PEMILIK REKENING"].first().astype(str)).to_numpy(),
+        "MULAI": grouped["TGL/TRANS"].min().to_numpy(),
+        "SELESAI": grouped["TGL/TRANS"].max().to_numpy(),
+        "NOMINAL AWAL": grouped["MUTASI"].first().to_numpy(),
+        "NOMINAL AKHIR": grouped["MUTASI"].last().to_numpy(),
+    }, index=pd.Index(np.arange(1, len(lengths) + 1), name="SIKLUS"))
+    summary.insert(4, "DURASI (HARI)", (summary["SELESAI"] - summary["MULAI"]).dt.days)
+    return summary.reset_index(), detail
+
+
+def cycle_pairs(detail):
+    """Pasangan (pengirim, penerima) yang menjadi bagian dari siklus."""
+    return set(zip(detail["PEMILIK REKENING"].astype(str), detail["NAMA LAWAN"].astype(str)))
@@ -0,0 +1,267 @@
+"""
+Resolusi entitas: nama pemilik/lawan yang sebenarnya sama ("PT. ENERGI
+TERBARU" vs "PT ENERGI TERBARU") digabung menjadi satu node, lewat
+
+1. normalisasi nama (huruf besar, tanda baca & spasi ganda dibuang),
+2. rekening yang sama (BANK + NO REK / BANK LAWAN + NO REK LAWAN),
+3. opsional, kemiripan trigram (Jaccard) dengan blocking: hanya nama yang
+   berbagi kata langka atau bertetangga setelah diurutkan yang dibandingkan,
+   jadi tidak kuadratik.
+
+Hasilnya peta {nama asli: nama kanonik} yang disimpan per bucket di MinIO
+agar hanya dihitung sekali per versi data & parameter.
+"""
+import hashlib
+import json
+import os
+import re
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+from botocore.exceptions import ClientError
+from scipy.sparse import coo_matrix, csr_matrix
+from scipy.sparse.csgraph import connected_components
+
+# Naikkan jika aturan normalisasi/penggabungan berubah, agar peta lama dihitung ulang
+RESOLUTION_VERSION = "2"
+# Satu object per bucket berisi peta untuk beberapa versi data terakhir
+ENTITY_MAP_KEY = "entities.sna.json"
+MAX_STORED_MAPS = int(os.getenv("SNA_ER_MAX_STORED_MAPS", "16"))
+
+# Kata yang dimiliki lebih dari sekian nama terlalu umum untuk dijadikan blok ("PT", "JAYA")
+MAX_BLOCK_SIZE = int(os.getenv("SNA_ER_MAX_BLOCK", "50"))
+# Jumlah tetangga urutan alfabetis yang ikut dibandingkan (sorted-neighbourhood)
+NEIGHBOURHOOD_WINDOW = int(os.getenv("SNA_ER_WINDOW", "5"))
+# Rekening yang dipakai lebih dari sekian nama berbeda dianggap rekening bersama/penampung
+MAX_NAMES_PER_ACCOUNT = int(os.getenv("SNA_ER_MAX_NAMES_PER_ACCOUNT", "5"))
+MIN_ACCOUNT_DIGITS = 5
+_PAIR_BATCH = 1_000_000
+_ROW_BATCH = 20_000
+
+NAME_COLUMNS = (("PEMILIK REKENING", "BANK", "NO REK"), ("NAMA LAWAN", "BANK LAWAN", "NO REK LAWAN"))
+# Nilai BANK yang sebenarnya berarti "tidak diketahui"
+_EMPTY_BANKS = {"", "-", "EMPTY", "NAN", "NONE"}
+# Bentuk badan usaha yang sering ditulis dengan titik/spasi ("P.T.", "C V")
+_LEGAL_FORMS = re.compile(r"\b(P T|C V|U D|T B K)\b")
+# Nama normal yang hanya berisi bentuk badan usaha ("PT", "CV TBK") tidak menunjuk entitas tertentu
+_LEGAL_ONLY = r"^(?:(?:PT|CV|UD|TBK)\s*)+$"
+
+
+def normalize_names(names):
+    """Bentuk pembanding nama: huruf besar, tanpa tanda baca, spasi tunggal."""
+    norm = pd.Series(names, dtype="string").fillna("").str.upper()
+    norm = norm.str.replace(r"[^\w\s]", " ", regex=True).str.replace(r"\s+", " ", regex=True).str.strip()
+    return norm.str.replace(_LEGAL_FORMS, lambda m: m.group(0).replace(" ", ""), regex=True)
+
+
+def _account_keys(banks, accounts):
+    """Kunci BANK|digit rekening, atau <NA> jika bank/rekening tidak diketahui."""
+    banks = pd.Series(banks, dtype="string").fillna("").str.strip().str.upper()
+    digits = pd.Series(accounts, dtype="string").fillna("").str.replace(r"\.0$", "", regex=True).str.replace(r"\D", "", regex=True)
+    valid = ~banks.isin(_EMPTY_BANKS) & (digits.str.len() >= MIN_ACCOUNT_DIGITS)
+    return (banks + "|" + digits).where(valid)
+
+
+def _trigram_matrix(names):
+    """Matriks biner nama x trigram (nama diberi padding spasi)."""
+    vocab = {}
+    rows, cols = [], []
+    for i, name in enumerate(names):
+        padded = f"  {name} "
+        grams = {padded[j:j + 3] for j in range(len(padded) - 2)}
+        rows.extend([i] * len(grams))
+        cols.extend(vocab.setdefault(g, len(vocab)) for g in grams)
+    data = np.ones(len(rows), dtype=np.float32)
+    return csr_matrix((data, (rows, cols)), shape=(len(names), len(vocab)))
+
+
+def _candidate_pairs(names, max_block, window):
+    """
+    Pasangan kandidat (i < j) dari dua blocking:
+    - token: nama yang berbagi kata langka (kata dimiliki <= max_block nama),
+    - sorted-neighbourhood: tetangga terdekat setelah nama diurutkan, maju dan
+      terbalik (menangkap typo di kata yang tidak punya pasangan token).
+    """
+    n = len(names)
+    series = pd.Series(names, dtype="string")
+    tokens = series.str.split().explode().dropna()
+    token_id, _ = pd.factorize(tokens)
+    owners = tokens.index.to_numpy()
+    incidence = csr_matrix((np.ones(len(owners), dtype=np.float32), (owners, token_id)),
+                           shape=(n, int(token_id.max()) + 1 if len(token_id) else 0))
+    block_size = np.diff(incidence.tocsc().indptr)
+    incidence = incidence[:, np.flatnonzero(block_size <= max_block)].tocsr()
+
+    keys = []
+    # Per potongan baris agar matriks kandidat tidak dibentuk sekaligus
+    for start in range(0, n, _ROW_BATCH):
+        part = (incidence[start:start + _ROW_BATCH] @ incidence.T).tocoo()
+        i = part.row.astype(np.int64) + start
+        j = part.col.astype(np.int64)
+        keys.append(i[i < j] * n + j[i < j])
+    for key in (series, series.str[::-1]):
+        order = np.argsort(key.to_numpy(dtype=object), kind="stable")
+        for step in range(1, window):
+            i, j = order[:-step], order[step:]
+            keys.append(np.minimum(i, j).astype(np.int64) * n + np.maximum(i, j))
+    keys = np.unique(np.concatenate(keys)) if keys else np.array([], dtype=np.int64)
+    return keys // n, keys % n
+
+
+def fuzzy_pairs(names, threshold=0.85, max_block=MAX_BLOCK_SIZE, window=NEIGHBOURHOOD_WINDOW):
+    """
+    Pasangan indeks (i, j) nama yang Jaccard trigramnya >= threshold. Hanya
+    kandidat hasil blocking yang dibandingkan, sehingga tidak kuadratik.
+    Angka di nama harus sama persis agar "TOKO 1" dan "TOKO 2" tidak tergabung.
+    """
+    names = list(names)
+    if len(names) < 2:
+        return np.zeros((0, 2), dtype=np.int64)
+    i, j = _candidate_pairs(names, max_block, window)
+    grams = _trigram_matrix(names)
+    sizes = np.diff(grams.indptr)
+    digits = pd.Series(names, dtype="string").str.replace(r"\D", "", regex=True).to_numpy()
+    keep = []
+    for b in range(0, len(i), _PAIR_BATCH):
+        bi, bj = i[b:b + _PAIR_BATCH], j[b:b + _PAIR_BATCH]
+        inter = np.asarray(grams[bi].multiply(grams[bj]).sum(axis=1)).ravel()
+        jaccard = inter / np.maximum(sizes[bi] + sizes[bj] - inter, 1)
+        keep.append(np.flatnonzero((jaccard >= threshold) & (digits[bi] == digits[bj])) + b)
+    keep = np.concatenate(keep) if keep else np.array([], dtype=np.int64)
+    return np.column_stack([i[keep], j[keep]])
+
+
+def resolve_entities(df, by_account=True, fuzzy_threshold=None):
+    """
+    Peta {nama asli: nama kanonik} untuk nama yang digabung (nama yang tidak
+    berubah tidak dicantumkan). Nama kanonik = nama asli yang paling sering
+    muncul di kelompoknya.
+    """
+    parts = []
+    for name_col, bank_col, account_col in NAME_COLUMNS:
+        if name_col not in df.columns:
+            continue
+        if by_account and bank_col in df.columns and account_col in df.columns:
+            account = _account_keys(df[bank_col], df[account_col]).to_numpy()
+        else:
+            account = pd.NA
+        parts.append(pd.DataFrame({"NAMA": df[name_col].astype("string").to_numpy(), "AKUN": account}))
+    if not parts:
+        return {}
+    rows = pd.concat(parts, ignore_index=True)
+    name_id, raw_names = pd.factorize(rows["NAMA"])
+    counts = np.bincount(name_id, minlength=len(raw_names))
+
+    # Setiap nama asli, bentuk normal, dan rekening menjadi node; edge = "sama dengan"
+    norm = normalize_names(raw_names)
+    norm_id, norm_names = pd.factorize(norm)
+    n_raw, n_norm = len(raw_names), len(norm_names)
+    # Nama yang kosong setelah normalisasi (hanya tanda baca / bentuk badan usaha) tidak
+    # dihubungkan ke apa pun: tanpa ini semuanya berbagi satu node "" dan tergabung
+    blank = pd.Series(norm_names, dtype="string").str.fullmatch(r"|" + _LEGAL_ONLY).to_numpy(dtype=bool)
+    named = ~blank[norm_id]
+    links = [np.column_stack([np.flatnonzero(named), n_raw + norm_id[named]])]
+
+    accounts = pd.DataFrame({"NORM": norm_id[name_id], "AKUN": rows["AKUN"]})[named[name_id]]
+    accounts = accounts.dropna().drop_duplicates()
+    if len(accounts):
+        names_per_account = accounts.groupby("AKUN")["NORM"].transform("size")
+        accounts = accounts[names_per_account <= MAX_NAMES_PER_ACCOUNT]
+        account_id, _ = pd.factorize(accounts["AKUN"])
+        links.append(np.column_stack([n_raw + accounts["NORM"].to_numpy(), n_raw + n_norm + account_id]))
+        n_accounts = int(account_id.max()) + 1 if len(account_id) else 0
+    else:
+        n_accounts = 0
+
+    if fuzzy_threshold:
+        pairs = fuzzy_pairs(norm_names, fuzzy_threshold)
+        links.append(n_raw + pairs[~blank[pairs].any(axis=1)])
+
+    links = np.concatenate(links)
+    size = n_raw + n_norm + n_accounts
+    graph = coo_matrix((np.ones(len(links), dtype=np.int8), (links[:, 0], links[:, 1])), shape=(size, size))
+    _, labels = connected_components(graph, directed=False)
+    group = labels[:n_raw]
+
+    # Wakil kelompok: nama asli paling sering, lalu paling pendek, lalu alfabetis
+    members = pd.DataFrame({"GRUP": group, "NAMA": np.asarray(raw_names, dtype=object), "N": counts})
+    members["PANJANG"] = members["NAMA"].str.len()
+    members = members.sort_values(["GRUP", "N", "PANJANG", "NAMA"], ascending=[True, False, True, True])
+    canonical = members.drop_duplicates("GRUP").set_index("GRUP")["NAMA"]
+    members["KANONIK"] = canonical.reindex(members["GRUP"]).to_numpy()
+    changed = members[members["NAMA"] != members["KANONIK"]]
+    return dict(zip(changed["NAMA"], changed["KANONIK"]))
+
+
+def apply_entity_map(df, mapping):
+    """DataFrame dengan PEMILIK REKENING/NAMA LAWAN diganti nama kanonik (df asal tidak diubah)."""
+    if not mapping:
+        return df
+    lookup = pd.Series(mapping, dtype=object)
+    replaced = {}
+    for name_col, _, _ in NAME_COLUMNS:
+        if name_col in df.columns:
+            # Ganti di tingkat nilai unik, lalu sebarkan kembali ke baris
+            codes, uniques = pd.factorize(df[name_col])
+            uniques = pd.Index(uniques, dtype=object)
+            resolved = lookup.reindex(uniques).fillna(pd.Series(uniques, index=uniques)).to_numpy(dtype=object)
+            if isinstance(df[name_col].dtype, pd.CategoricalDtype):
+                # Kolom kategori (lihat ingest.DICTIONARY_COLUMNS): kamus diganti, kode baris dipetakan ulang
+                new_codes, new_names = pd.factorize(resolved)
+                replaced[name_col] = pd.Categorical.from_codes(np.where(codes >= 0, new_codes[codes], -1), new_names)
+            else:
+                replaced[name_col] = pd.array(resolved[codes], dtype=df[name_col].dtype)
+    return df.assign(**replaced)
+
+
+def merge_table(mapping):
+    """Tabel audit penggabungan: nama asli -> entitas kanonik, dikelompokkan."""
+    table = pd.DataFrame({"NAMA ASLI": list(mapping), "ENTITAS": list(mapping.values())})
+    return table.sort_values(["ENTITAS", "NAMA ASLI"]).reset_index(drop=True)
+
+
+def map_fingerprint(data_etag, by_account, fuzzy_threshold):
+    """Identitas peta: versi data (ETag file / sidik jari bucket) + parameter + versi aturan."""
+    raw = f"{RESOLUTION_VERSION}\0{data_etag}\0{int(bool(by_account))}\0{fuzzy_threshold or 0}"
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def read_entity_map(s3, bucket, fingerprint):
+    """Peta tersimpan untuk `fingerprint`, atau None jika belum pernah dihitung."""
+    try:
+        stored = json.loads(s3.get_object(Bucket=bucket, Key=ENTITY_MAP_KEY)["Body"].read())
+    except (ClientError, ValueError):
+        return None
+    entry = stored.get("maps", {}).get(fingerprint)
+    return entry["map"] if entry else None
+
+
+def write_entity_map(s3, bucket, fingerprint, mapping):
+    """Simpan peta; hanya MAX_STORED_MAPS versi terbaru yang dipertahankan."""
+    try:
+        stored = json.loads(s3.get_object(Bucket=bucket, Key=ENTITY_MAP_KEY)["Body"].read())
+    except (ClientError, ValueError):
+        stored = {}
+    maps = stored.get("maps", {})
+    maps[fingerprint] = {"map": mapping, "created": datetime.now(timezone.utc).isoformat()}
+    newest = sorted(maps, key=lambda k: maps[k]["created"], reverse=True)[:MAX_STORED_MAPS]
+    s3.put_object(
+        Bucket=bucket,
+        Key=ENTITY_MAP_KEY,
+        Body=json.dumps({"version": RESOLUTION_VERSION, "maps": {k: maps[k] for k in newest}}).encode(),
+        ContentType="application/json",
+    )
+
+
+def load_or_resolve(s3, bucket, data_etag, df, by_account=True, fuzzy_threshold=None):
+    """Peta dari MinIO jika sudah ada untuk versi data & parameter ini; jika belum, hitung lalu simpan."""
+    fingerprint = map_fingerprint(data_etag, by_account, fuzzy_threshold)
+    mapping = read_entity_map(s3, bucket, fingerprint)
+    if mapping is None:
+        mapping = resolve_entities(df, by_account, fuzzy_threshold)
+        try:
+            write_entity_map(s3, bucket, fingerprint, mapping)
+        except ClientError as e:
+            print(f"Gagal menyimpan peta entitas: {e}")
+    return mapping
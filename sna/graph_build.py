@@ -0,0 +1,159 @@
+"""
+Builder node/edge vis.js secara vektor: warna, ukuran, lebar, label dan
+lengkungan dihitung per kolom, lalu node & edge dikeluarkan dalam satu pass.
+"""
+import numpy as np
+import pandas as pd
+
+NODE_FONT = {'color': '#333333', 'size': 14, 'strokeWidth': 2, 'strokeColor': '#ffffff'}
+# Label putih pinggirannya agar terbaca
+EDGE_FONT = {'size': 10, 'color': '#333333', 'strokeWidth': 2, 'strokeColor': '#ffffff'}
+
+FOCUS_COLOR = "#dc2626"
+SENDER_COLOR = "#2563eb"
+RECEIVER_COLOR = "#16a34a"
+CLUSTER_COLOR = "#f59e0b"
+CYCLE_COLOR = "#f97316"
+BASE_ROUNDNESS = 0.15
+# Warna grup (komunitas/komponen) 1..12; grup yang lebih kecil abu-abu
+GROUP_PALETTE = [
+    "#2563eb", "#16a34a", "#f59e0b", "#9333ea", "#0891b2", "#db2777",
+    "#65a30d", "#ea580c", "#4f46e5", "#0d9488", "#b91c1c", "#a16207",
+]
+OTHER_GROUP_COLOR = "#94a3b8"
+
+
+def format_miliar_array(values):
+    """Versi vektor dari format_miliar (label Juta/Miliar)."""
+    values = np.asarray(values, dtype=np.float64)
+    absval = np.abs(values)
+    miliar = absval >= 1_000_000_000
+    juta = ~miliar & (absval >= 1_000_000)
+    labels = np.empty(len(values), dtype=object)
+    if miliar.any():
+        labels[miliar] = np.char.add(np.char.mod("%.2f", values[miliar] / 1_000_000_000), " Miliar")
+    if juta.any():
+        labels[juta] = np.char.add(np.char.mod("%.2f", values[juta] / 1_000_000), " Juta")
+    rest = ~(miliar | juta)
+    # Nilai kecil jarang muncul (di bawah min_value default), format ribuan tetap per nilai
+    labels[rest] = [f"{v:,.0f}" for v in values[rest]]
+    return labels.astype(str)
+
+
+def node_table(src, tgt, search_id, senders, clusters=None):
+    """Node unik sesuai urutan kemunculan (sumber lalu tujuan per baris) beserta warna, ukuran & bentuk."""
+    ids = pd.unique(np.column_stack([src, tgt]).ravel())
+    is_focus = ids == search_id if search_id else np.zeros(len(ids), dtype=bool)
+    is_sender = pd.Index(ids).isin(senders)
+    color = np.where(is_focus, FOCUS_COLOR, np.where(is_sender, SENDER_COLOR, RECEIVER_COLOR))
+    size = np.where(is_focus, 30, 15)
+    shape = np.full(len(ids), "dot", dtype=object)
+    title = np.char.add("Entity: ", ids.astype(str)).astype(object)
+
+    if clusters:
+        # Supernode hasil level-of-detail
+        member_count = pd.Series(clusters).reindex(ids)
+        is_cluster = member_count.notna().to_numpy()
+        color = np.where(is_cluster, CLUSTER_COLOR, color)
+        size = np.where(is_cluster, 25, size)
+        shape[is_cluster] = "diamond"
+        title[is_cluster] = [f"Cluster: {nid} ({int(n)} entitas)" for nid, n in zip(ids[is_cluster], member_count[is_cluster])]
+    return ids, color, size, shape, title
+
+
+def edge_table(src, tgt, total_val, freq, search_id, break_down):
+    """Kolom-kolom atribut edge (label, warna, lebar, lengkungan)."""
+    labels = format_miliar_array(total_val)
+    if not break_down:
+        many = freq > 1
+        if many.any():
+            suffix = np.char.add(np.char.add(" | ", freq[many].astype(str)), "x transaksi")
+            labels = labels.astype(object)
+            labels[many] = np.char.add(labels[many].astype(str), suffix)
+
+    curve_type = np.where(src <= tgt, "curvedCW", "curvedCCW")
+    if break_down:
+        # Menambah lengkungan setiap garis berdasarkan urutan transaksi
+        roundness = BASE_ROUNDNESS + np.arange(len(src)) * 0.2
+        width = np.full(len(src), 2.0)
+    else:
+        roundness = np.full(len(src), BASE_ROUNDNESS)
+        width = np.clip(total_val / 100_000_000, 2, 15)
+
+    if search_id:
+        color = np.select([src == search_id, tgt == search_id], ["#FF3366", "#22FF88"], "44CCFF")
+    else:
+        color = np.full(len(src), "rgba(200, 200, 200, 0.5)")
+    return labels, color, width, curve_type, roundness
+
+
+def build_vis_elements(df_plot, search_id, node_sums, break_down, clusters=None):
+    """
+    Pengganti loop df_plot.iterrows() + net.add_node/add_edge.
+    Mengembalikan (nodes, edges) dalam format yang sama dengan pyvis.
+    `clusters` (opsional) memetakan id supernode -> jumlah anggota.
+    """
+    src = df_plot["PEMILIK REKENING"].astype(str).to_numpy(dtype=object)
+    tgt = df_plot["NAMA LAWAN"].astype(str).to_numpy(dtype=object)
+    total_val = df_plot["MUTASI"].to_numpy(dtype=np.float64)
+    if "FREKUENSI" in df_plot.columns:
+        freq = df_plot["FREKUENSI"].to_numpy(dtype=np.int64)
+    else:
+        freq = np.ones(len(df_plot), dtype=np.int64)
+
+    node_ids, node_color, node_size, node_shape, node_title = node_table(src, tgt, search_id, list(node_sums), clusters)
+    labels, color, width, curve_type, roundness = edge_table(src, tgt, total_val, freq, search_id, break_down)
+
+    nodes = [
+        {"color": c, "size": int(sz), "shape": sh, "font": NODE_FONT, "title": tt, "id": nid, "label": nid}
+        for nid, c, sz, sh, tt in zip(
+            node_ids.tolist(), node_color.tolist(), node_size.tolist(), node_shape.tolist(), node_title.tolist(),
+        )
+    ]
+    edges = [
+        {"from": s, "to": t, "value": v, "label": lb, "color": c, "width": w, "arrows": "to",
+         "font": EDGE_FONT, "smooth": {"enabled": True, "type": ct, "roundness": r}}
+        for s, t, v, lb, c, w, ct, r in zip(
+            src.tolist(), tgt.tolist(), total_val.tolist(), labels.tolist(), color.tolist(),
+            width.tolist(), curve_type.tolist(), roundness.tolist(),
+        )
+    ]
+    return nodes, edges
+
+
+def apply_node_metrics(nodes, metrics, size_by=None, color_by=None):
+    """
+    Ukuran node menurut kolom metrik `size_by` (skala akar, 10-50) dan warna
+    menurut nomor grup `color_by`. Node di luar tabel metrik (supernode) dan
+    warna node fokus tidak diubah.
+    """
+    table = metrics.reindex([node["id"] for node in nodes])
+    known = table.index.isin(metrics.index)
+    if size_by:
+        values = table[size_by].to_numpy(dtype=np.float64)
+        top = np.nanmax(values[known]) if known.any() else 0.0
+        scaled = np.sqrt(np.clip(values / top, 0, 1)) if top > 0 else np.zeros(len(values))
+        sizes = np.rint(10 + 40 * np.nan_to_num(scaled)).astype(int)
+    if color_by:
+        group = table[color_by].fillna(0).to_numpy(dtype=np.int64)
+        palette = np.array(GROUP_PALETTE + [OTHER_GROUP_COLOR], dtype=object)
+        colors = palette[np.where((group >= 1) & (group <= len(GROUP_PALETTE)), group - 1, len(GROUP_PALETTE))]
+
+    for i in np.flatnonzero(known):
+        node = nodes[i]
+        if size_by:
+            node["size"] = int(sizes[i])
+            node["title"] = f"{node['title']} | {size_by}: {table[size_by].iat[i]:,.4g}"
+        if color_by and node["color"] != FOCUS_COLOR:
+            node["color"] = colors[i]
+            node["title"] = f"{node['title']} | {color_by}: {int(group[i])}"
+    return nodes
+
+
+def highlight_edges(edges, pairs, color=CYCLE_COLOR):
+    """Tebalkan & warnai edge yang pasangan (from, to)-nya ada di `pairs` (mis. bagian dari siklus)."""
+    for edge in edges:
+        if (edge["from"], edge["to"]) in pairs:
+            edge["color"] = color
+            edge["width"] = max(edge["width"], 4)
+    return edges
@@ -0,0 +1,196 @@
+"""
+Inti graph transaksi: nama entitas di-encode menjadi id int32 sekali per file,
+lalu edge teragregasi disimpan sebagai array CSR (keluar & masuk) sehingga
+pencarian tetangga cukup O(degree).
+"""
+import hashlib
+from dataclasses import dataclass, field, replace
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+SRC_COL = "PEMILIK REKENING"
+DST_COL = "NAMA LAWAN"
+
+
+def _endpoints(df, src_col, dst_col):
+    """Kolom sumber lalu tujuan sebagai satu deret; kolom kategori digabung kamusnya, tanpa cast per baris."""
+    src, dst = df[src_col], df[dst_col]
+    if isinstance(src.dtype, pd.CategoricalDtype) and isinstance(dst.dtype, pd.CategoricalDtype):
+        return pd.Series(union_categoricals([src, dst], ignore_order=True))
+    return pd.concat([src, dst], ignore_index=True)
+
+
+@dataclass
+class EntityIndex:
+    """Kamus nama entitas -> id, plus kolom sumber/tujuan per baris dalam bentuk id."""
+    names: np.ndarray
+    src: np.ndarray
+    dst: np.ndarray
+    _lookup: dict = field(default=None, repr=False)
+    _sorted_names: list = field(default=None, repr=False)
+    _fingerprint: str = field(default=None, repr=False)
+    # (etag, jumlah_baris, index) versi sebelum append, jika index ini hasil extend()
+    base: tuple = field(default=None, repr=False)
+
+    @classmethod
+    def from_frame(cls, df, src_col=SRC_COL, dst_col=DST_COL):
+        n_rows = len(df)
+        both = _endpoints(df, src_col, dst_col)
+        codes, uniques = pd.factorize(both)
+        return cls(
+            names=np.asarray(uniques, dtype=object),
+            src=codes[:n_rows].astype(np.int32),
+            dst=codes[n_rows:].astype(np.int32),
+        )
+
+    def extend(self, df_tail, base_etag=None, src_col=SRC_COL, dst_col=DST_COL):
+        """
+        Index untuk data yang bertambah baris (append): id nama lama tetap,
+        nama baru diberi id di belakang, hanya `df_tail` yang di-encode.
+        Urutan id-nya berbeda dari from_frame() atas data yang sama; cache yang
+        menyimpan hasil ber-id harus memakai `fingerprint`, bukan ETag saja.
+        `base` hanya hidup di memori proses (tidak disimpan ke bucket).
+        """
+        n_rows = len(df_tail)
+        both = _endpoints(df_tail, src_col, dst_col)
+        codes = pd.Index(self.names).get_indexer(both)
+        new = codes < 0
+        new_codes, new_names = pd.factorize(both[new])
+        codes[new] = self.n + new_codes
+        return EntityIndex(
+            names=np.concatenate([self.names, np.asarray(new_names, dtype=object)]),
+            src=np.concatenate([self.src, codes[:n_rows].astype(np.int32)]),
+            dst=np.concatenate([self.dst, codes[n_rows:].astype(np.int32)]),
+            # Versi lama disimpan tanpa rantai base-nya agar memori tidak menumpuk
+            base=(base_etag, len(self.src), replace(self, base=None)),
+        )
+
+    @property
+    def n(self):
+        return len(self.names)
+
+    @property
+    def fingerprint(self):
+        """Hash urutan nama (id -> nama) + jumlah baris; dua index dengan id berbeda tidak pernah sama."""
+        if self._fingerprint is None:
+            digest = hashlib.blake2b(pd.util.hash_array(self.names).tobytes(), digest_size=8)
+            digest.update(np.int64(len(self.src)).tobytes())
+            self._fingerprint = digest.hexdigest()
+        return self._fingerprint
+
+    def id_of(self, name):
+        if self._lookup is None:
+            self._lookup = {nm: i for i, nm in enumerate(self.names)}
+        return self._lookup.get(name)
+
+    def sorted_names(self):
+        if self._sorted_names is None:
+            self._sorted_names = sorted(self.names.tolist())
+        return self._sorted_names
+
+    def rows_between(self, a, b):
+        """Mask baris transaksi a->b atau b->a (perbandingan integer, bukan string)."""
+        ia, ib = self.id_of(a), self.id_of(b)
+        if ia is None or ib is None:
+            return np.zeros(len(self.src), dtype=bool)
+        return ((self.src == ia) & (self.dst == ib)) | ((self.src == ib) & (self.dst == ia))
+
+
+@dataclass
+class EdgeCSR:
+    """
+    Edge teragregasi (satu baris per pasangan sumber->tujuan), diurutkan per
+    sumber. out_indptr menunjuk langsung ke posisi edge; in_indptr/in_edges
+    adalah indeks ke edge yang sama tetapi dikelompokkan per tujuan.
+    """
+    n: int
+    src: np.ndarray
+    dst: np.ndarray
+    amount: np.ndarray
+    freq: np.ndarray
+    out_indptr: np.ndarray
+    in_indptr: np.ndarray
+    in_edges: np.ndarray
+
+    def out_edge_ids(self, node):
+        return np.arange(self.out_indptr[node], self.out_indptr[node + 1])
+
+    def in_edge_ids(self, node):
+        return self.in_edges[self.in_indptr[node]:self.in_indptr[node + 1]]
+
+    def incident_edge_ids(self, node):
+        # Self-loop muncul di keluar & masuk, jadi di-unique
+        return np.unique(np.concatenate([self.out_edge_ids(node), self.in_edge_ids(node)]))
+
+    def neighbours(self, node):
+        ids = self.incident_edge_ids(node)
+        other = np.where(self.src[ids] == node, self.dst[ids], self.src[ids])
+        return np.unique(other)
+
+    def to_frame(self, names, edge_ids=None):
+        if edge_ids is None:
+            edge_ids = slice(None)
+        return pd.DataFrame({
+            SRC_COL: names[self.src[edge_ids]],
+            DST_COL: names[self.dst[edge_ids]],
+            "MUTASI": self.amount[edge_ids],
+            "FREKUENSI": self.freq[edge_ids],
+        })
+
+
+def build_csr(n, src, dst, amount, freq):
+    """Susun edge list yang sudah unik per pasangan menjadi CSR dua arah."""
+    order = np.lexsort((dst, src))
+    src, dst, amount, freq = src[order], dst[order], amount[order], freq[order]
+    out_indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=n), out=out_indptr[1:])
+
+    in_edges = np.argsort(dst, kind="stable")
+    in_indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(dst, minlength=n), out=in_indptr[1:])
+    return EdgeCSR(n, src, dst, amount, freq, out_indptr, in_indptr, in_edges)
+
+
+def aggregate_edges(index, amounts, counted, row_mask=None):
+    """
+    Ekuivalen groupby([PEMILIK REKENING, NAMA LAWAN]).agg(MUTASI=sum, FREKUENSI=count)
+    tetapi di atas id integer. `counted` adalah mask baris yang ikut dihitung
+    pada FREKUENSI (baris dengan TGL/TRANS valid).
+    """
+    src, dst = index.src, index.dst
+    amounts = np.asarray(amounts, dtype=np.float64)
+    counted = np.asarray(counted, dtype=bool)
+    if row_mask is not None:
+        src, dst, amounts, counted = src[row_mask], dst[row_mask], amounts[row_mask], counted[row_mask]
+
+    # NaN diabaikan seperti groupby().sum()
+    amounts = np.nan_to_num(amounts, nan=0.0)
+    key = src.astype(np.int64) * index.n + dst
+    pair, uniq = pd.factorize(key)
+    uniq = np.asarray(uniq, dtype=np.int64)
+    total = np.bincount(pair, weights=amounts, minlength=len(uniq))
+    freq = np.bincount(pair, weights=counted, minlength=len(uniq)).astype(np.int64)
+    return build_csr(
+        index.n,
+        (uniq // index.n).astype(np.int32),
+        (uniq % index.n).astype(np.int32),
+        total,
+        freq,
+    )
+
+
+def merge_csr(base, delta):
+    """
+    Gabungkan dua EdgeCSR (mis. agregat versi lama + agregat baris append)
+    di tingkat pasangan, tanpa menyentuh baris transaksi.
+    """
+    n = max(base.n, delta.n)
+    src = np.concatenate([base.src, delta.src])
+    dst = np.concatenate([base.dst, delta.dst])
+    pair, uniq = pd.factorize(src.astype(np.int64) * n + dst)
+    uniq = np.asarray(uniq, dtype=np.int64)
+    total = np.bincount(pair, weights=np.concatenate([base.amount, delta.amount]), minlength=len(uniq))
+    freq = np.bincount(pair, weights=np.concatenate([base.freq, delta.freq]), minlength=len(uniq)).astype(np.int64)
+    return build_csr(n, (uniq // n).astype(np.int32), (uniq % n).astype(np.int32), total, freq)
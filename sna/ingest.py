@@ -0,0 +1,468 @@
+"""Ingest file mutasi rekening dari MinIO ke cache Parquet yang sudah bersih."""
+import codecs
+import hashlib
+import json
+import os
+import tempfile
+from io import BytesIO, TextIOWrapper
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from botocore.exceptions import ClientError
+from pandas.api.types import union_categoricals
+
+from sna.parsing import AMOUNT_COLUMNS, parse_amount, parse_date
+from sna.profiling import stage
+
+# Kolom yang benar-benar dipakai oleh analisis network
+ANALYSIS_COLUMNS = [
+    "NO",
+    "PEMILIK REKENING",
+    "BANK",
+    "NO REK",
+    "TGL/TRANS",
+    "NAMA LAWAN",
+    "BANK LAWAN",
+    "NO REK LAWAN",
+    "MUTASI",
+    # Kode trail aliran dana (A.01.01. dst), dipakai untuk money-trail tracing
+    *[f"LAYER {i}." for i in range(1, 11)],
+]
+
+# Nama/bank/rekening berulang di jutaan baris: dibaca sebagai kategori (kode int + kamus),
+# sehingga memori per baris beberapa byte, bukan sepanjang string-nya
+# (kolom LAYER yang kebanyakan kosong pun jadi 1 byte per baris)
+DICTIONARY_COLUMNS = [
+    "PEMILIK REKENING", "BANK", "NO REK", "NAMA LAWAN", "BANK LAWAN", "NO REK LAWAN",
+    *[f"LAYER {i}." for i in range(1, 11)],
+]
+# Encoding export yang dicoba berurutan (Excel Windows menyimpan CSV sebagai latin-1)
+STATEMENT_ENCODINGS = ("utf-8", "ISO-8859-1")
+
+# Cache disimpan di sebelah file sumber: "<key>.sna.parquet"
+CACHE_SUFFIX = ".sna.parquet"
+# Riwayat ingest (ukuran, sidik jari, part append) per file CSV
+MANIFEST_SUFFIX = ".manifest.sna.json"
+# Naikkan jika skema atau hasil cleaning berubah, agar cache lama di-parse ulang
+CACHE_VERSION = "4"
+
+# File CSV di atas batas ini di-ingest secara streaming per chunk
+STREAMING_THRESHOLD_BYTES = int(os.getenv("SNA_STREAMING_THRESHOLD_MB", "256")) * 1024 * 1024
+STREAM_CHUNK_ROWS = int(os.getenv("SNA_STREAM_CHUNK_ROWS", "250000"))
+
+# Part hasil append digabung kembali ke cache utama jika sudah sebanyak ini
+MAX_APPEND_PARTS = int(os.getenv("SNA_MAX_APPEND_PARTS", "8"))
+# Panjang potongan awal/akhir file yang di-hash untuk mendeteksi append
+_PROBE_BYTES = 4096
+
+
+def is_cache_object(key):
+    """True jika object adalah artefak cache (bukan file sumber user)."""
+    # ".sna.json" juga mencakup peta resolusi entitas per bucket (entities.sna.json)
+    return key.endswith((CACHE_SUFFIX, MANIFEST_SUFFIX, ".sna.json"))
+
+
+def cache_key_for(object_name):
+    return f"{object_name}{CACHE_SUFFIX}"
+
+
+def manifest_key_for(object_name):
+    return f"{object_name}{MANIFEST_SUFFIX}"
+
+
+def part_key_for(object_name, n):
+    return f"{object_name}.part{n:04d}{CACHE_SUFFIX}"
+
+
+def normalize_etag(etag):
+    return (etag or "").strip('"')
+
+
+def read_statement(content, object_name, sep=";"):
+    """Parse isi file mentah (CSV/XLSX) menjadi DataFrame."""
+    if object_name.lower().endswith('.csv'):
+        # Coba utf-8 dulu, jika gagal gunakan latin1
+        for encoding in STATEMENT_ENCODINGS[:-1]:
+            try:
+                return pd.read_csv(BytesIO(content), sep=sep, encoding=encoding)
+            except UnicodeDecodeError:
+                pass
+        return pd.read_csv(BytesIO(content), sep=sep, encoding=STATEMENT_ENCODINGS[-1])
+    # Untuk .xlsx tidak ada urusan dengan encoding utf-8
+    return pd.read_excel(BytesIO(content))
+
+
+def clean_financial_data(df, amount_as_cents=False):
+    if df.empty: return df
+    # Header export kadang berisi spasi (" BANK LAWAN") dan kolom kosong di akhir baris
+    df.columns = [str(c).strip() for c in df.columns]
+    df = df.drop(columns=[c for c in df.columns if c.startswith("Unnamed:")])
+    for col in AMOUNT_COLUMNS:
+        if col in df.columns:
+            df[col] = parse_amount(df[col], as_cents=amount_as_cents)
+    df["TGL/TRANS"] = parse_date(df["TGL/TRANS"])
+    if "NO" in df.columns:
+        df["NO"] = pd.to_numeric(df["NO"], errors="coerce")
+    df["PEMILIK REKENING"] = df["PEMILIK REKENING"].fillna("UNKNOWN").astype(str)
+    df["NAMA LAWAN"] = df["NAMA LAWAN"].fillna("UNKNOWN").astype(str)
+    return df
+
+
+def _to_parquet_bytes(df):
+    # Kolom sisa (kode, keterangan) disimpan sebagai string agar skema Parquet konsisten
+    out = df.copy()
+    for col in out.columns:
+        if out[col].dtype == object:
+            out[col] = out[col].astype("string")
+    buf = BytesIO()
+    pq.write_table(pa.Table.from_pandas(out, preserve_index=False), buf, compression="zstd")
+    return buf.getvalue()
+
+
+def compact_frame(df):
+    """Kolom DICTIONARY_COLUMNS sebagai kategori, bentuk yang sama dengan hasil baca cache."""
+    cols = {c: df[c].astype("category") for c in DICTIONARY_COLUMNS if c in df.columns and df[c].dtype != "category"}
+    return df.assign(**cols) if cols else df
+
+
+def _union(columns):
+    # Kamus bisa berbeda tipe antar file (kolom kosong, NO REK angka dari XLSX): samakan ke object
+    if len({str(col.cat.categories.dtype) for col in columns}) > 1:
+        columns = [col.cat.set_categories(col.cat.categories.astype(object)) for col in columns]
+    return pd.Categorical(union_categoricals(columns, ignore_order=True))
+
+
+def concat_frames(frames):
+    """pd.concat yang mempertahankan kolom kategori (kamus digabung, tidak jatuh ke string per baris)."""
+    if len(frames) == 1:
+        return frames[0]
+    frames = [compact_frame(f) for f in frames]
+    merged = {c: _union([f[c] for f in frames]) for c in DICTIONARY_COLUMNS if all(c in f.columns for f in frames)}
+    rest = pd.concat([f.drop(columns=list(merged)) for f in frames], ignore_index=True)
+    return rest.assign(**merged)[[c for c in frames[0].columns if c in rest.columns or c in merged]]
+
+
+def _read_parquet(source, columns):
+    """Baca Parquet (path/buffer) dengan proyeksi kolom; kolom nama dibaca sebagai kategori."""
+    available = pq.read_schema(source).names
+    if hasattr(source, "seek"):
+        source.seek(0)
+    wanted = [c for c in columns if c in available] if columns else None
+    dictionary = [c for c in DICTIONARY_COLUMNS if c in (wanted or available)]
+    return pq.read_table(source, columns=wanted, read_dictionary=dictionary).to_pandas()
+
+
+def _read_cached(s3, bucket, cache_key, etag, columns):
+    try:
+        head = s3.head_object(Bucket=bucket, Key=cache_key)
+    except ClientError:
+        return None
+    meta = head.get("Metadata", {})
+    if meta.get("source-etag") != etag or meta.get("sna-cache-version") != CACHE_VERSION:
+        return None
+
+    with stage("cache download", key=cache_key) as info:
+        buf = BytesIO(s3.get_object(Bucket=bucket, Key=cache_key)['Body'].read())
+        info["bytes"] = buf.getbuffer().nbytes
+    with stage("cache read"):
+        return _read_parquet(buf, columns)
+
+
+def write_cache(s3, bucket, object_name, etag, df):
+    """Tulis salinan Parquet hasil cleaning, ditandai dengan ETag file sumber."""
+    s3.put_object(
+        Bucket=bucket,
+        Key=cache_key_for(object_name),
+        Body=_to_parquet_bytes(df),
+        ContentType="application/vnd.apache.parquet",
+        Metadata={"source-etag": etag, "sna-cache-version": CACHE_VERSION},
+    )
+
+
+def load_cleaned(s3, bucket, object_name, etag=None, columns=ANALYSIS_COLUMNS):
+    """
+    Ambil data bersih untuk satu file. Jika cache Parquet dengan ETag yang sama
+    sudah ada, hanya kolom `columns` yang dibaca; jika file CSV hanya bertambah
+    baris di ujung, hanya bagian baru yang di-parse (lihat append_ingest);
+    selain itu file sumber di-parse sekali lalu cache-nya ditulis ulang.
+    """
+    size = None
+    if etag is None:
+        head = s3.head_object(Bucket=bucket, Key=object_name)
+        etag, size = head["ETag"], head["ContentLength"]
+    etag = normalize_etag(etag)
+    cache_key = cache_key_for(object_name)
+    is_csv = object_name.lower().endswith('.csv')
+
+    manifest = read_manifest(s3, bucket, object_name) if is_csv else None
+    if manifest is not None and manifest["etag"] != etag:
+        head = s3.head_object(Bucket=bucket, Key=object_name)
+        size = head["ContentLength"]
+        # ETag dari pemanggil bisa basi (mis. dari listing): selalu ikuti isi object saat ini
+        etag = normalize_etag(head["ETag"])
+        if manifest["etag"] != etag:
+            with stage("append ingest"):
+                appended = append_ingest(s3, bucket, object_name, etag, size, manifest, columns)
+            if appended is not None:
+                return appended
+    if manifest is not None and manifest["etag"] == etag:
+        cached = _read_manifest_frame(s3, bucket, object_name, manifest, columns)
+        if cached is not None:
+            return cached
+
+    cached = _read_cached(s3, bucket, cache_key, etag, columns)
+    if cached is not None:
+        if is_csv and manifest is None:
+            # Cache lama tanpa manifest: catat sidik jari agar append berikutnya inkremental
+            _start_manifest(s3, bucket, object_name, etag, size, len(cached))
+        return cached
+
+    if is_csv:
+        if size is None:
+            size = s3.head_object(Bucket=bucket, Key=object_name)["ContentLength"]
+        if size >= STREAMING_THRESHOLD_BYTES:
+            with stage("stream ingest", bytes=size):
+                df = stream_ingest(s3, bucket, object_name, etag, columns=columns)
+            if not df.empty:
+                _start_manifest(s3, bucket, object_name, etag, size, len(df), manifest)
+            return df
+
+    with stage("download", key=object_name) as info:
+        obj = s3.get_object(Bucket=bucket, Key=object_name)
+        content = obj['Body'].read()
+        info["bytes"] = len(content)
+    # Cache ditandai dengan ETag isi yang benar-benar dibaca (ETag pemanggil bisa basi)
+    etag = normalize_etag(obj.get("ETag", etag))
+    with stage("parse") as info:
+        raw = read_statement(content, object_name)
+        info["rows"] = len(raw)
+    with stage("clean"):
+        df = clean_financial_data(raw)
+    if df.empty:
+        return df
+
+    try:
+        with stage("cache write"):
+            write_cache(s3, bucket, object_name, etag, df)
+            if is_csv:
+                _start_manifest(s3, bucket, object_name, etag, len(content), len(df), manifest)
+    except ClientError as e:
+        # Bucket read-only dsb: analisis tetap jalan tanpa cache
+        print(f"Gagal menulis cache Parquet {cache_key}: {e}")
+
+    if columns:
+        df = df[[c for c in columns if c in df.columns]]
+    return compact_frame(df)
+
+
+def delete_cached(s3, bucket, object_name):
+    """Hapus semua artefak cache sebuah file (Parquet, manifest & part append)."""
+    paginator = s3.get_paginator("list_objects_v2")
+    for page in paginator.paginate(Bucket=bucket, Prefix=f"{object_name}."):
+        for obj in page.get("Contents", []):
+            if is_cache_object(obj["Key"]):
+                s3.delete_object(Bucket=bucket, Key=obj["Key"])
+
+
+# =====================
+# INCREMENTAL (APPEND-ONLY) INGEST
+# =====================
+# Yang disimpan di bucket hanya baris bersih (cache utama + part Parquet per append)
+# dan manifest-nya. Agregat pasangan MUTASI/FREKUENSI tidak disimpan: agregasi
+# inkremental (merge_csr di app) hanya memakai agregat versi lama yang masih ada
+# di cache proses; setelah restart/eviction agregat dihitung ulang dari baris.
+def _read_range(s3, bucket, key, start, stop):
+    """Byte [start, stop) dari object lewat HTTP Range."""
+    if stop <= start:
+        return b""
+    return s3.get_object(Bucket=bucket, Key=key, Range=f"bytes={start}-{stop - 1}")['Body'].read()
+
+
+def _probe(s3, bucket, object_name, size):
+    """Sidik jari awal & akhir `size` byte pertama file."""
+    head = _read_range(s3, bucket, object_name, 0, min(size, _PROBE_BYTES))
+    tail = _read_range(s3, bucket, object_name, max(0, size - _PROBE_BYTES), size)
+    return {
+        "size": size,
+        "head_sha1": hashlib.sha1(head).hexdigest(),
+        "tail_sha1": hashlib.sha1(tail).hexdigest(),
+        "ends_with_newline": tail.endswith(b"\n"),
+    }
+
+
+def read_manifest(s3, bucket, object_name):
+    try:
+        body = s3.get_object(Bucket=bucket, Key=manifest_key_for(object_name))['Body'].read()
+    except ClientError:
+        return None
+    manifest = json.loads(body)
+    return manifest if manifest.get("version") == CACHE_VERSION else None
+
+
+def write_manifest(s3, bucket, object_name, manifest):
+    s3.put_object(
+        Bucket=bucket,
+        Key=manifest_key_for(object_name),
+        Body=json.dumps(manifest).encode(),
+        ContentType="application/json",
+    )
+
+
+def _start_manifest(s3, bucket, object_name, etag, size, rows, old_manifest=None):
+    """Manifest baru setelah ingest penuh; part append dari versi lama dibuang."""
+    if size is None:
+        head = s3.head_object(Bucket=bucket, Key=object_name)
+        if normalize_etag(head["ETag"]) != etag:
+            return
+        size = head["ContentLength"]
+    try:
+        for key in (old_manifest or {}).get("parts", []):
+            s3.delete_object(Bucket=bucket, Key=key)
+        write_manifest(s3, bucket, object_name, {
+            "version": CACHE_VERSION,
+            "etag": etag,
+            "base_etag": etag,
+            "parts": [],
+            # (etag, jumlah baris kumulatif) tiap versi: dipakai app untuk memperluas index
+            "history": [[etag, rows]],
+            **_probe(s3, bucket, object_name, size),
+        })
+    except ClientError as e:
+        print(f"Gagal menulis manifest {object_name}: {e}")
+
+
+def _read_manifest_frame(s3, bucket, object_name, manifest, columns):
+    """Cache utama + semua part append, berurutan. None jika cache utama hilang/kedaluwarsa."""
+    base = _read_cached(s3, bucket, cache_key_for(object_name), manifest["base_etag"], columns)
+    if base is None:
+        return None
+    frames = [base]
+    for key in manifest["parts"]:
+        buf = BytesIO(s3.get_object(Bucket=bucket, Key=key)['Body'].read())
+        frames.append(_read_parquet(buf, columns))
+    df = concat_frames(frames)
+    df.attrs["sna_history"] = manifest["history"]
+    return df
+
+
+def append_ingest(s3, bucket, object_name, etag, size, manifest, columns=ANALYSIS_COLUMNS):
+    """
+    Jika file CSV hanya bertambah di ujung (awal & akhir bagian lama identik
+    dengan sidik jari di manifest), parse hanya byte baru (HTTP Range), simpan
+    sebagai part Parquet dan catat di manifest.
+    Mengembalikan None jika file diganti/diedit, sehingga ingest penuh dipakai.
+    """
+    old_size = manifest["size"]
+    if size <= old_size or not manifest["ends_with_newline"]:
+        return None
+    fingerprint = {k: manifest[k] for k in ("size", "head_sha1", "tail_sha1", "ends_with_newline")}
+    if _probe(s3, bucket, object_name, old_size) != fingerprint:
+        return None
+    head = _read_range(s3, bucket, object_name, 0, min(old_size, _PROBE_BYTES))
+    if b"\n" not in head:
+        return None
+    header = head.split(b"\n", 1)[0] + b"\n"
+
+    tail = _read_range(s3, bucket, object_name, old_size, size)
+    delta = clean_financial_data(read_statement(header + tail, object_name))
+    parts = list(manifest["parts"])
+    if not delta.empty:
+        parts.append(part_key_for(object_name, len(parts) + 1))
+        s3.put_object(Bucket=bucket, Key=parts[-1], Body=_to_parquet_bytes(delta),
+                      ContentType="application/vnd.apache.parquet")
+
+    rows = manifest["history"][-1][1] + len(delta)
+    manifest = {
+        **manifest,
+        "etag": etag,
+        "parts": parts,
+        "history": manifest["history"] + [[etag, rows]],
+        **_probe(s3, bucket, object_name, size),
+    }
+    if len(parts) > MAX_APPEND_PARTS:
+        # Terlalu banyak part kecil: gabungkan menjadi satu cache utama lagi
+        full = _read_manifest_frame(s3, bucket, object_name, manifest, None)
+        write_cache(s3, bucket, object_name, etag, full)
+        for key in parts:
+            s3.delete_object(Bucket=bucket, Key=key)
+        manifest.update(base_etag=etag, parts=[])
+    write_manifest(s3, bucket, object_name, manifest)
+    return _read_manifest_frame(s3, bucket, object_name, manifest, columns)
+
+
+# =====================
+# STREAMING INGEST (file lebih besar dari memori)
+# =====================
+def _wanted_column(name):
+    return str(name).strip() in ANALYSIS_COLUMNS
+
+
+def iter_clean_chunks(fileobj, chunksize=STREAM_CHUNK_ROWS, sep=";", encoding=STATEMENT_ENCODINGS[0]):
+    """
+    Baca CSV per chunk langsung dari stream (mis. body S3) dan hanya ambil
+    kolom analisis. Semua kolom dibaca sebagai string agar skema tiap chunk sama,
+    lalu angka & tanggal di-parse per chunk. Byte yang tidak valid untuk
+    `encoding` memunculkan UnicodeDecodeError (sama seperti read_statement).
+    """
+    if codecs.lookup(encoding).name != "utf-8":
+        # pandas mengabaikan `encoding` untuk stream non-file (body S3): decode di sini
+        fileobj = TextIOWrapper(fileobj, encoding=encoding, newline="")
+    reader = pd.read_csv(
+        fileobj,
+        sep=sep,
+        usecols=_wanted_column,
+        dtype=str,
+        chunksize=chunksize,
+        encoding=encoding,
+    )
+    for chunk in reader:
+        yield clean_financial_data(chunk)
+
+
+def _stream_to_parquet(s3, bucket, object_name, path, encoding, chunksize):
+    """Tulis CSV di S3 ke Parquet lokal per chunk; mengembalikan ETag yang dibaca (None jika kosong)."""
+    obj = s3.get_object(Bucket=bucket, Key=object_name)
+    body = obj['Body']
+    writer = None
+    try:
+        for chunk in iter_clean_chunks(body, chunksize=chunksize, encoding=encoding):
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema, compression="zstd")
+            writer.write_table(table.cast(writer.schema))
+    finally:
+        body.close()
+        if writer is not None:
+            writer.close()
+    return normalize_etag(obj.get("ETag")) if writer is not None else None
+
+
+def stream_ingest(s3, bucket, object_name, etag, columns=ANALYSIS_COLUMNS, chunksize=STREAM_CHUNK_ROWS):
+    """
+    Ingest CSV besar tanpa memuat seluruh file: body S3 dibaca per chunk dan
+    setiap chunk langsung ditulis ke Parquet (file sementara di disk), jadi
+    puncak memori saat ingest hanya satu chunk. Hasilnya diunggah sebagai
+    cache, lalu kolom `columns` dibaca kembali dengan kolom nama sebagai
+    kategori (lihat DICTIONARY_COLUMNS).
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp_path = os.path.join(tmp_dir, "ingest.parquet")
+        # Encoding ditentukan untuk seluruh file seperti read_statement: jika utf-8
+        # gagal di tengah jalan, stream diulang dari awal dengan encoding berikutnya
+        for encoding in STATEMENT_ENCODINGS:
+            try:
+                read_etag = _stream_to_parquet(s3, bucket, object_name, tmp_path, encoding, chunksize)
+                break
+            except UnicodeDecodeError:
+                if encoding == STATEMENT_ENCODINGS[-1]:
+                    raise
+        if read_etag is None:
+            return pd.DataFrame()
+
+        meta = {"source-etag": read_etag or etag, "sna-cache-version": CACHE_VERSION}
+        try:
+            s3.upload_file(tmp_path, bucket, cache_key_for(object_name), ExtraArgs={"Metadata": meta})
+        except ClientError as e:
+            print(f"Gagal menulis cache Parquet {object_name}: {e}")
+        return _read_parquet(tmp_path, columns)
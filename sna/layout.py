@@ -0,0 +1,169 @@
+"""
+Layout graph dihitung di server dengan NumPy sehingga browser cukup menggambar
+posisi jadi (physics vis.js dimatikan).
+
+- force_layout  : force-directed; tolakan antar node diaproksimasi dengan grid
+                  (setiap sel diwakili massa & titik beratnya), tarikan lewat edge.
+- layered_layout: layer hierarkis untuk mode Top-Down (UD) / Left-Right (LR).
+"""
+import numpy as np
+import pandas as pd
+
+
+def _edge_index(src, dst):
+    codes, names = pd.factorize(pd.concat([pd.Series(src), pd.Series(dst)], ignore_index=True))
+    n_edges = len(src)
+    return np.asarray(names, dtype=object), codes[:n_edges], codes[n_edges:]
+
+
+def _grid_repulsion(pos, node_distance, cells_per_axis):
+    """Gaya tolak tiap node terhadap titik berat tiap sel grid (O(n * sel), bukan O(n^2))."""
+    n = len(pos)
+    lo = pos.min(axis=0)
+    span = np.maximum(pos.max(axis=0) - lo, 1e-9)
+    cell_xy = np.minimum(((pos - lo) / span * cells_per_axis).astype(np.int64), cells_per_axis - 1)
+    cell = cell_xy[:, 0] * cells_per_axis + cell_xy[:, 1]
+
+    n_cells = cells_per_axis * cells_per_axis
+    mass = np.bincount(cell, minlength=n_cells).astype(np.float64)
+    sum_x = np.bincount(cell, weights=pos[:, 0], minlength=n_cells)
+    sum_y = np.bincount(cell, weights=pos[:, 1], minlength=n_cells)
+    occupied = np.flatnonzero(mass)
+    mass, sum_x, sum_y = mass[occupied], sum_x[occupied], sum_y[occupied]
+    centroid = np.column_stack([sum_x, sum_y]) / mass[:, None]
+    own = np.searchsorted(occupied, cell)
+
+    k2 = float(node_distance) ** 2
+    cx, cy = centroid[:, 0].astype(np.float32), centroid[:, 1].astype(np.float32)
+    m32 = mass.astype(np.float32)
+    force = np.zeros_like(pos)
+    # Diproses per blok agar matriks n x sel tidak terlalu besar
+    block = max(1, 2_000_000 // max(len(occupied), 1))
+    for start in range(0, n, block):
+        stop = min(start + block, n)
+        dx = pos[start:stop, 0, None].astype(np.float32) - cx[None, :]
+        dy = pos[start:stop, 1, None].astype(np.float32) - cy[None, :]
+        inv = m32 / np.maximum(dx * dx + dy * dy, 1.0)
+        force[start:stop, 0] = (dx * inv).sum(axis=1)
+        force[start:stop, 1] = (dy * inv).sum(axis=1)
+
+    # Sel milik node sendiri: ganti suku yang masih memuat node itu sendiri
+    # dengan massa & titik berat sel tanpa node tersebut
+    d_all = pos - centroid[own]
+    force -= d_all * (mass[own] / np.maximum((d_all ** 2).sum(axis=1), 1.0))[:, None]
+    m_rest = mass[own] - 1.0
+    c_rest = (centroid[own] * mass[own, None] - pos) / np.maximum(m_rest, 1.0)[:, None]
+    d_rest = pos - c_rest
+    force += d_rest * (m_rest / np.maximum((d_rest ** 2).sum(axis=1), 1.0))[:, None]
+    force *= k2
+    return force
+
+
+def force_layout(src, dst, weights=None, spring_length=250, node_distance=200, central_gravity=0.5,
+                 iterations=150, seed=0):
+    """
+    Kembalikan (names, pos[n, 2]). Slider UI dipakai langsung:
+    spring_length = panjang istirahat edge, node_distance = jarak tolak antar
+    node, central_gravity = tarikan ke pusat.
+    """
+    names, s, t = _edge_index(src, dst)
+    n = len(names)
+    if n == 0:
+        return names, np.zeros((0, 2))
+    rng = np.random.default_rng(seed)
+    radius = node_distance * np.sqrt(n) / 2
+    pos = rng.uniform(-radius, radius, size=(n, 2))
+    if n == 1:
+        return names, np.zeros((1, 2))
+
+    w = np.ones(len(s)) if weights is None else np.asarray(weights, dtype=np.float64)
+    # Bobot edge dinormalisasi log agar nominal besar tidak menarik terlalu kuat
+    w = 1.0 + np.log1p(w / max(np.median(w), 1e-9))
+    degree = np.bincount(s, minlength=n) + np.bincount(t, minlength=n) + 1.0
+    cells = int(np.clip(np.sqrt(n) / 3, 4, 32))
+
+    temperature = radius / 4
+    cooling = temperature / iterations
+    for _ in range(iterations):
+        force = _grid_repulsion(pos, node_distance, cells)
+
+        d = pos[t] - pos[s]
+        dist = np.maximum(np.linalg.norm(d, axis=1), 1e-6)
+        pull = (d / dist[:, None]) * ((dist - spring_length) * 0.1 * w)[:, None]
+        for axis in (0, 1):
+            force[:, axis] += np.bincount(s, weights=pull[:, axis], minlength=n)
+            force[:, axis] -= np.bincount(t, weights=pull[:, axis], minlength=n)
+
+        force -= central_gravity * 0.1 * pos * degree[:, None]
+
+        # Node ber-degree besar bergerak lebih pelan (mirip forceAtlas2)
+        step = force / degree[:, None]
+        length = np.maximum(np.linalg.norm(step, axis=1), 1e-9)
+        pos += step * (np.minimum(length, temperature) / length)[:, None]
+        temperature = max(temperature - cooling, 1.0)
+
+    return names, pos - pos.mean(axis=0)
+
+
+def _bfs_levels(s, t, n):
+    """Level tiap node: BFS dari node tanpa edge masuk; komponen tanpa akar dimulai dari hub terbesar."""
+    order = np.argsort(s, kind="stable")
+    targets = t[order]
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(s, minlength=n), out=indptr[1:])
+    degree = np.bincount(s, minlength=n) + np.bincount(t, minlength=n)
+    level = np.full(n, -1, dtype=np.int64)
+
+    in_degree = np.bincount(t, minlength=n)
+    roots = np.flatnonzero(in_degree == 0)
+    while True:
+        if len(roots) == 0:
+            unvisited = np.flatnonzero(level < 0)
+            if len(unvisited) == 0:
+                break
+            roots = unvisited[[np.argmax(degree[unvisited])]]
+        frontier = roots[level[roots] < 0]
+        depth = 0
+        while len(frontier):
+            level[frontier] = depth
+            starts, stops = indptr[frontier], indptr[frontier + 1]
+            counts = stops - starts
+            if counts.sum() == 0:
+                break
+            idx = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+            nxt = np.unique(targets[idx])
+            frontier = nxt[level[nxt] < 0]
+            depth += 1
+        roots = np.array([], dtype=np.int64)
+    return level
+
+
+def layered_layout(src, dst, level_separation=250, node_spacing=200, direction="UD"):
+    """Layout hierarkis: node di-layer dengan BFS, diurutkan per layer berdasarkan barycenter induknya."""
+    names, s, t = _edge_index(src, dst)
+    n = len(names)
+    if n == 0:
+        return names, np.zeros((0, 2))
+    level = _bfs_levels(s, t, n)
+
+    rank = np.zeros(n, dtype=np.float64)
+    forward = level[t] == level[s] + 1
+    for depth in range(level.max() + 1):
+        members = np.flatnonzero(level == depth)
+        if depth == 0:
+            # Layer akar: diurutkan dari hub terbesar
+            degree = np.bincount(s, minlength=n)[members]
+            key = -degree.astype(np.float64)
+        else:
+            # Barycenter posisi induk di layer sebelumnya
+            e = forward & (level[t] == depth)
+            bary_sum = np.bincount(t[e], weights=rank[s[e]], minlength=n)[members]
+            bary_cnt = np.bincount(t[e], minlength=n)[members]
+            key = np.where(bary_cnt > 0, bary_sum / np.maximum(bary_cnt, 1), np.inf)
+        order = members[np.argsort(key, kind="stable")]
+        rank[order] = np.arange(len(order)) - (len(order) - 1) / 2
+
+    pos = np.column_stack([rank * node_spacing, level * float(level_separation)])
+    if direction == "LR":
+        pos = pos[:, ::-1].copy()
+    return names, pos
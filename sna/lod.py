@@ -0,0 +1,118 @@
+"""
+Level-of-detail untuk Global View: batasi jumlah node/edge yang dikirim ke
+browser. Entitas bervolume kecil digabung menjadi supernode per bank atau per
+komunitas (label propagation), lalu hanya top-K edge (berdasarkan nilai) yang digambar.
+"""
+import numpy as np
+import pandas as pd
+
+from sna.metrics import label_propagation
+
+CLUSTER_PREFIX = "◆ "
+# Nilai BANK yang sebenarnya berarti "tidak diketahui"
+_EMPTY_BANKS = {"", "-", "EMPTY", "NAN", "NONE"}
+
+
+def cluster_id(group):
+    return f"{CLUSTER_PREFIX}{group}"
+
+
+def is_cluster(node_id):
+    return str(node_id).startswith(CLUSTER_PREFIX)
+
+
+def entity_banks(df, entity_index=None):
+    """
+    Bank dominan tiap entitas: BANK untuk pemilik rekening, BANK LAWAN untuk lawan.
+    Dengan `entity_index`, baris dihitung lewat id entitasnya sehingga semua alias
+    entitas hasil resolusi ikut terhitung; hasil diindeks nama dari index itu.
+    """
+    parts = []
+    n_rows = len(df) if entity_index is None else len(entity_index.src)
+    for name_col, bank_col, ids in (("PEMILIK REKENING", "BANK", "src"), ("NAMA LAWAN", "BANK LAWAN", "dst")):
+        if bank_col in df.columns:
+            entity = df[name_col].to_numpy() if entity_index is None else getattr(entity_index, ids)
+            parts.append(pd.DataFrame({"ENTITAS": entity, "BANK": df[bank_col].to_numpy()[:n_rows]}))
+    if not parts:
+        return pd.Series(dtype=object)
+    pairs = pd.concat(parts, ignore_index=True)
+    pairs["BANK"] = pairs["BANK"].astype(str).str.strip().str.upper()
+    pairs = pairs[~pairs["BANK"].isin(_EMPTY_BANKS)]
+    counts = pairs.groupby(["ENTITAS", "BANK"]).size().reset_index(name="N")
+    counts = counts.sort_values(["ENTITAS", "N"], ascending=[True, False])
+    banks = counts.drop_duplicates("ENTITAS").set_index("ENTITAS")["BANK"]
+    if entity_index is not None:
+        banks.index = pd.Index(entity_index.names[banks.index.to_numpy()], name="ENTITAS")
+    return banks
+
+
+def entity_communities(edges, names):
+    """
+    Komunitas per entitas (label propagation berbobot, lihat sna.metrics),
+    diberi nama berdasarkan urutan ukuran. Komponen terhubung biasa tidak
+    dipakai karena pada data transaksi hampir semua entitas masuk satu komponen.
+    """
+    if len(edges.src) == 0:
+        # Filter/jendela waktu tanpa transaksi: tidak ada entitas untuk dikelompokkan
+        return pd.Series([], index=names[:0], dtype=object)
+    labels = label_propagation(edges)
+    active = np.zeros(edges.n, dtype=bool)
+    active[edges.src] = True
+    active[edges.dst] = True
+    # Komunitas terbesar = "KOMUNITAS 1", dst.
+    return pd.Series([f"KOMUNITAS {label}" for label in labels[active]], index=names[active])
+
+
+def apply_render_budget(df_grouped, groups, max_nodes, max_edges, expanded=()):
+    """
+    Kembalikan (df_plot, clusters) dengan paling banyak ~max_nodes node dan
+    max_edges edge. `groups` memetakan nama entitas -> grup (bank/komunitas);
+    entitas di grup `expanded` didahulukan tampil satu per satu, tetapi tetap
+    dihitung dalam max_nodes: jika melebihi, anggota terkecilnya kembali ke
+    supernode grupnya. `clusters` berisi anggota & volume tiap supernode.
+    """
+    empty_clusters = pd.DataFrame(columns=["CLUSTER", "ANGGOTA", "VOLUME"])
+    src, dst = df_grouped["PEMILIK REKENING"], df_grouped["NAMA LAWAN"]
+    volume = pd.concat([
+        df_grouped.groupby("PEMILIK REKENING")["MUTASI"].sum(),
+        df_grouped.groupby("NAMA LAWAN")["MUTASI"].sum(),
+    ]).groupby(level=0).sum().sort_values(ascending=False)
+
+    if len(volume) <= max_nodes and len(df_grouped) <= max_edges:
+        return df_grouped, empty_clusters
+
+    group_of = groups.reindex(volume.index).fillna("LAINNYA")
+    group_codes = pd.factorize(group_of)[0]
+    forced = group_of.isin(set(expanded)).to_numpy()
+    # Urutan prioritas: anggota grup yang di-expand dulu, lalu sisanya; masing-masing menurut volume
+    priority = np.concatenate([np.flatnonzero(forced), np.flatnonzero(~forced)])
+    # Sisakan slot untuk supernode: satu per grup yang masih punya anggota tersembunyi
+    individual_budget = max(max_nodes - len(np.unique(group_codes[~forced])), 0)
+    while True:
+        keep = np.zeros(len(volume), dtype=bool)
+        keep[priority[:individual_budget]] = True
+        n_supernodes = len(np.unique(group_codes[~keep]))
+        if individual_budget == 0 or individual_budget + n_supernodes <= max_nodes:
+            break
+        individual_budget = max(max_nodes - n_supernodes, 0)
+
+    representative = pd.Series(
+        np.where(keep, volume.index.to_numpy(dtype=object), [cluster_id(g) for g in group_of.to_numpy()]),
+        index=volume.index,
+    )
+    plot = pd.DataFrame({
+        "PEMILIK REKENING": representative.reindex(src).to_numpy(),
+        "NAMA LAWAN": representative.reindex(dst).to_numpy(),
+        "MUTASI": df_grouped["MUTASI"].to_numpy(),
+        "FREKUENSI": df_grouped["FREKUENSI"].to_numpy(),
+    })
+    # Aliran di dalam satu supernode tidak digambar (akan jadi self-loop)
+    intra = (plot["PEMILIK REKENING"] == plot["NAMA LAWAN"]) & plot["PEMILIK REKENING"].map(is_cluster)
+    plot = plot[~intra].groupby(["PEMILIK REKENING", "NAMA LAWAN"], sort=False).agg(
+        MUTASI=("MUTASI", "sum"), FREKUENSI=("FREKUENSI", "sum")
+    ).reset_index()
+    plot = plot.nlargest(max_edges, "MUTASI").reset_index(drop=True)
+
+    members = pd.DataFrame({"CLUSTER": representative[~keep].to_numpy(), "VOLUME": volume[~keep].to_numpy()})
+    clusters = members.groupby("CLUSTER").agg(ANGGOTA=("VOLUME", "size"), VOLUME=("VOLUME", "sum")).reset_index()
+    return plot, clusters.sort_values("VOLUME", ascending=False).reset_index(drop=True)
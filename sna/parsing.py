@@ -0,0 +1,110 @@
+"""Parser cepat untuk angka format Indonesia ("200.000.000.000,00") dan tanggal dd/mm/yyyy."""
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+DATE_FORMAT = "%d/%m/%Y"
+
+# Kolom nominal yang memakai format ribuan "." dan desimal ","
+AMOUNT_COLUMNS = ["MUTASI", "PENYESUAIAN", "KONVERSI"]
+
+# Paling banyak 16 digit bulat agar whole * 100 + frac muat di int64; nilai yang
+# lebih panjang tidak cocok pola dan diparse lewat _legacy_amount (float)
+_AMOUNT_PATTERN = r"^(?P<sign>-?)(?P<whole>\d{1,16})(?:,(?P<frac>\d{0,2}))?$"
+# Batas nominal (rupiah) yang sen-nya masih muat di int64 untuk as_cents=True
+_MAX_CENTS_AMOUNT = 9e16
+
+
+def _amount_cents(uniques):
+    """Ubah array string unik menjadi (cents int64, mask valid)."""
+    arr = pa.array(uniques, type=pa.string(), from_pandas=True)
+    arr = pc.replace_substring(pc.utf8_trim_whitespace(arr), ".", "")
+    match = pc.extract_regex(arr, _AMOUNT_PATTERN)
+    valid = pc.fill_null(match.is_valid(), False).to_numpy(zero_copy_only=False)
+
+    zero = pa.scalar("0", pa.string())
+    whole = pc.cast(pc.if_else(valid, match.field("whole"), zero), pa.int64())
+    frac = pc.cast(pc.if_else(valid, pc.utf8_rpad(match.field("frac"), width=2, padding="0"), zero), pa.int64())
+    sign = np.where(pc.equal(match.field("sign"), "-").to_numpy(zero_copy_only=False), -1, 1)
+
+    cents = sign * (whole.to_numpy() * 100 + frac.to_numpy())
+    return cents.astype("int64"), valid
+
+
+def _legacy_amount(uniques):
+    """
+    Cara lama (hapus ".", "," jadi ".", lalu float) untuk nilai di luar pola cepat,
+    mis. desimal 3 digit "1.234,567"; yang tetap tidak terbaca menjadi NaN.
+    """
+    s = pd.Series(uniques, dtype=object).astype(str).str.strip()
+    s = s.str.replace(".", "", regex=False).str.replace(",", ".", regex=False)
+    return pd.to_numeric(s, errors="coerce").to_numpy(dtype=np.float64)
+
+
+def parse_amount(values, as_cents=False):
+    """
+    Parse kolom nominal. Nilai yang sama hanya di-parse sekali (factorize),
+    lalu hasilnya disebar kembali ke semua baris.
+
+    as_cents=True mengembalikan Int64 dalam satuan sen (1 rupiah = 100) sehingga
+    penjumlahan tidak bergeser karena pembulatan float.
+    """
+    s = pd.Series(values, copy=False)
+    if pd.api.types.is_numeric_dtype(s):
+        # Dari Excel nilai sudah berupa angka
+        if as_cents:
+            return (s.astype(float) * 100).round().astype("Int64")
+        return s.astype(float)
+
+    codes, uniques = pd.factorize(s, use_na_sentinel=True)
+    uniques = np.asarray(uniques, dtype=object)
+    cents, valid = _amount_cents(uniques)
+    amounts = cents / 100.0
+    fallback = ~valid
+    if fallback.any():
+        legacy = _legacy_amount(uniques[fallback])
+        finite = np.isfinite(legacy)
+        amounts[fallback] = legacy
+        valid[fallback] = finite
+        if as_cents:
+            # Nominal di luar jangkauan int64 sen menjadi NA, bukan angka yang overflow
+            finite &= np.abs(np.where(finite, legacy, 0.0)) < _MAX_CENTS_AMOUNT
+            cents[fallback] = np.round(np.where(finite, legacy, 0.0) * 100).astype("int64")
+            valid[fallback] = finite
+
+    missing = codes < 0
+    safe_codes = np.where(missing, 0, codes)
+    if len(cents) == 0:
+        cents, amounts, valid = np.zeros(1, dtype="int64"), np.zeros(1), np.zeros(1, dtype=bool)
+    row_mask = missing | ~valid[safe_codes]
+
+    if as_cents:
+        return pd.Series(pd.arrays.IntegerArray(cents[safe_codes], row_mask), index=s.index, name=s.name)
+    out = amounts[safe_codes]
+    out[row_mask] = np.nan
+    return pd.Series(out, index=s.index, name=s.name)
+
+
+def parse_date(values, fmt=DATE_FORMAT):
+    """
+    Parse tanggal dengan format eksplisit. Nilai unik yang tidak cocok dengan
+    `fmt` (mis. hasil Excel "2014-10-24") dicoba ulang dengan dayfirst.
+    """
+    s = pd.Series(values, copy=False)
+    if pd.api.types.is_datetime64_any_dtype(s):
+        return s
+
+    codes, uniques = pd.factorize(s, use_na_sentinel=True)
+    uniques = pd.Index(uniques, dtype=object).astype(str).str.strip()
+    parsed = pd.to_datetime(uniques, format=fmt, errors="coerce")
+    retry = parsed.isna()
+    if retry.any():
+        parsed = parsed.where(~retry, pd.to_datetime(uniques.where(retry), dayfirst=True, errors="coerce", format="mixed"))
+
+    values_ns = parsed.values
+    if len(values_ns) == 0:
+        return pd.Series(pd.NaT, index=s.index, name=s.name, dtype="datetime64[ns]")
+    out = values_ns[np.where(codes < 0, 0, codes)]
+    out[codes < 0] = np.datetime64("NaT")
+    return pd.Series(out, index=s.index, name=s.name)
@@ -0,0 +1,151 @@
+"""
+Instrumentasi waktu & memori per tahap pipeline (download, parse, clean,
+filter, groupby, graph build, render HTML, ukuran payload).
+
+Kode pipeline cukup memanggil `with stage("parse") as info:`; jika tidak ada
+Profiler aktif (mode debug mati) blok itu tidak mencatat apa-apa. Profiler
+aktif disimpan per thread/konteks, jadi satu rerun Streamlit = satu profil.
+Memori diukur dengan tracemalloc (alokasi Python & numpy, bukan buffer Arrow)
+yang bersifat global per proses: angka puncak & RSS adalah angka proses, bisa
+ikut terpengaruh session lain. tracemalloc menyala selama masih ada Profiler
+track_memory yang hidup (dihitung referensinya), bukan dimatikan oleh satu session.
+"""
+import contextvars
+import json
+import threading
+import time
+import tracemalloc
+import weakref
+from contextlib import contextmanager
+
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+_ACTIVE = contextvars.ContextVar("sna_profiler", default=None)
+# True jika tracemalloc dinyalakan oleh modul ini (bukan oleh pemanggil lain)
+_STARTED_TRACING = False
+# Jumlah Profiler track_memory yang masih hidup (di semua session/thread)
+_TRACING_USERS = 0
+_TRACING_LOCK = threading.Lock()
+_MB = 1024 * 1024
+
+
+def _rss_mb():
+    """RSS proses saat ini (Linux), atau puncak RSS jika /proc tidak tersedia."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * resource.getpagesize() / _MB
+    except (OSError, AttributeError):
+        if resource is None:
+            return float("nan")
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class Profiler:
+    """Kumpulan catatan tahap: TAHAP, DETIK, MEM PUNCAK PROSES (MB), RSS PROSES (MB) + info tambahan."""
+
+    def __init__(self, track_memory=False):
+        self.track_memory = track_memory
+        self.records = []
+        self._stack = []
+        # True setelah profiler ini ikut dihitung sebagai pengguna tracemalloc
+        self._tracing = False
+
+    @contextmanager
+    def stage(self, name, **info):
+        record = {"TAHAP": name, **info}
+        tracing = self.track_memory and tracemalloc.is_tracing()
+        if tracing:
+            current, peak = tracemalloc.get_traced_memory()
+            if self._stack:
+                # Simpan puncak tahap induk sebelum di-reset untuk tahap ini
+                self._stack[-1]["_peak"] = max(self._stack[-1]["_peak"], peak)
+            tracemalloc.reset_peak()
+            record["_base"], record["_peak"] = current, current
+        self._stack.append(record)
+        self.records.append(record)
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record["DETIK"] = time.perf_counter() - start
+            self._stack.pop()
+            if tracing:
+                peak = max(tracemalloc.get_traced_memory()[1], record.pop("_peak"))
+                record["MEM PUNCAK PROSES (MB)"] = (peak - record.pop("_base")) / _MB
+                if self._stack:
+                    self._stack[-1]["_peak"] = max(self._stack[-1]["_peak"], peak)
+            record["RSS PROSES (MB)"] = _rss_mb()
+            record["LEVEL"] = len(self._stack)
+
+    def to_frame(self):
+        columns = ["TAHAP", "DETIK", "MEM PUNCAK PROSES (MB)", "RSS PROSES (MB)"]
+        frame = pd.DataFrame(self.records)
+        if frame.empty:
+            return pd.DataFrame(columns=columns)
+        # Tahap bersarang diberi indentasi agar hierarkinya terbaca
+        frame["TAHAP"] = ["  " * level + name for level, name in zip(frame.pop("LEVEL"), frame["TAHAP"])]
+        extra = [c for c in frame if c not in columns]
+        # Info tambahan (bytes, rows, edges) tetap integer walau kosong di tahap lain
+        frame[extra] = frame[extra].convert_dtypes()
+        return frame[[c for c in columns if c in frame] + extra]
+
+    def total_seconds(self):
+        return sum(r["DETIK"] for r in self.records if r.get("LEVEL") == 0)
+
+    def to_json(self, **meta):
+        """Profil dalam bentuk JSON (untuk diunduh / dibandingkan antar versi)."""
+        return json.dumps({**meta, "total_seconds": self.total_seconds(), "stages": self.records},
+                          default=str, indent=2)
+
+
+def _acquire_tracing():
+    global _STARTED_TRACING, _TRACING_USERS
+    with _TRACING_LOCK:
+        _TRACING_USERS += 1
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _STARTED_TRACING = True
+
+
+def _release_tracing():
+    global _STARTED_TRACING, _TRACING_USERS
+    with _TRACING_LOCK:
+        _TRACING_USERS -= 1
+        if _TRACING_USERS == 0 and _STARTED_TRACING:
+            tracemalloc.stop()
+            _STARTED_TRACING = False
+
+
+def set_active(profiler):
+    """
+    Jadikan `profiler` (atau None) profiler aktif konteks ini; dipanggil di awal
+    setiap rerun. Profiler track_memory menyalakan tracemalloc sampai objeknya
+    dibuang; tracemalloc baru dimatikan setelah profiler terakhir yang butuh hilang.
+    """
+    _ACTIVE.set(profiler)
+    if profiler is not None and profiler.track_memory and not profiler._tracing:
+        _acquire_tracing()
+        profiler._tracing = True
+        weakref.finalize(profiler, _release_tracing)
+    return profiler
+
+
+def active():
+    return _ACTIVE.get()
+
+
+@contextmanager
+def stage(name, **info):
+    """Catat satu tahap di profiler aktif; no-op (tetap memberi dict info) jika tidak ada."""
+    profiler = _ACTIVE.get()
+    if profiler is None:
+        yield info
+        return
+    with profiler.stage(name, **info) as record:
+        yield record
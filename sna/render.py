@@ -0,0 +1,67 @@
+"""Render grafik vis-network menjadi HTML di memori (tanpa file sementara)."""
+import os
+from io import StringIO
+
+# Lokasi asset statis (folder ./static/lib). Relatif terhadap halaman Streamlit
+# agar tetap benar jika aplikasi dipasang di belakang baseUrlPath/nginx.
+STATIC_URL = os.getenv("SNA_STATIC_URL", "app/static/lib").rstrip("/")
+
+_HEAD = """<html>
+<head>
+<meta charset="utf-8">
+<link rel="stylesheet" href="{static}/vis-9.1.2/vis-network.css">
+<script src="{static}/vis-9.1.2/vis-network.min.js"></script>
+<style>
+  body {{ margin: 0; }}
+  #mynetwork {{ width: 100%; height: {height}; background-color: {bgcolor}; border: 1px solid lightgray; position: relative; }}
+  #loadingText {{ position: absolute; top: 8px; left: 8px; font: 12px sans-serif; color: #666; }}
+</style>
+</head>
+<body>
+<div id="mynetwork"></div>
+<div id="loadingText"></div>
+<script type="text/javascript">
+"""
+
+_TAIL = """
+var container = document.getElementById('mynetwork');
+var network = new vis.Network(container, {nodes: nodes, edges: edges}, options);
+network.on("stabilizationProgress", function(params) {
+    document.getElementById('loadingText').innerHTML = Math.round(100 * params.iterations / params.total) + '%';
+});
+network.once("stabilizationIterationsDone", function() {
+    document.getElementById('loadingText').style.display = 'none';
+});
+</script>
+</body>
+</html>
+"""
+
+
+def _script_safe(payload):
+    # JSON di dalam <script> tidak boleh memuat "</" (mis. "</script>" di nama entitas)
+    return payload.replace("</", "<\\/")
+
+
+def render_network_html(nodes_json, edges_json, options_json, height="1000px", bgcolor="#ffffff", images_json=None):
+    """
+    Gabungkan JSON node/edge (hasil cache) dengan opsi visual menjadi satu dokumen HTML.
+    `images_json` = tabel {imageId: data URI}; node dengan `imageId` diberi gambarnya
+    di browser, sehingga tiap gambar hanya dikirim sekali.
+    """
+    buf = StringIO()
+    buf.write(_HEAD.format(static=STATIC_URL, height=height, bgcolor=bgcolor))
+    buf.write("var nodes = ")
+    buf.write(_script_safe(nodes_json))
+    buf.write(";\n")
+    if images_json:
+        buf.write("var images = ")
+        buf.write(_script_safe(images_json))
+        buf.write(";\nnodes.forEach(function(n) { if (n.imageId) { n.image = images[n.imageId]; } });\n")
+    buf.write("nodes = new vis.DataSet(nodes);\nvar edges = new vis.DataSet(")
+    buf.write(_script_safe(edges_json))
+    buf.write(");\nvar options = ")
+    buf.write(options_json)
+    buf.write(";\n")
+    buf.write(_TAIL)
+    return buf.getvalue()
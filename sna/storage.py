@@ -0,0 +1,213 @@
+"""
+Akses MinIO tingkat bucket: listing lengkap (paginasi, tidak berhenti di 1000
+key) dan pemuatan banyak file sekaligus secara paralel untuk mode analisis
+satu bucket penuh.
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import boto3
+import numpy as np
+import pandas as pd
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+
+from sna.ingest import concat_frames, is_cache_object, load_cleaned, normalize_etag
+
+# Jumlah file yang diunduh & di-parse bersamaan (I/O + Arrow melepas GIL)
+LOAD_WORKERS = int(os.getenv("SNA_LOAD_WORKERS", "8"))
+SOURCE_COLUMN = "SUMBER FILE"
+SOURCE_EXTENSIONS = (".csv", ".xlsx", ".xls")
+
+_MB = 1024 * 1024
+# Upload multipart: file di atas threshold dipecah per part & dikirim paralel
+UPLOAD_CONFIG = TransferConfig(
+    multipart_threshold=int(os.getenv("SNA_MULTIPART_THRESHOLD_MB", "16")) * _MB,
+    multipart_chunksize=int(os.getenv("SNA_MULTIPART_PART_MB", "16")) * _MB,
+    max_concurrency=int(os.getenv("SNA_UPLOAD_CONCURRENCY", "8")),
+)
+PRESIGN_EXPIRES = int(os.getenv("SNA_PRESIGN_EXPIRES", "900"))
+
+# Satu client per proses: pool koneksi cukup besar untuk load paralel & upload multipart
+CLIENT_CONFIG = Config(
+    max_pool_connections=int(os.getenv("SNA_S3_MAX_POOL", "32")),
+    connect_timeout=float(os.getenv("SNA_S3_CONNECT_TIMEOUT", "5")),
+    read_timeout=float(os.getenv("SNA_S3_READ_TIMEOUT", "60")),
+    retries={"total_max_attempts": int(os.getenv("SNA_S3_MAX_ATTEMPTS", "5")), "mode": "adaptive"},
+)
+
+
+def make_client(endpoint_url, access_key, secret_key, region="us-east-1", config=CLIENT_CONFIG):
+    """Client S3/MinIO dengan pool, timeout & retry adaptif. Aman dipakai bersama antar thread."""
+    return boto3.client(
+        "s3",
+        endpoint_url=endpoint_url,
+        aws_access_key_id=access_key,
+        aws_secret_access_key=secret_key,
+        region_name=region,
+        config=config,
+    )
+
+
+class Prefetcher:
+    """
+    Memuat file di background selagi user masih memilih filter. Satu proses,
+    banyak session: entry di-key per `owner` (id session) dan tiap owner hanya
+    menyimpan prefetch terakhirnya. Total entry dibatasi max_items (terlama
+    dibuang), jadi session yang sudah ditutup tidak menahan DataFrame selamanya.
+
+    Membuang entry memanggil Future.cancel(), yang hanya membatalkan load yang
+    belum mulai: load yang sedang berjalan tetap selesai di worker (memakan
+    waktu worker & I/O), lalu hasilnya langsung dilepas karena tidak dirujuk lagi.
+    """
+
+    def __init__(self, max_workers=2, max_items=4):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="sna-prefetch")
+        self._futures = OrderedDict()
+        self._lock = threading.Lock()
+        self._max_items = max_items
+
+    def submit(self, owner, key, fn, *args, **kwargs):
+        with self._lock:
+            if (owner, key) in self._futures:
+                return
+            # Pilihan file sebelumnya dari session ini tidak dibutuhkan lagi
+            for stale in [k for k in self._futures if k[0] == owner]:
+                self._futures.pop(stale).cancel()
+            self._futures[(owner, key)] = self._pool.submit(fn, *args, **kwargs)
+            while len(self._futures) > self._max_items:
+                _, old = self._futures.popitem(last=False)
+                old.cancel()
+
+    def result(self, owner, key, timeout=None):
+        """
+        Hasil prefetch `key` milik `owner` (menunggu jika masih berjalan), atau None
+        jika tidak ada. Exception dari fungsi load dilempar ulang ke pemanggil.
+        """
+        with self._lock:
+            future = self._futures.pop((owner, key), None)
+        if future is None:
+            return None
+        return future.result(timeout=timeout)
+
+    def discard(self, owner):
+        """Buang semua prefetch milik `owner`."""
+        with self._lock:
+            for stale in [k for k in self._futures if k[0] == owner]:
+                self._futures.pop(stale).cancel()
+
+
+class BucketCache:
+    """
+    Hasil load_bucket (df, errors, index) terakhir per bucket_fingerprint, dipakai
+    bersama antar session; entry terlama dibuang jika melebihi max_items. Tidak
+    memakai st.cache_* agar progress per file tetap bisa ditampilkan saat cache miss.
+    """
+
+    def __init__(self, max_items=2):
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self._max_items = max_items
+
+    def get(self, fingerprint):
+        with self._lock:
+            if fingerprint in self._items:
+                self._items.move_to_end(fingerprint)
+            return self._items.get(fingerprint)
+
+    def put(self, fingerprint, value):
+        with self._lock:
+            self._items[fingerprint] = value
+            self._items.move_to_end(fingerprint)
+            while len(self._items) > self._max_items:
+                self._items.popitem(last=False)
+
+
+def list_all_objects(s3, bucket, prefix=""):
+    """Semua object di bucket (Key, Size, ETag, LastModified), mengikuti continuation token."""
+    paginator = s3.get_paginator("list_objects_v2")
+    objects = []
+    for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
+        objects.extend(page.get("Contents", []))
+    return objects
+
+
+def list_source_files(s3, bucket, prefix=""):
+    """Object sumber saja (cache Parquet hasil ingest disembunyikan)."""
+    return [obj for obj in list_all_objects(s3, bucket, prefix) if not is_cache_object(obj["Key"])]
+
+
+def file_metadata(s3, bucket, prefix=""):
+    """Metadata file sumber untuk Folder Manager tanpa mengunduh isinya."""
+    return [
+        {"Key": obj["Key"], "Size": obj["Size"], "LastModified": obj["LastModified"],
+         "ETag": normalize_etag(obj["ETag"])}
+        for obj in list_source_files(s3, bucket, prefix)
+    ]
+
+
+def upload_file(s3, fileobj, bucket, key):
+    """Upload multipart (ukuran part & konkurensi dari UPLOAD_CONFIG)."""
+    s3.upload_fileobj(fileobj, bucket, key, Config=UPLOAD_CONFIG)
+
+
+def presigned_url(s3, bucket, key, expires=PRESIGN_EXPIRES):
+    """URL unduhan langsung dari MinIO; browser mengambil file tanpa lewat server Streamlit."""
+    return s3.generate_presigned_url(
+        "get_object",
+        Params={"Bucket": bucket, "Key": key, "ResponseContentDisposition": f'attachment; filename="{os.path.basename(key)}"'},
+        ExpiresIn=expires,
+    )
+
+
+def read_object(s3, bucket, key):
+    return s3.get_object(Bucket=bucket, Key=key)["Body"].read()
+
+
+def bucket_fingerprint(objects):
+    """Identitas isi bucket dari pasangan key+ETag; berubah jika ada file ditambah/diubah/dihapus."""
+    digest = hashlib.sha1()
+    for key, etag in sorted((obj["Key"], normalize_etag(obj["ETag"])) for obj in objects):
+        digest.update(f"{key}\0{etag}\n".encode())
+    return f"bucket-{digest.hexdigest()}"
+
+
+def load_bucket(s3, bucket, objects, max_workers=LOAD_WORKERS, on_progress=None):
+    """
+    Muat & bersihkan banyak file secara paralel lalu gabungkan menjadi satu
+    DataFrame dengan kolom SUMBER FILE. Entitas dengan nama yang sama di file
+    berbeda otomatis menjadi satu node karena EntityIndex dibuat dari gabungan.
+
+    `on_progress(selesai, total, key)` dipanggil di thread pemanggil setiap
+    satu file selesai. Mengembalikan (df, errors) dengan errors = {key: pesan}.
+    """
+    objects = [obj for obj in objects if obj["Key"].lower().endswith(SOURCE_EXTENSIONS)]
+    frames, errors = {}, {}
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        futures = {
+            pool.submit(load_cleaned, s3, bucket, obj["Key"], obj["ETag"]): obj["Key"]
+            for obj in objects
+        }
+        for done, future in enumerate(as_completed(futures), start=1):
+            key = futures[future]
+            try:
+                frame = future.result()
+                if not frame.empty:
+                    frames[key] = frame
+            except Exception as e:
+                errors[key] = str(e)
+            if on_progress:
+                on_progress(done, len(objects), key)
+
+    if not frames:
+        return pd.DataFrame(), errors
+    # Urutan mengikuti key, bukan urutan selesai, agar hasil deterministik
+    keys = sorted(frames)
+    df = concat_frames([frames[k] for k in keys])
+    df[SOURCE_COLUMN] = pd.Categorical.from_codes(
+        np.repeat(np.arange(len(keys)), [len(frames[k]) for k in keys]), categories=keys
+    )
+    return df, errors
@@ -0,0 +1,149 @@
+"""
+Indeks temporal untuk memotong graph per rentang waktu: agregat pasangan
+(sumber -> tujuan) per bucket hari/minggu/bulan disimpan sebagai prefix sum
+per pasangan, sehingga total edge di jendela [b0, b1) cukup selisih dua
+prefix, tanpa filter & groupby ulang atas baris transaksi.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from sna.graph_core import EdgeCSR
+
+# Label UI -> kode bucket
+TIME_BUCKETS = {"Hari": "D", "Minggu": "W", "Bulan": "M"}
+
+
+def _bucket_start(times, freq):
+    """Awal bucket tiap timestamp (minggu dimulai hari Senin)."""
+    if freq == "M":
+        return times.astype("datetime64[M]").astype("datetime64[D]")
+    days = times.astype("datetime64[D]")
+    if freq == "W":
+        # 1970-01-01 adalah hari Kamis (weekday 3)
+        weekday = (days.view(np.int64) + 3) % 7
+        days = days - weekday.astype("timedelta64[D]")
+    return days
+
+
+def _bucket_range(first, last, freq):
+    """Semua awal bucket dari first s/d last (termasuk bucket kosong), plus akhir bucket terakhir."""
+    if freq == "M":
+        months = np.arange(first.astype("datetime64[M]"), last.astype("datetime64[M]") + 2)
+        edges = months.astype("datetime64[D]")
+    else:
+        step = 7 if freq == "W" else 1
+        edges = np.arange(first, last + np.timedelta64(step + 1, "D"), np.timedelta64(step, "D"))
+    return edges[:-1], edges[1:]
+
+
+@dataclass
+class TemporalIndex:
+    """
+    Entry unik per (pasangan, bucket), diurutkan per pasangan lalu bucket;
+    pair_indptr menunjuk awal entry tiap pasangan. cum_* adalah prefix sum
+    di dalam pasangan yang sama dengan satu nol di depan tiap pasangan, jadi
+    prefix sebelum entry ke-k pasangan p ada di cum[pair_indptr[p] + p + k].
+    """
+    n: int
+    freq: str
+    starts: np.ndarray     # awal bucket (datetime64[D]), panjang B
+    ends: np.ndarray       # akhir bucket (eksklusif)
+    pair_src: np.ndarray
+    pair_dst: np.ndarray
+    pair_indptr: np.ndarray
+    bucket: np.ndarray
+    cum_amount: np.ndarray
+    cum_freq: np.ndarray
+    in_order: np.ndarray   # pasangan diurutkan per tujuan (stable), untuk in_edges EdgeCSR
+
+    @classmethod
+    def build(cls, entity_index, df, min_value=0, freq="D"):
+        # Index bisa milik versi lama file (prefix baris dari df), lihat EntityIndex.extend
+        n_rows = len(entity_index.src)
+        times = df["TGL/TRANS"].to_numpy(dtype="datetime64[ns]")[:n_rows]
+        amount = df["MUTASI"].to_numpy(dtype=np.float64)[:n_rows]
+        # Sama dengan filter nilai di agregasi biasa; baris tanpa tanggal tidak punya bucket
+        rows = np.flatnonzero(~np.isnat(times) & (amount >= min_value))
+        n = entity_index.n
+        empty = np.array([], dtype="datetime64[D]")
+        if len(rows) == 0:
+            zeros = np.zeros(0, dtype=np.int32)
+            return cls(n, freq, empty, empty, zeros, zeros, np.zeros(1, dtype=np.int64), zeros,
+                       np.zeros(0), np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64))
+
+        bucket_of = _bucket_start(times[rows], freq)
+        starts, ends = _bucket_range(bucket_of.min(), bucket_of.max(), freq)
+        bucket = np.searchsorted(starts, bucket_of)
+        n_buckets = len(starts)
+
+        src = entity_index.src[rows].astype(np.int64)
+        dst = entity_index.dst[rows].astype(np.int64)
+        pair, pairs = pd.factorize(src * n + dst, sort=True)
+        pairs = np.asarray(pairs, dtype=np.int64)
+        entry, keys = pd.factorize(pair.astype(np.int64) * (n_buckets + 1) + bucket, sort=True)
+        keys = np.asarray(keys, dtype=np.int64)
+        total = np.bincount(entry, weights=amount[rows], minlength=len(keys))
+        count = np.bincount(entry, minlength=len(keys)).astype(np.int64)
+
+        # Prefix per pasangan (bukan global) agar selisihnya tidak kehilangan presisi
+        entry_pair = keys // (n_buckets + 1)
+        slots = np.arange(len(keys)) + entry_pair + 1
+        cum_amount = np.zeros(len(keys) + len(pairs))
+        cum_amount[slots] = pd.Series(total).groupby(entry_pair).cumsum().to_numpy()
+        cum_freq = np.zeros(len(keys) + len(pairs), dtype=np.int64)
+        cum_freq[slots] = pd.Series(count).groupby(entry_pair).cumsum().to_numpy()
+        pair_indptr = np.zeros(len(pairs) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(entry_pair, minlength=len(pairs)), out=pair_indptr[1:])
+        pair_dst = (pairs % n).astype(np.int32)
+        return cls(n, freq, starts, ends, (pairs // n).astype(np.int32), pair_dst,
+                   pair_indptr, (keys % (n_buckets + 1)).astype(np.int32), cum_amount, cum_freq,
+                   np.argsort(pair_dst, kind="stable"))
+
+    @property
+    def n_buckets(self):
+        return len(self.starts)
+
+    def labels(self):
+        """Label bucket untuk slider timeline."""
+        if self.freq == "M":
+            return [str(s)[:7] for s in self.starts.astype("datetime64[M]")]
+        return [str(s) for s in self.starts]
+
+    def bounds(self, b0, b1):
+        """Rentang waktu [mulai, akhir) dari bucket b0 s/d b1 (eksklusif)."""
+        return self.starts[b0], self.ends[b1 - 1]
+
+    def is_empty(self, b0, b1):
+        """True jika tidak ada transaksi di bucket [b0, b1) (bucket kosong tetap ada di timeline)."""
+        return not ((self.bucket >= b0) & (self.bucket < b1)).any()
+
+    def _slot(self, b):
+        # Posisi prefix "sebelum bucket b" untuk tiap pasangan: jumlah entry < b di segmennya
+        before = np.concatenate([[0], np.cumsum(self.bucket < b)])
+        first, last = self.pair_indptr[:-1], self.pair_indptr[1:]
+        return first + np.arange(len(first)) + (before[last] - before[first])
+
+    def window(self, b0, b1):
+        """EdgeCSR agregat transaksi di bucket [b0, b1): selisih dua prefix per pasangan."""
+        lo, hi = self._slot(b0), self._slot(b1)
+        freq = self.cum_freq[hi] - self.cum_freq[lo]
+        active = freq > 0
+        amount = self.cum_amount[hi[active]] - self.cum_amount[lo[active]]
+        # Pasangan sudah terurut (sumber, tujuan) dan per tujuan sejak build: CSR cukup
+        # disaring, tanpa lexsort/argsort ulang
+        src, dst = self.pair_src[active], self.pair_dst[active]
+        out_indptr = np.zeros(self.n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(src, minlength=self.n), out=out_indptr[1:])
+        in_indptr = np.zeros(self.n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(dst, minlength=self.n), out=in_indptr[1:])
+        new_id = np.cumsum(active) - 1
+        in_edges = new_id[self.in_order[active[self.in_order]]]
+        return EdgeCSR(self.n, src, dst, amount, freq[active], out_indptr, in_indptr, in_edges)
+
+    def row_mask(self, df, b0, b1):
+        """Mask baris DataFrame yang tanggalnya di dalam bucket [b0, b1)."""
+        start, end = self.bounds(b0, b1)
+        times = df["TGL/TRANS"].to_numpy(dtype="datetime64[ns]")
+        return (times >= start) & (times < end)
@@ -0,0 +1,215 @@
+"""
+Penelusuran aliran dana multi-hop (maju/mundur) dari akun, transaksi, atau
+kode trail LAYER. Adjacency diindeks per node dan diurutkan menurut waktu,
+sehingga setiap hop cukup searchsorted + slicing (BFS terbatas, tanpa scan
+seluruh baris).
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+LAYER_COLUMNS = [f"LAYER {i}." for i in range(1, 11)]
+
+
+@dataclass
+class TraceIndex:
+    """
+    Baris transaksi valid (tanggal & nominal ada) dengan dua urutan:
+    keluar per (sumber, waktu) dan masuk per (tujuan, waktu). Waktu disimpan
+    sebagai rank tanggal agar kunci gabungan node*(R+1)+rank tetap monoton;
+    tanggal untuk rank r ada di dates[r - 1].
+    """
+    n: int
+    n_ranks: int
+    dates: np.ndarray
+    rows: np.ndarray      # indeks posisi baris di DataFrame asal
+    src: np.ndarray
+    dst: np.ndarray
+    rank: np.ndarray
+    amount: np.ndarray
+    out_order: np.ndarray
+    out_key: np.ndarray
+    out_indptr: np.ndarray
+    out_cum: np.ndarray
+    in_order: np.ndarray
+    in_key: np.ndarray
+    in_indptr: np.ndarray
+    in_cum: np.ndarray
+
+    @classmethod
+    def build(cls, entity_index, df):
+        times = df["TGL/TRANS"].to_numpy(dtype="datetime64[ns]")
+        amount = df["MUTASI"].to_numpy(dtype=np.float64)
+        valid = ~np.isnat(times) & np.isfinite(amount) & (amount > 0)
+        rows = np.flatnonzero(valid)
+        src = entity_index.src[rows].astype(np.int64)
+        dst = entity_index.dst[rows].astype(np.int64)
+        dates, rank = np.unique(times[rows], return_inverse=True)
+        rank = rank.astype(np.int64) + 1      # rank 0 = "sebelum semua transaksi"
+        n_ranks = int(rank.max()) + 1 if len(rank) else 1
+        amount = amount[rows]
+        n = entity_index.n
+
+        def side(node):
+            order = np.lexsort((rank, node))
+            key = node[order] * (n_ranks + 1) + rank[order]
+            indptr = np.zeros(n + 1, dtype=np.int64)
+            np.cumsum(np.bincount(node, minlength=n), out=indptr[1:])
+            cum = np.concatenate([[0.0], np.cumsum(amount[order])])
+            return order, key, indptr, cum
+
+        out_order, out_key, out_indptr, out_cum = side(src)
+        in_order, in_key, in_indptr, in_cum = side(dst)
+        return cls(n, n_ranks, dates, rows, src, dst, rank, amount,
+                   out_order, out_key, out_indptr, out_cum,
+                   in_order, in_key, in_indptr, in_cum)
+
+    def rows_of(self, positions):
+        """Posisi baris DataFrame -> posisi di indeks (baris tidak valid dibuang)."""
+        lookup = np.full(int(self.rows.max()) + 1 if len(self.rows) else 0, -1, dtype=np.int64)
+        lookup[self.rows] = np.arange(len(self.rows))
+        positions = np.asarray(positions, dtype=np.int64)
+        positions = positions[positions < len(lookup)]
+        found = lookup[positions]
+        return found[found >= 0]
+
+
+def _expand(lo, hi):
+    """Gabungkan rentang [lo, hi) menjadi satu array indeks + id rentang asalnya."""
+    counts = np.maximum(hi - lo, 0)
+    total = int(counts.sum())
+    owner = np.repeat(np.arange(len(lo)), counts)
+    idx = np.repeat(lo - np.cumsum(counts) + counts, counts) + np.arange(total)
+    return idx, owner
+
+
+def trace_flow(index, start_nodes=(), start_rows=(), direction="forward", max_hops=5, max_edges=20_000):
+    """
+    Telusuri dana dari `start_nodes` (id entitas) dan/atau `start_rows`
+    (posisi di TraceIndex). Maju: hanya edge keluar dengan tanggal >= tanggal
+    dana masuk. Mundur: hanya edge masuk dengan tanggal <= tanggal dana keluar.
+    Nominal dialokasikan proporsional: edge e dari node yang menerima f
+    mendapat amount_e * min(1, f / total_edge_yang_memenuhi).
+
+    Mengembalikan DataFrame: HOP, IDX (posisi di TraceIndex), ALOKASI.
+    """
+    forward = direction == "forward"
+    used = np.zeros(len(index.rows), dtype=bool)
+    hops, idxs, allocs = [], [], []
+
+    start_nodes = np.asarray(start_nodes, dtype=np.int64)
+    start_rows = np.asarray(start_rows, dtype=np.int64)
+    # Frontier: node, rank waktu, dana yang ditelusuri (inf = seluruh aliran akun)
+    node = start_nodes
+    rank = np.zeros(len(start_nodes), dtype=np.int64) if forward else np.full(len(start_nodes), index.n_ranks, dtype=np.int64)
+    flow = np.full(len(start_nodes), np.inf)
+    first_hop = 1
+    if len(start_rows):
+        used[start_rows] = True
+        hops.append(np.ones(len(start_rows), dtype=np.int64))
+        idxs.append(start_rows)
+        allocs.append(index.amount[start_rows])
+        nxt = index.dst[start_rows] if forward else index.src[start_rows]
+        node = np.concatenate([node, nxt])
+        rank = np.concatenate([rank, index.rank[start_rows]])
+        flow = np.concatenate([flow, index.amount[start_rows]])
+        first_hop = 2
+
+    total = len(start_rows)
+    for hop in range(first_hop, max_hops + 1):
+        if len(node) == 0 or total >= max_edges:
+            break
+        stride = index.n_ranks + 1
+        if forward:
+            lo = np.searchsorted(index.out_key, node * stride + rank, side="left")
+            hi = index.out_indptr[node + 1]
+            order, cum = index.out_order, index.out_cum
+        else:
+            lo = index.in_indptr[node]
+            hi = np.searchsorted(index.in_key, node * stride + rank, side="right")
+            order, cum = index.in_order, index.in_cum
+
+        eligible = cum[hi] - cum[lo]
+        share = np.where(eligible > 0, np.minimum(1.0, flow / np.maximum(eligible, 1e-9)), 0.0)
+        pos, owner = _expand(lo, hi)
+        edge = order[pos]
+        alloc = index.amount[edge] * share[owner]
+
+        keep = ~used[edge] & (alloc > 0)
+        edge, alloc = edge[keep], alloc[keep]
+        if len(edge) == 0:
+            break
+        # Satu baris bisa dicapai dari beberapa jalur di hop yang sama: jumlahkan, batasi nominalnya
+        edge, inverse = np.unique(edge, return_inverse=True)
+        alloc = np.minimum(np.bincount(inverse, weights=alloc), index.amount[edge])
+        if total + len(edge) > max_edges:
+            top = np.argsort(-alloc, kind="stable")[:max_edges - total]
+            edge, alloc = edge[top], alloc[top]
+        used[edge] = True
+        total += len(edge)
+
+        hops.append(np.full(len(edge), hop, dtype=np.int64))
+        idxs.append(edge)
+        allocs.append(alloc)
+        node = index.dst[edge] if forward else index.src[edge]
+        rank = index.rank[edge]
+        flow = alloc
+
+    if not idxs:
+        return pd.DataFrame({"HOP": [], "IDX": [], "ALOKASI": []})
+    return pd.DataFrame({"HOP": np.concatenate(hops), "IDX": np.concatenate(idxs), "ALOKASI": np.concatenate(allocs)})
+
+
+def trace_table(index, df, result):
+    """Gabungkan hasil trace dengan kolom transaksi aslinya (termasuk kode LAYER terdalam)."""
+    rows = df.iloc[index.rows[result["IDX"].to_numpy(dtype=np.int64)]]
+    # SUMBER FILE ada di mode seluruh folder: NO hanya unik di dalam satu file
+    cols = [c for c in ["SUMBER FILE", "NO", "PEMILIK REKENING", "NAMA LAWAN", "TGL/TRANS", "MUTASI"] if c in df.columns]
+    table = rows[cols].reset_index(drop=True)
+    layers = [c for c in LAYER_COLUMNS if c in df.columns]
+    if layers:
+        # Kode trail terdalam (A.01.01. dst) yang terisi di baris tersebut
+        table["LAYER"] = rows[layers].ffill(axis=1).iloc[:, -1].to_numpy()
+    table.insert(0, "HOP", result["HOP"].to_numpy())
+    table["ALOKASI"] = result["ALOKASI"].to_numpy()
+    return table
+
+
+def layer_rows(df, code):
+    """
+    Posisi baris yang memuat kode trail `code` di salah satu kolom LAYER.
+    Kolom kategori (hasil compact_frame) dicocokkan lewat kategorinya lalu
+    dibandingkan di kode integer, tanpa mengubah seluruh baris ke string.
+    """
+    layers = [c for c in LAYER_COLUMNS if c in df.columns]
+    if not layers or not code:
+        return np.array([], dtype=np.int64)
+    code = code.strip()
+    hit = np.zeros(len(df), dtype=bool)
+    for name in layers:
+        col = df[name]
+        if isinstance(col.dtype, pd.CategoricalDtype):
+            match = np.flatnonzero(col.cat.categories.astype(str).str.strip() == code)
+            if len(match):
+                hit |= np.isin(col.cat.codes.to_numpy(), match)
+        else:
+            hit |= (col.astype("string").str.strip() == code).fillna(False).to_numpy(dtype=bool)
+    return np.flatnonzero(hit)
+
+
+def layer_codes(df):
+    """Semua kode trail unik di kolom LAYER (untuk pilihan di UI)."""
+    layers = [c for c in LAYER_COLUMNS if c in df.columns]
+    codes = set()
+    for name in layers:
+        col = df[name]
+        if isinstance(col.dtype, pd.CategoricalDtype):
+            # Hanya kategori yang benar-benar dipakai baris (bincount di kode int, bukan stack string)
+            used = np.bincount(col.cat.codes.to_numpy() + 1, minlength=len(col.cat.categories) + 1)[1:] > 0
+            values = col.cat.categories[used]
+        else:
+            values = col.dropna().unique()
+        codes.update(pd.Index(values).astype(str).str.strip())
+    codes.discard("")
+    return sorted(codes)
@@ -1,11 +1,29 @@
+import numpy as np
 import pandas as pd
 import streamlit as st
-import streamlit.components.v1 as components
-from pyvis.network import Network
 from pathlib import Path
 import os
-import boto3
-from io import BytesIO
+import json
+import time
+import uuid
+
+from sna.bank_style import BankStyles, apply_bank_styles
+from sna.graph_build import FOCUS_COLOR, apply_node_metrics, build_vis_elements, highlight_edges
+from sna.cycles import cycle_pairs, cycle_tables, find_cycles
+from sna.entity_resolution import apply_entity_map, load_or_resolve, map_fingerprint, merge_table, resolve_entities
+from sna.graph_core import EntityIndex, aggregate_edges, merge_csr
+from sna.ingest import clean_financial_data, delete_cached, load_cleaned, normalize_etag
+from sna.layout import force_layout, layered_layout
+from sna.lod import apply_render_budget, cluster_id, entity_banks, entity_communities
+from sna.metrics import node_metrics
+from sna.profiling import Profiler, set_active, stage
+from sna.render import render_network_html
+from sna.storage import (
+    SOURCE_COLUMN, BucketCache, Prefetcher, bucket_fingerprint, file_metadata, list_source_files, load_bucket,
+    make_client, presigned_url, read_object, upload_file,
+)
+from sna.temporal import TIME_BUCKETS, TemporalIndex
+from sna.trace import TraceIndex, layer_codes, layer_rows, trace_flow, trace_table
 
 # =====================
 # MINIO CONFIG
@@ -19,7 +37,9 @@ MINIO_SECRET_KEY = os.getenv("MINIO_SECRET_KEY", "admin123")
 # =====================
 def upload_to_minio(file, bucket, name):
     try:
-        s3_client.upload_fileobj(file, bucket, name)
+        # Multipart paralel untuk file mutasi yang besar
+        upload_file(s3_client, file, bucket, name)
+        invalidate_listings()
         return True
     except Exception as e:
         st.error(f"Upload Error: {e}")
@@ -27,45 +47,68 @@ def upload_to_minio(file, bucket, name):
 
 def get_minio_file_list(bucket):
     try:
-        response = s3_client.list_objects_v2(Bucket=bucket)
-        if 'Contents' in response:
-            return [obj['Key'] for obj in response['Contents']]
-        return []
+        # Paginasi penuh (tidak berhenti di 1000 key); cache Parquet hasil ingest disembunyikan
+        return [obj['Key'] for obj in list_file_metadata(bucket)]
     except Exception as e:
         print(f"Error listing files: {e}")
         return []
 
-def format_miliar(val):
-    """Fungsi untuk memformat angka ke label Juta/Miliar"""
-    if abs(val) >= 1_000_000_000:
-        return f"{val / 1_000_000_000:.2f} Miliar"
-    elif abs(val) >= 1_000_000:
-        return f"{val / 1_000_000:.2f} Juta"
-    return f"{val:,.0f}"
-
-s3_client = boto3.client(
-    's3',
-    endpoint_url=MINIO_ENDPOINT,
-    aws_access_key_id=MINIO_ACCESS_KEY,
-    aws_secret_access_key=MINIO_SECRET_KEY,
-    region_name='us-east-1'
-)
+# Listing di-cache sebentar antar rerun & dibersihkan setelah create/delete/upload
+LISTING_TTL = int(os.getenv("SNA_LISTING_TTL", "30"))
 
-@st.cache_data
-def load_data_from_minio(bucket_name, object_name):
+@st.cache_data(ttl=LISTING_TTL, show_spinner=False)
+def list_file_metadata(bucket):
+    """Nama, ukuran, waktu ubah & ETag file di bucket."""
+    return file_metadata(s3_client, bucket)
+
+@st.cache_data(ttl=LISTING_TTL, show_spinner=False)
+def list_bucket_names():
+    return [b['Name'] for b in s3_client.list_buckets()['Buckets']]
+
+def invalidate_listings():
+    list_bucket_names.clear()
+    list_file_metadata.clear()
+
+def format_bytes(size):
+    for unit in ["B", "KB", "MB", "GB"]:
+        if size < 1024 or unit == "GB":
+            return f"{size:,.0f} {unit}" if unit == "B" else f"{size:,.1f} {unit}"
+        size /= 1024
+
+# Endpoint MinIO yang bisa dijangkau browser (mis. lewat reverse proxy). Jika diisi,
+# tombol download memakai presigned URL; jika tidak, file diambil saat tombol diklik.
+MINIO_PUBLIC_ENDPOINT = os.getenv("MINIO_PUBLIC_ENDPOINT", "")
+
+@st.cache_resource
+def get_s3_clients():
+    """Satu client (pool koneksi, timeout, retry adaptif) per proses, dipakai bersama semua session."""
+    client = make_client(MINIO_ENDPOINT, MINIO_ACCESS_KEY, MINIO_SECRET_KEY)
+    presign = make_client(MINIO_PUBLIC_ENDPOINT, MINIO_ACCESS_KEY, MINIO_SECRET_KEY) if MINIO_PUBLIC_ENDPOINT else None
+    return client, presign
+
+@st.cache_resource
+def get_prefetcher():
+    return Prefetcher(max_items=int(os.getenv("SNA_PREFETCH_ITEMS", "4")))
+
+@st.cache_resource
+def get_bucket_cache():
+    return BucketCache(max_items=int(os.getenv("SNA_FOLDER_CACHE_ENTRIES", "2")))
+
+s3_client, presign_client = get_s3_clients()
+
+def get_object_etag(bucket_name, object_name):
+    head = s3_client.head_object(Bucket=bucket_name, Key=object_name)
+    return normalize_etag(head["ETag"])
+
+@st.cache_data(max_entries=8)
+def load_data_from_minio(bucket_name, object_name, etag, _session=None):
+    # etag ikut jadi cache key: file yang di-upload ulang otomatis dibaca ulang
     try:
-        response = s3_client.get_object(Bucket=bucket_name, Key=object_name)
-        content = response['Body'].read()
-        
-        if object_name.lower().endswith('.csv'):
-            try:
-                # Coba utf-8 dulu, jika gagal gunakan latin1
-                return pd.read_csv(BytesIO(content), sep=";", encoding='utf-8')
-            except UnicodeDecodeError:
-                return pd.read_csv(BytesIO(content), sep=";", encoding='ISO-8859-1')
-        else:
-            # Untuk .xlsx tidak ada urusan dengan encoding utf-8
-            return pd.read_excel(BytesIO(content))
+        # Pakai hasil prefetch jika file ini sudah dimuat di background oleh session ini
+        prefetched = get_prefetcher().result(_session, (bucket_name, object_name, etag))
+        if prefetched is not None:
+            return prefetched
+        return load_cleaned(s3_client, bucket_name, object_name, etag=etag)
     except Exception as e:
         st.error(f"Gagal mengambil data dari MinIO: {e}")
         return pd.DataFrame()
@@ -102,21 +145,342 @@ def load_data_local(uploaded_file=None, sep=";"):
             return pd.DataFrame()
 
 
-    if not df.empty:
-        df["MUTASI"] = df["MUTASI"].astype(str).str.replace(".", "", regex=False).str.replace(",", ".", regex=False).astype(float)
-        df["TGL/TRANS"] = pd.to_datetime(df["TGL/TRANS"], dayfirst=True, errors="coerce")
-        df["PEMILIK REKENING"] = df["PEMILIK REKENING"].fillna("UNKNOWN").astype(str)
-        df["NAMA LAWAN"] = df["NAMA LAWAN"].fillna("UNKNOWN").astype(str)
-    return df
+    return clean_financial_data(df)
 
-def clean_financial_data(df):
-    if df.empty: return df
-    # Logika pembersihan Anda
-    df["MUTASI"] = df["MUTASI"].astype(str).str.replace(".", "", regex=False).str.replace(",", ".", regex=False).astype(float)
-    df["TGL/TRANS"] = pd.to_datetime(df["TGL/TRANS"], dayfirst=True, errors="coerce")
-    df["PEMILIK REKENING"] = df["PEMILIK REKENING"].fillna("UNKNOWN").astype(str)
-    df["NAMA LAWAN"] = df["NAMA LAWAN"].fillna("UNKNOWN").astype(str)
-    return df
+# =====================
+# CACHE LAYER
+# =====================
+# Dipakai bersama oleh semua session; entry terlama dibuang (LRU) jika melebihi max_entries.
+# Argumen berawalan "_" tidak ikut di-hash, identitas data diwakili oleh ETag file.
+# Cache yang menyimpan struktur ber-id entitas (CSR, indeks temporal/trace) juga
+# di-key oleh fingerprint EntityIndex: index hasil extend() dan from_frame() untuk
+# ETag yang sama memberi id berbeda ke nama yang sama.
+GRAPH_CACHE_ENTRIES = int(os.getenv("SNA_GRAPH_CACHE_ENTRIES", "64"))
+INDEX_HASH = {EntityIndex: lambda index: index.fingerprint}
+
+@st.cache_resource(max_entries=GRAPH_CACHE_ENTRIES)
+def get_resolved_data(etag, by_account, fuzzy_threshold, bucket, _df):
+    """
+    (df, EntityIndex, peta) setelah resolusi entitas. Peta diambil dari / disimpan ke
+    bucket sehingga hanya dihitung sekali per versi data; index None jika tidak ada yang digabung.
+    Index hasil resolusi selalu dibangun ulang penuh (baris baru bisa mengubah peta
+    penggabungan), jadi append inkremental (EntityIndex.extend) hanya berlaku jika
+    resolusi dimatikan atau tidak ada nama yang digabung.
+    """
+    with stage("entity resolution") as info:
+        if bucket:
+            entity_map = load_or_resolve(s3_client, bucket, etag, _df, by_account, fuzzy_threshold)
+        else:
+            entity_map = resolve_entities(_df, by_account, fuzzy_threshold)
+        info["merged"] = len(entity_map)
+    if not entity_map:
+        return _df, None, entity_map
+    with stage("entity index"):
+        resolved = apply_entity_map(_df, entity_map)
+        return resolved, EntityIndex.from_frame(resolved), entity_map
+
+@st.cache_resource(max_entries=GRAPH_CACHE_ENTRIES, hash_funcs=INDEX_HASH)
+def get_edge_csr(etag, min_value, window, _df, entity_index):
+    if window is not None:
+        # Rentang waktu (freq, b0, b1): selisih prefix dari indeks temporal, tanpa groupby ulang
+        freq, b0, b1 = window
+        temporal_index = get_temporal_index(etag, min_value, freq, _df, entity_index)
+        with stage("time window"):
+            return temporal_index.window(b0, b1)
+    # Index bisa milik versi lama file (prefix baris dari _df), lihat EntityIndex.extend
+    n_rows = len(entity_index.src)
+    with stage("filter", rows=n_rows):
+        amounts = _df["MUTASI"].to_numpy()[:n_rows]
+        counted = _df["TGL/TRANS"].notna().to_numpy()[:n_rows]
+        # 1. FILTER DATA (Sesuai input user)
+        value_mask = amounts >= min_value
+    if entity_index.base is not None:
+        # File hasil append: agregat versi sebelumnya + baris baru saja. Hemat hanya jika
+        # agregat versi lama masih ada di cache proses ini; setelah restart/eviction
+        # panggilan di bawah menghitungnya ulang dari prefix baris (agregat tidak disimpan ke bucket).
+        base_etag, base_rows, base_index = entity_index.base
+        base = get_edge_csr(base_etag, min_value, None, _df, base_index)
+        with stage("groupby (append)"):
+            delta = aggregate_edges(entity_index, amounts, counted, value_mask & (np.arange(n_rows) >= base_rows))
+            return merge_csr(base, delta)
+    # Agregasi per pasangan di atas id integer, disimpan sebagai CSR dua arah
+    with stage("groupby") as info:
+        edge_csr = aggregate_edges(entity_index, amounts, counted, value_mask)
+        info["edges"] = len(edge_csr.src)
+    return edge_csr
+
+@st.cache_data(max_entries=GRAPH_CACHE_ENTRIES)
+def get_grouped_edges(etag, min_value, window, search_id, _df, _entity_index):
+    edge_csr = get_edge_csr(etag, min_value, window, _df, _entity_index)
+    potential_targets = []
+    with stage("edge table"):
+        if search_id:
+            search_node = _entity_index.id_of(search_id)
+            # Hanya edge yang menyentuh search_id: O(degree), bukan scan seluruh baris
+            df_grouped = edge_csr.to_frame(_entity_index.names, edge_csr.incident_edge_ids(search_node))
+            # Ambil daftar lawan transaksi khusus untuk ID yang dicari
+            potential_targets = sorted(_entity_index.names[edge_csr.neighbours(search_node)].tolist())
+        else:
+            df_grouped = edge_csr.to_frame(_entity_index.names)
+        # Ini penting untuk menentukan warna node (Biru untuk pengirim)
+        node_sums = df_grouped.groupby("PEMILIK REKENING")["MUTASI"].sum().to_dict()
+    return df_grouped, node_sums, potential_targets
+
+@st.cache_data(max_entries=GRAPH_CACHE_ENTRIES)
+def get_entity_banks(etag, _df, _entity_index):
+    """Bank dominan tiap entitas (BANK / BANK LAWAN), sekali per file; dihitung per id entitas."""
+    return entity_banks(_df, _entity_index)
+
+@st.cache_data(max_entries=GRAPH_CACHE_ENTRIES)
+def get_lod_groups(etag, min_value, window, cluster_by, _df, _entity_index):
+    """Pengelompokan entitas untuk supernode level-of-detail."""
+    if cluster_by == "Bank":
+        return get_entity_banks(etag, _df, _entity_index)
+    edge_csr = get_edge_csr(etag, min_value, window, _df, _entity_index)
+    with stage("communities"):
+        return entity_communities(edge_csr, _entity_index.names)
+
+@st.cache_data(max_entries=GRAPH_CACHE_ENTRIES)
+def get_plot_edges(etag, min_value, window, search_id, selected_target, break_down, lod, _df, _entity_index):
+    """
+    Kembalikan (df_plot, clusters). `lod` = (max_nodes, max_edges, cluster_by, expanded)
+    hanya dipakai di Global View; clusters berisi supernode yang terbentuk.
+    """
+    df_grouped = get_grouped_edges(etag, min_value, window, search_id, _df, _entity_index)[0]
+    no_clusters = pd.DataFrame(columns=["CLUSTER", "ANGGOTA", "VOLUME"])
+    # --- LOGIKA PENENTUAN DATA YANG DIGAMBAR (df_plot) ---
+    if search_id and selected_target != "Semua":
+        if break_down:
+            # MODE PECAH: Ambil data mentah per baris (filter nilai + pasangan via id integer)
+            value_mask = (_df["MUTASI"] >= min_value).to_numpy()
+            if window is not None:
+                freq, b0, b1 = window
+                value_mask = value_mask & get_temporal_index(etag, min_value, freq, _df, _entity_index).row_mask(_df, b0, b1)
+            df_plot = _df[value_mask & _entity_index.rows_between(search_id, selected_target)].copy()
+            df_plot["FREKUENSI"] = 1 # Set 1 karena sudah dipecah per baris
+            return df_plot, no_clusters
+        # MODE FILTER TARGET (Agregasi): Ambil dari df_grouped
+        return df_grouped[
+            ((df_grouped["PEMILIK REKENING"] == search_id) & (df_grouped["NAMA LAWAN"] == selected_target)) |
+            ((df_grouped["PEMILIK REKENING"] == selected_target) & (df_grouped["NAMA LAWAN"] == search_id))
+        ], no_clusters
+    if not search_id and lod is not None:
+        # Global View: top-K edge + supernode agar browser tidak hang
+        max_nodes, max_edges, cluster_by, expanded = lod
+        groups = get_lod_groups(etag, min_value, window, cluster_by, _df, _entity_index)
+        with stage("level of detail"):
+            return apply_render_budget(df_grouped, groups, max_nodes, max_edges, expanded)
+    # Semua lawan transaksi search_id (df_grouped sudah berisi edge search_id saja),
+    # atau Global View tanpa batas render
+    return df_grouped, no_clusters
+
+@st.cache_data(max_entries=GRAPH_CACHE_ENTRIES)
+def get_network_data(etag, min_value, window, search_id, selected_target, break_down, lod, _df, _entity_index):
+    """Node & edge vis.js dalam bentuk JSON, terpisah dari opsi visual/physics."""
+    node_sums = get_grouped_edges(etag, min_value, window, search_id, _df, _entity_index)[1]
+    df_plot, clusters = get_plot_edges(etag, min_value, window, search_id, selected_target, break_down, lod, _df, _entity_index)
+    # Atribut node & edge dihitung per kolom, lalu dikeluarkan dalam satu pass
+    with stage("graph build") as info:
+        nodes, edges = build_vis_elements(
+            df_plot, search_id, node_sums, break_down, dict(zip(clusters["CLUSTER"], clusters["ANGGOTA"]))
+        )
+        info["nodes"], info["edges"] = len(nodes), len(edges)
+    with stage("serialize json") as info:
+        nodes_json, edges_json = json.dumps(nodes), json.dumps(edges)
+        info["bytes"] = len(nodes_json) + len(edges_json)
+    return nodes_json, edges_json
+
+@st.cache_data(max_entries=GRAPH_CACHE_ENTRIES)
+def get_positioned_nodes(etag, min_value, window, search_id, selected_target, break_down, lod,
+                         layout_type, spring_length, node_distance, central_gravity, _df, _entity_index):
+    """Node JSON plus koordinat x/y hasil layout server, di-cache per graph & parameter layout."""
+    nodes_json, _ = get_network_data(etag, min_value, window, search_id, selected_target, break_down, lod, _df, _entity_index)
+    df_plot = get_plot_edges(etag, min_value, window, search_id, selected_target, break_down, lod, _df, _entity_index)[0]
+    src = df_plot["PEMILIK REKENING"].astype(str)
+    tgt = df_plot["NAMA LAWAN"].astype(str)
+    with stage("layout", type=layout_type):
+        if "Hierarchical" in layout_type:
+            direction = "UD" if "Top-Down" in layout_type else "LR"
+            names, pos = layered_layout(src, tgt, level_separation=spring_length, node_spacing=node_distance, direction=direction)
+        else:
+            names, pos = force_layout(src, tgt, weights=df_plot["MUTASI"].fillna(0).to_numpy(),
+                                      spring_length=spring_length, node_distance=node_distance,
+                                      central_gravity=central_gravity)
+    xy = dict(zip(names.tolist(), pos.round(1).tolist()))
+    nodes = json.loads(nodes_json)
+    for node in nodes:
+        node["x"], node["y"] = xy[node["id"]]
+    return json.dumps(nodes)
+
+@st.cache_data(max_entries=GRAPH_CACHE_ENTRIES)
+def get_node_metrics(etag, min_value, _df, _entity_index):
+    """Metrik SNA seluruh graph (bukan hanya yang digambar), dihitung sekali per file & min_value."""
+    edge_csr = get_edge_csr(etag, min_value, None, _df, _entity_index)
+    with stage("sna metrics"):
+        return node_metrics(edge_csr, _entity_index.names)
+
+@st.cache_data(max_entries=GRAPH_CACHE_ENTRIES)
+def get_styled_nodes(nodes_json, etag, min_value, size_by, color_by, _df, _entity_index):
+    """Node JSON dengan ukuran/warna menurut metrik yang dipilih."""
+    metrics = get_node_metrics(etag, min_value, _df, _entity_index)
+    return json.dumps(apply_node_metrics(json.loads(nodes_json), metrics, size_by, color_by))
+
+@st.cache_resource
+def get_bank_styles():
+    """config/bank_nodes.yaml + logo ter-encode, dibaca sekali per proses."""
+    return BankStyles.load()
+
+@st.cache_data(max_entries=GRAPH_CACHE_ENTRIES)
+def get_bank_nodes(nodes_json, etag, keep_color, _df, _entity_index):
+    """
+    (node JSON bergaya bank, tabel gambar JSON berisi logo yang dipakai saja).
+    keep_color=True jika warna node sudah diatur metrik: bank hanya memberi logo.
+    """
+    entity_bank, styles = get_entity_banks(etag, _df, _entity_index), get_bank_styles()
+    with stage("bank styling"):
+        nodes, images = apply_bank_styles(json.loads(nodes_json), entity_bank, styles, FOCUS_COLOR, keep_color)
+    return json.dumps(nodes), json.dumps(images) if images else None
+
+@st.cache_resource(max_entries=GRAPH_CACHE_ENTRIES, hash_funcs=INDEX_HASH)
+def get_temporal_index(etag, min_value, freq, _df, entity_index):
+    """Prefix sum agregat pasangan per bucket waktu, dibuat sekali per file, min_value & granularitas."""
+    return TemporalIndex.build(entity_index, _df, min_value, freq)
+
+@st.cache_resource(max_entries=GRAPH_CACHE_ENTRIES, hash_funcs=INDEX_HASH)
+def get_trace_index(etag, _df, entity_index):
+    """Adjacency berurut waktu untuk money-trail tracing, dibuat sekali per file."""
+    return TraceIndex.build(entity_index, _df)
+
+@st.cache_data(max_entries=GRAPH_CACHE_ENTRIES)
+def get_layer_codes(etag, _df):
+    """Kode trail LAYER untuk pilihan tracing, sekali per file (expander tetap dijalankan walau tertutup)."""
+    return layer_codes(_df)
+
+@st.cache_data(max_entries=GRAPH_CACHE_ENTRIES)
+def get_money_trail(etag, start_mode, start_value, direction, max_hops, max_edges, _df, _entity_index):
+    """Tabel hasil penelusuran dana (HOP, transaksi, LAYER, ALOKASI)."""
+    trace_index = get_trace_index(etag, _df, _entity_index)
+    start_nodes, start_rows = [], []
+    if start_mode == "Akun":
+        start_nodes = [_entity_index.id_of(start_value)]
+    elif start_mode == "Transaksi (NO)":
+        # start_value = NO, atau (file, NO) di mode seluruh folder karena NO berulang antar file
+        source, number = start_value if isinstance(start_value, tuple) else (None, start_value)
+        match = _df["NO"] == number
+        if source is not None:
+            match &= _df[SOURCE_COLUMN] == source
+        start_rows = trace_index.rows_of(np.flatnonzero(match.to_numpy()))
+    else:
+        start_rows = trace_index.rows_of(layer_rows(_df, start_value))
+    result = trace_flow(trace_index, start_nodes, start_rows, direction, max_hops, max_edges)
+    return trace_table(trace_index, _df, result)
+
+@st.cache_data(max_entries=GRAPH_CACHE_ENTRIES)
+def get_cycles(etag, min_value, max_len, window_days, tolerance, _df, _entity_index):
+    """(ringkasan, detail, terpotong) siklus temporal, memakai TraceIndex yang sama dengan tracing."""
+    trace_index = get_trace_index(etag, _df, _entity_index)
+    cycles, truncated = find_cycles(trace_index, max_len, window_days, tolerance, min_amount=min_value)
+    summary, detail = cycle_tables(trace_index, _df, cycles)
+    return summary, detail, truncated
+
+@st.cache_data(max_entries=GRAPH_CACHE_ENTRIES)
+def get_cycle_edges(edges_json, etag, min_value, cycle_params, _df, _entity_index):
+    """Edge JSON dengan edge yang termasuk siklus ditandai."""
+    detail = get_cycles(etag, min_value, *cycle_params, _df, _entity_index)[1]
+    return json.dumps(highlight_edges(json.loads(edges_json), cycle_pairs(detail)))
+
+def style_network(nodes_json, edges_json, etag, min_value, graph_style, df, entity_index):
+    """
+    (node JSON, edge JSON, gambar JSON) dengan highlight siklus, metrik & gaya bank.
+    Dipakai graph utama dan tiap frame playback agar tampilannya sama.
+    """
+    cycle_params, size_by, color_by, bank_styling = graph_style
+    if cycle_params:
+        edges_json = get_cycle_edges(edges_json, etag, min_value, cycle_params, df, entity_index)
+    if size_by or color_by:
+        nodes_json = get_styled_nodes(nodes_json, etag, min_value, size_by, color_by, df, entity_index)
+    images_json = None
+    if bank_styling:
+        nodes_json, images_json = get_bank_nodes(nodes_json, etag, bool(color_by), df, entity_index)
+    return nodes_json, edges_json, images_json
+
+def build_vis_options(layout_type, physics_enabled, central_gravity, spring_length, server_layout=False):
+    """Opsi visual & physics saja; murah dibuat ulang setiap slider digeser."""
+    if server_layout:
+        # Posisi node sudah dihitung di server: solver physics di browser tidak dijalankan
+        return """
+        {
+        "edges": {
+            "font": { "align": "top", "size": 11, "strokeWidth": 3, "strokeColor": "#0f172a" },
+            "smooth": { "enabled": true, "type": "curvedCW", "roundness": 0.2 }
+        },
+        "layout": { "hierarchical": { "enabled": false } },
+        "physics": { "enabled": false }
+        }
+        """
+    if "Hierarchical" in layout_type:
+        direction = "UD" if "Top-Down" in layout_type else "LR"
+        return f"""
+        {{
+        "edges": {{
+            "font": {{ "align": "top", "size": 12, "strokeWidth": 3, "strokeColor": "#0f172a" }},
+            "smooth": {{ "enabled": true, "type": "curvedCW", "roundness": 0.15 }}
+        }},
+        "layout": {{
+            "hierarchical": {{
+            "enabled": true,
+            "direction": "{direction}",
+            "sortMethod": "hubsize",
+            "levelSeparation": 450,
+            "nodeSpacing": 400
+            }}
+        }},
+        "physics": {{
+            "enabled": true,
+            "hierarchicalRepulsion": {{ "nodeDistance": 400, "centralGravity": 0.0 }},
+            "solver": "hierarchicalRepulsion"
+        }}
+        }}
+        """
+    else:
+        return f"""
+        {{
+        "edges": {{
+            "font": {{
+            "align": "top",
+            "size": 11,
+            "strokeWidth": 3,
+            "strokeColor": "#0f172a"
+            }},
+            "smooth": {{
+            "enabled": true,
+            "type": "curvedCW",
+            "roundness": 0.2
+            }}
+        }},
+        "physics": {{
+            "enabled": {str(physics_enabled).lower()},
+            "forceAtlas2Based": {{
+            "gravitationalConstant": -100,
+            "centralGravity": 0.01,
+            "springLength": {spring_length},
+            "springConstant": 0.08
+            }},
+            "solver": "forceAtlas2Based"
+        }}
+        }}
+        """
+
+def show_network_html(html_data, height):
+    """
+    Tampilkan HTML vis.js dalam iframe; satu-satunya tempat app merender HTML mentah.
+    components.html sudah deprecated (dihapus setelah 2026-06-01): pakai st.iframe,
+    fallback ke components.html hanya untuk Streamlit lama yang belum punya st.iframe.
+    """
+    if hasattr(st, "iframe"):
+        return st.iframe(html_data, height=height)
+    import streamlit.components.v1 as components
+    return components.html(html_data, height=height, scrolling=True)
 
 # =====================
 # CONFIG & LAYOUT
@@ -127,6 +491,14 @@ st.set_page_config(layout="wide", page_title="Financial Flow Network")
 st.sidebar.title("🚀 Control Panel")
 menu_utama = st.sidebar.selectbox("Pilih Menu", ["Analisis Network", "Folder Manager"])
 
+# Profil per tahap hanya untuk rerun ini; tahap di dalam fungsi ber-cache hanya
+# tercatat saat cache miss (cache hit memang tidak menjalankan tahap apa pun)
+profiler = None
+if st.sidebar.checkbox("🐞 Mode Debug (Profiling)", value=False, help="Catat waktu & memori tiap tahap pipeline pada rerun ini"):
+    track_memory = st.sidebar.checkbox("Lacak Memori (lebih lambat)", value=False, help="tracemalloc memperlambat alokasi Python selama aktif")
+    profiler = Profiler(track_memory=track_memory)
+set_active(profiler)
+
 # ==========================================
 # MENU 1: MINIO MANAGER (LOGIN & UPLOAD)
 # ==========================================
@@ -142,16 +514,18 @@ if menu_utama == "Folder Manager":
         if st.button("➕ Create Folder"):
             if new_bucket:
                 s3_client.create_bucket(Bucket=new_bucket.lower().replace(" ", "-"))
+                invalidate_listings()
                 st.success(f"Folder '{new_bucket}' dibuat!")
                 st.rerun()
 
     with col2:
         # List semua bucket untuk opsi hapus
-        buckets = [b['Name'] for b in s3_client.list_buckets()['Buckets']]
+        buckets = list_bucket_names()
         bucket_to_delete = st.selectbox("Pilih Folder untuk Dihapus", ["---"] + buckets)
         if st.button("🗑️ Delete Folder") and bucket_to_delete != "---":
             try:
                 s3_client.delete_bucket(Bucket=bucket_to_delete)
+                invalidate_listings()
                 st.warning(f"Folder '{bucket_to_delete}' dihapus!")
                 st.rerun()
             except Exception as e:
@@ -171,19 +545,29 @@ if menu_utama == "Folder Manager":
                 st.success("Berhasil!")
                 st.rerun()
 
-    # List dan Delete File
-    files = get_minio_file_list(target_bucket)
+    # List dan Delete File (hanya metadata; isi file diambil saat benar-benar diunduh)
+    files = list_file_metadata(target_bucket)
     if files:
         st.subheader(f"Daftar File di '{target_bucket}'")
-        for f in files:
+        page_size = 50
+        n_pages = (len(files) - 1) // page_size + 1
+        page = st.number_input(f"Halaman (dari {n_pages})", min_value=1, max_value=n_pages, value=1) if n_pages > 1 else 1
+        for meta in files[(page - 1) * page_size:page * page_size]:
+            f = meta["Key"]
             c1, c2, c3 = st.columns([3, 1, 1])
-            c1.text(f"📄 {f}")
+            c1.text(f"📄 {f}  ·  {format_bytes(meta['Size'])}  ·  {meta['LastModified']:%Y-%m-%d %H:%M}")
             # Tombol Download
-            obj = s3_client.get_object(Bucket=target_bucket, Key=f)
-            c2.download_button("Download", data=obj['Body'].read(), file_name=f, key=f"dl_{f}", use_container_width=True)
+            if presign_client is not None:
+                c2.link_button("Download", presigned_url(presign_client, target_bucket, f), width="stretch")
+            else:
+                # Isi file baru diambil dari MinIO saat tombol diklik (callable), bukan di tiap rerun
+                c2.download_button("Download", data=lambda key=f: read_object(s3_client, target_bucket, key),
+                                   file_name=os.path.basename(f), key=f"dl_{f}", width="stretch")
             # Tombol Delete
-            if c3.button("🗑️ Hapus", key=f"del_{f}", use_container_width=True, help=f"Hapus permanen {f}"):
+            if c3.button("🗑️ Hapus", key=f"del_{f}", width="stretch", help=f"Hapus permanen {f}"):
                 s3_client.delete_object(Bucket=target_bucket, Key=f)
+                delete_cached(s3_client, target_bucket, f)
+                invalidate_listings()
                 st.warning(f"File {f} terhapus!")
                 st.rerun()
     else:
@@ -208,6 +592,7 @@ with st.sidebar.expander("🆕 Create New Project", expanded=False):
         if new_bucket_name:
             try:
                 s3_client.create_bucket(Bucket=new_bucket_name.lower().replace(" ", "-"))
+                invalidate_listings()
                 st.success(f"Folder '{new_bucket_name}' berhasil dibuat!")
                 st.rerun()
             except Exception as e:
@@ -220,8 +605,7 @@ st.sidebar.divider()
 # 2. DAFTAR BUCKET (NAVIGASI UTAMA)
 st.sidebar.subheader("🗄️ Pilih Folder (Create folder baru jika ingin memisahkan data source)")
 try:
-    response = s3_client.list_buckets()
-    all_buckets = [b['Name'] for b in response['Buckets']]
+    all_buckets = list_bucket_names()
     
     # Pilih bucket (default ke 'data-sources')
     default_idx = all_buckets.index("data-sources") if "data-sources" in all_buckets else 0
@@ -239,15 +623,80 @@ try:
     st.sidebar.subheader(f"📂 File di '{selected_bucket}'")
     file_list = get_minio_file_list(selected_bucket)
 
-    if file_list:
+    analysis_mode = st.sidebar.radio("Mode Analisis", ["Satu File", "Seluruh Folder"], horizontal=True) if file_list else "Satu File"
+
+    if file_list and analysis_mode == "Seluruh Folder":
+        st.sidebar.caption(f"{len(file_list)} file akan digabung menjadi satu graph.")
+        if st.sidebar.button("📊 Proses Seluruh Folder"):
+            source_objects = list_source_files(s3_client, selected_bucket)
+            folder_etag = bucket_fingerprint(source_objects)
+            # Gabungan folder di-cache per fingerprint: selama isi folder sama, tidak diunduh ulang
+            cached_folder = get_bucket_cache().get((selected_bucket, folder_etag))
+            if cached_folder is None:
+                progress = st.sidebar.progress(0.0, text="Memuat file...")
+                def report_progress(done, total, key):
+                    progress.progress(done / total, text=f"{done}/{total} file: {key}")
+                # File diunduh & di-parse paralel; cache Parquet per file tetap dipakai
+                with stage("load folder", files=len(source_objects)):
+                    loaded_df, load_errors = load_bucket(s3_client, selected_bucket, source_objects, on_progress=report_progress)
+                folder_index = None
+                if not loaded_df.empty:
+                    # Entitas bernama sama di file berbeda menjadi satu node
+                    with stage("entity index", rows=len(loaded_df)):
+                        folder_index = EntityIndex.from_frame(loaded_df)
+                    get_bucket_cache().put((selected_bucket, folder_etag), (loaded_df, load_errors, folder_index))
+            else:
+                loaded_df, load_errors, folder_index = cached_folder
+            for key, message in load_errors.items():
+                st.sidebar.warning(f"Gagal memuat '{key}': {message}")
+            if not loaded_df.empty:
+                st.session_state['df'] = loaded_df
+                st.session_state['entity_index'] = folder_index
+                st.session_state['current_file'] = f"{selected_bucket}/* ({loaded_df['SUMBER FILE'].nunique()} file)"
+                st.session_state['current_etag'] = folder_etag
+                st.session_state['current_bucket'] = selected_bucket
+                st.success(f"{len(loaded_df):,} transaksi dari folder '{selected_bucket}' siap!")
+            else:
+                st.error("Tidak ada file yang terbaca di folder ini.")
+    elif file_list:
         selected_file = st.sidebar.selectbox("Pilih file untuk dianalisis", file_list)
+        # Mulai memuat file terpilih di background; klik "Proses" tinggal mengambil hasilnya
+        selected_meta = next(m for m in list_file_metadata(selected_bucket) if m["Key"] == selected_file)
+        session_key = st.session_state.setdefault('session_key', uuid.uuid4().hex)
+        # Prefetch hanya setelah user benar-benar mengganti pilihan, bukan untuk file default
+        # yang terpilih otomatis saat halaman dibuka (tiap session baru akan ikut meng-ingest)
+        selection = (selected_bucket, selected_file)
+        previous_selection = st.session_state.get('prefetch_selection')
+        st.session_state['prefetch_selection'] = selection
+        if (previous_selection is not None and previous_selection != selection
+                and st.session_state.get('current_etag') != selected_meta["ETag"]):
+            get_prefetcher().submit(session_key, (selected_bucket, selected_file, selected_meta["ETag"]),
+                                    load_cleaned, s3_client, selected_bucket, selected_file, selected_meta["ETag"])
         
         if st.sidebar.button("📊 Proses Data Ini"):
-            loaded_df = load_data_from_minio(selected_bucket, selected_file)
+            file_etag = get_object_etag(selected_bucket, selected_file)
+            with stage("load file", key=selected_file):
+                loaded_df = load_data_from_minio(selected_bucket, selected_file, file_etag, _session=session_key)
+            # Prefetch yang tidak terpakai (mis. hasil sudah ada di cache) tidak perlu ditahan
+            get_prefetcher().discard(session_key)
             if not loaded_df.empty:
                 # Simpan ke session_state untuk mencegah NameError
-                st.session_state['df'] = clean_financial_data(loaded_df)
+                st.session_state['df'] = loaded_df
+                # Kamus entitas -> id int32 dibuat sekali per file; jika file yang sama hanya
+                # bertambah baris sejak diproses terakhir, cukup baris baru yang di-encode
+                prev_rows = None
+                if (st.session_state.get('current_file') == selected_file and 'entity_index' in st.session_state
+                        and st.session_state.get('current_etag') != file_etag):
+                    prev_rows = dict(loaded_df.attrs.get("sna_history", [])).get(st.session_state['current_etag'])
+                with stage("entity index", rows=len(loaded_df)):
+                    if prev_rows is not None and prev_rows <= len(loaded_df):
+                        st.session_state['entity_index'] = st.session_state['entity_index'].extend(
+                            loaded_df.iloc[prev_rows:], base_etag=st.session_state['current_etag'])
+                    else:
+                        st.session_state['entity_index'] = EntityIndex.from_frame(loaded_df)
                 st.session_state['current_file'] = selected_file
+                st.session_state['current_etag'] = file_etag
+                st.session_state['current_bucket'] = selected_bucket
                 st.success(f"Data '{selected_file}' siap!")
             else:
                 st.error("Isi file tidak terbaca.")
@@ -263,32 +712,69 @@ except Exception as e:
 # Pastikan visualisasi hanya berjalan jika 'df' sudah ada di session_state
 if 'df' in st.session_state:
     df = st.session_state['df']
+    entity_index = st.session_state['entity_index']
     st.info(f"📋 Menganalisis File: **{st.session_state['current_file']}**")
 
     # Contoh penggunaan data agar tidak NameError
     st.write("### Preview Data Terpilih")
     st.dataframe(df.head())
+    file_etag = st.session_state['current_etag']
 
-    all_entities = sorted(list(set(df["PEMILIK REKENING"].unique()) | set(df["NAMA LAWAN"].unique())))
+    # =====================
+    # RESOLUSI ENTITAS
+    # =====================
+    st.sidebar.header("🧬 Resolusi Entitas")
+    # Mati secara default: penggabungan mengubah graph, jadi harus dipilih sadar oleh analis
+    entity_map = {}
+    if st.sidebar.checkbox("Gabungkan Entitas yang Sama", value=False, help="Nama yang hanya beda tanda baca/spasi, atau memakai rekening yang sama, menjadi satu node. Jika ada nama yang digabung, file yang bertambah baris diproses ulang penuh (tidak inkremental)."):
+        by_account = st.sidebar.checkbox("Cocokkan BANK + NO REK", value=False, help="Nama berbeda yang memakai rekening yang sama digabung; rekening bersama/e-wallet bisa menggabungkan entitas yang sebenarnya berbeda")
+        fuzzy_threshold = None
+        if st.sidebar.checkbox("Cocokkan Nama Mirip (fuzzy)", value=False):
+            fuzzy_threshold = st.sidebar.slider("Ambang Kemiripan Nama", 0.6, 1.0, 0.85, 0.05)
+        df, resolved_index, entity_map = get_resolved_data(file_etag, by_account, fuzzy_threshold,
+                                                           st.session_state.get('current_bucket'), df)
+        if entity_map:
+            entity_index = resolved_index
+            # Graph hasil resolusi di-cache terpisah dari graph nama mentah
+            file_etag = f"{file_etag}|er-{map_fingerprint(file_etag, by_account, fuzzy_threshold)[:12]}"
+            with st.expander(f"🧬 {len(entity_map):,} nama digabung ke entitas lain"):
+                st.dataframe(merge_table(entity_map), width="stretch")
+
+    all_entities = entity_index.sorted_names()
     search_id = st.sidebar.selectbox("Pilih Account ID", [""] + all_entities)
     min_value = st.sidebar.number_input("Minimum Transaction Value", min_value=0, value=10_000_000)
 
-    # 1. FILTER DATA (Sesuai input user)
-    df_filtered = df[df["MUTASI"] >= min_value].copy()
-    if search_id:
-        df_filtered = df_filtered[(df_filtered["PEMILIK REKENING"] == search_id) | (df_filtered["NAMA LAWAN"] == search_id)]
+    # =====================
+    # RENTANG WAKTU & PLAYBACK
+    # =====================
+    st.sidebar.header("🕒 Rentang Waktu")
+    window = None
+    playback = None
+    if st.sidebar.checkbox("Filter Rentang Waktu", value=False, help="Graph hanya berisi transaksi di rentang tanggal terpilih"):
+        time_freq = TIME_BUCKETS[st.sidebar.selectbox("Granularitas", list(TIME_BUCKETS))]
+        temporal_index = get_temporal_index(file_etag, min_value, time_freq, df, entity_index)
+        time_labels = temporal_index.labels()
+        if time_labels:
+            label_pos = {label: i for i, label in enumerate(time_labels)}
+            if len(time_labels) > 1:
+                time_start, time_end = st.sidebar.select_slider("Rentang", options=time_labels,
+                                                                value=(time_labels[0], time_labels[-1]))
+            else:
+                time_start = time_end = time_labels[0]
+            window = (time_freq, label_pos[time_start], label_pos[time_end] + 1)
+            if temporal_index.is_empty(*window[1:]):
+                st.sidebar.caption("Tidak ada transaksi di rentang terpilih; graph kosong.")
+            if st.sidebar.checkbox("Mode Playback", value=False, help="Animasikan graph per bucket waktu di rentang terpilih"):
+                playback_delay = st.sidebar.slider("Jeda per Frame (detik)", 0.2, 5.0, 1.0, 0.1)
+                playback_cumulative = st.sidebar.checkbox("Kumulatif", value=False, help="Setiap frame berisi transaksi sejak awal rentang")
+                playback = (playback_delay, playback_cumulative)
+        else:
+            st.sidebar.caption("Tidak ada transaksi bertanggal di atas Minimum Transaction Value.")
 
     # =====================
     # 2. TARO DI SINI (AGREGASI)
     # =====================
-    df_grouped = df_filtered.groupby(["PEMILIK REKENING", "NAMA LAWAN"]).agg({
-        "MUTASI": "sum",
-        "TGL/TRANS": "count" 
-    }).reset_index()
-    df_grouped.rename(columns={"TGL/TRANS": "FREKUENSI"}, inplace=True)
-    # TAMBAHKAN BARIS INI:
-    # Ini penting untuk menentukan warna node (Biru untuk pengirim)
-    node_sums = df_grouped.groupby("PEMILIK REKENING")["MUTASI"].sum().to_dict()
+    df_grouped, node_sums, potential_targets = get_grouped_edges(file_etag, min_value, window, search_id, df, entity_index)
 
     # ==========================================
     # 2. FILTER TARGET & PECAH TRANSAKSI
@@ -299,47 +785,55 @@ if 'df' in st.session_state:
 
     if search_id:
         st.sidebar.markdown("---")
-        # Ambil daftar lawan transaksi khusus untuk ID yang dicari
-        potential_targets = sorted(list(set(
-            df_grouped[df_grouped["PEMILIK REKENING"] == search_id]["NAMA LAWAN"].unique()
-        ) | set(
-            df_grouped[df_grouped["NAMA LAWAN"] == search_id]["PEMILIK REKENING"].unique()
-        )))
-        
         selected_target = st.sidebar.selectbox("Filter Lawan Transaksi Specific", ["Semua"] + potential_targets)
         break_down = st.sidebar.checkbox("Pecah Transaksi (Tampilkan Detail)", value=False)
 
-    # --- LOGIKA PENENTUAN DATA YANG DIGAMBAR (df_plot) ---
-    if search_id:
-        if selected_target != "Semua":
-            if break_down:
-                # MODE PECAH: Ambil data mentah per baris dari df_filtered
-                df_plot = df_filtered[
-                    ((df_filtered["PEMILIK REKENING"] == search_id) & (df_filtered["NAMA LAWAN"] == selected_target)) |
-                    ((df_filtered["PEMILIK REKENING"] == selected_target) & (df_filtered["NAMA LAWAN"] == search_id))
-                ].copy()
-                df_plot["FREKUENSI"] = 1 # Set 1 karena sudah dipecah per baris
-            else:
-                # MODE FILTER TARGET (Agregasi): Ambil dari df_grouped
-                df_plot = df_grouped[
-                    ((df_grouped["PEMILIK REKENING"] == search_id) & (df_grouped["NAMA LAWAN"] == selected_target)) |
-                    ((df_grouped["PEMILIK REKENING"] == selected_target) & (df_grouped["NAMA LAWAN"] == search_id))
-                ]
-        else:
-            # Tampilkan semua lawan transaksi untuk Account ID tersebut
-            df_plot = df_grouped[(df_grouped["PEMILIK REKENING"] == search_id) | (df_grouped["NAMA LAWAN"] == search_id)]
-    else:
-        # Jika tidak ada yang dicari, tampilkan semua (Global View)
-        df_plot = df_grouped
+    # ==========================================
+    # LEVEL OF DETAIL (GLOBAL VIEW)
+    # ==========================================
+    lod = None
+    if not search_id:
+        st.sidebar.header("🔭 Level of Detail")
+        if st.sidebar.checkbox("Batasi Render Global View", value=True, help="Gabungkan entitas kecil menjadi cluster agar browser tetap responsif"):
+            max_nodes = st.sidebar.number_input("Maks. Node", min_value=20, max_value=20_000, value=300, step=50)
+            max_edges = st.sidebar.number_input("Maks. Edge", min_value=20, max_value=50_000, value=1_000, step=100)
+            cluster_by = st.sidebar.selectbox("Cluster Berdasarkan", ["Bank", "Komunitas"])
+            lod_groups = get_lod_groups(file_etag, min_value, window, cluster_by, df, entity_index)
+            expanded = st.sidebar.multiselect("Expand Cluster", sorted(set(lod_groups.tolist()) | {"LAINNYA"}))
+            lod = (int(max_nodes), int(max_edges), cluster_by, tuple(sorted(expanded)))
+
+    # =====================
+    # METRIK SNA (UKURAN & WARNA NODE)
+    # =====================
+    st.sidebar.header("📈 Metrik SNA")
+    size_options = {"Default": None, "PageRank": "PAGERANK", "Betweenness": "BETWEENNESS",
+                    "Strength Keluar": "STRENGTH KELUAR", "Strength Masuk": "STRENGTH MASUK"}
+    color_options = {"Default (Pengirim/Penerima)": None, "Komunitas": "KOMUNITAS",
+                     "Komponen Kuat (SCC)": "SCC", "Komponen": "KOMPONEN"}
+    size_by = size_options[st.sidebar.selectbox("Ukuran Node Berdasarkan", list(size_options))]
+    color_by = color_options[st.sidebar.selectbox("Warna Node Berdasarkan", list(color_options))]
+
+    # =====================
+    # DETEKSI SIKLUS / ROUND-TRIP
+    # =====================
+    st.sidebar.header("🔁 Deteksi Siklus")
+    cycle_params = None
+    if st.sidebar.checkbox("Cari Siklus (A → B → … → A)", value=False, help="Aliran dana yang kembali ke akun awal dalam jendela waktu tertentu"):
+        cycle_max_len = st.sidebar.slider("Maks. Panjang Siklus", 2, 6, 4)
+        cycle_window = st.sidebar.number_input("Jendela Waktu (hari)", min_value=0, max_value=3650, value=7)
+        cycle_tolerance = st.sidebar.slider("Toleransi Nominal (%)", 0, 100, 10, 5)
+        cycle_params = (cycle_max_len, int(cycle_window), cycle_tolerance / 100)
 
     # =====================
     # SIDEBAR: PHYSICS (RESPONSIVE)
     # =====================
     st.sidebar.header("🎨 Visual Layout")
     layout_type = st.sidebar.selectbox("Jenis Visual", ["Force Directed", "Hierarchical (Top-Down)", "Hierarchical (Left-Right)"])
+    bank_styling = st.sidebar.checkbox("Logo & Warna Bank", value=True, help="Gaya node menurut bank dominan entitas (config/bank_nodes.yaml). Jika Warna Node Berdasarkan dipilih, bank hanya memberi logo dan warna tetap dari metrik.")
 
     st.sidebar.subheader("🧲 Physics Configuration")
-    physics_enabled = st.sidebar.checkbox("Enable Physics", value=True)
+    server_layout = st.sidebar.checkbox("Hitung Layout di Server", value=True, help="Posisi node dihitung sekali di server dan di-cache; physics di browser dimatikan")
+    physics_enabled = st.sidebar.checkbox("Enable Physics", value=True, disabled=server_layout)
     central_gravity = st.sidebar.slider("Central Gravity", 0.0, 5.0, 0.5, 0.1)
     spring_length = st.sidebar.slider("Spring Length", 50, 1000, 250, 10)
     node_distance = st.sidebar.slider("Node Distance", 50, 1000, 200, 10)
@@ -347,171 +841,179 @@ if 'df' in st.session_state:
     # =====================
     # BUILD PYVIS
     # =====================
-    # Key unik berdasarkan konfigurasi untuk memaksa refresh komponen
-    net_id = f"graph_{layout_type}_{physics_enabled}_{central_gravity}_{spring_length}_{node_distance}"
-
-    net = Network(height="1000px", width="100%", bgcolor="#ffffff", font_color="#333333", directed=True)
-
     try:
-        if "Hierarchical" in layout_type:
-            direction = "UD" if "Top-Down" in layout_type else "LR"
-            net.set_options(f"""
-            {{
-            "edges": {{
-                "font": {{ "align": "top", "size": 12, "strokeWidth": 3, "strokeColor": "#0f172a" }},
-                "smooth": {{ "enabled": true, "type": "curvedCW", "roundness": 0.15 }}
-            }},
-            "layout": {{
-                "hierarchical": {{
-                "enabled": true,
-                "direction": "{direction}",
-                "sortMethod": "hubsize",
-                "levelSeparation": 450,
-                "nodeSpacing": 400
-                }}
-            }},
-            "physics": {{
-                "enabled": true,
-                "hierarchicalRepulsion": {{ "nodeDistance": 400, "centralGravity": 0.0 }},
-                "solver": "hierarchicalRepulsion"
-            }}
-            }}
-            """)
-        else:
-            net.set_options(f"""
-            {{
-            "edges": {{
-                "font": {{
-                "align": "top",
-                "size": 11,
-                "strokeWidth": 3,
-                "strokeColor": "#0f172a"
-                }},
-                "smooth": {{
-                "enabled": true,
-                "type": "curvedCW",
-                "roundness": 0.2
-                }}
-            }},
-            "physics": {{
-                "enabled": {str(physics_enabled).lower()},
-                "forceAtlas2Based": {{
-                "gravitationalConstant": -100,
-                "centralGravity": 0.01,
-                "springLength": {spring_length},
-                "springConstant": 0.08
-                }},
-                "solver": "forceAtlas2Based"
-            }}
-            }}
-            """)
-            
-        added_nodes = set()
-
-        # Gunakan df_grouped hasil agregasi
-        for i, (_, row) in enumerate(df_plot.iterrows()):
-            src, tgt = str(row["PEMILIK REKENING"]), str(row["NAMA LAWAN"])
-            total_val = row["MUTASI"]  # Kita gunakan nama total_val agar jelas ini hasil jumlah
-            freq = row.get("FREKUENSI", 1)
-            
-            # 1. Tambahkan/Cek Nodes
-            for nid in [src, tgt]:
-                if nid not in added_nodes:
-                    is_focus = (nid == search_id)
-                    # Logika warna: Biru jika dia pengirim (ada di node_sums), Hijau jika penerima murni
-                    net.add_node(
-                        nid, 
-                        label=nid, 
-                        color="#dc2626" if is_focus else ("#2563eb" if nid in node_sums else "#16a34a"),
-                        size=30 if is_focus else 15,
-                        shape="dot",
-                        font={'color': '#333333', 'size': 14, 'strokeWidth': 2, 'strokeColor': '#ffffff'},
-                        title=f"Entity: {nid}"
-                    )
-                    added_nodes.add(nid)
+        vis_options = build_vis_options(layout_type, physics_enabled, central_gravity, spring_length, server_layout)
+        # Node & edge diambil dari cache; hanya opsi visual yang dibuat ulang
+        nodes_json, edges_json = get_network_data(file_etag, min_value, window, search_id, selected_target, break_down, lod, df, entity_index)
+        if server_layout:
+            nodes_json = get_positioned_nodes(file_etag, min_value, window, search_id, selected_target, break_down, lod,
+                                              layout_type, spring_length, node_distance, central_gravity, df, entity_index)
+        graph_style = (cycle_params, size_by, color_by, bank_styling)
+        nodes_json, edges_json, images_json = style_network(nodes_json, edges_json, file_etag, min_value, graph_style,
+                                                            df, entity_index)
 
-            # 2. Tambahkan Edge (Gunakan total_val untuk value)
-            label_text = f"{format_miliar(total_val)}"
-            if not break_down and freq > 1:
-                label_text += f" | {freq}x transaksi"
-            
-            # Jika mode pecah, berikan roundness yang berbeda untuk setiap garis agar tidak tumpang tindih
-            curve_type = "curvedCW" if src <= tgt else "curvedCCW"
-
-
-            base_roundness = 0.15
-            if break_down:
-                # Menambah lengkungan setiap garis berdasarkan urutan transaksi
-                edge_roundness = base_roundness + (i * 0.2) 
-            else:
-                edge_roundness = base_roundness
-            
-            # Menentukan warna garis berdasarkan arah (Logika yang Anda minta sebelumnya)
-            if search_id:
-                if src == search_id: edge_color = "#FF3366" 
-                elif tgt == search_id: edge_color = "#22FF88"
-                else: edge_color = "44CCFF"
-            else:
-                edge_color = "rgba(200, 200, 200, 0.5)"
-
-            # Perhatikan: value=total_val (Bukan value=val)
-            net.add_edge(
-                src, tgt, 
-                value=total_val, 
-                label=label_text, 
-                color=edge_color,
-                width=2 if break_down else max(2, min(total_val / 100_000_000, 15)),
-                arrows="to",
-                font={'size': 10, 'color': '#333333', 'strokeWidth': 2, 'strokeColor': '#ffffff'}, # Label putih pinggirannya agar terbaca
-                smooth={'enabled': True, 'type': curve_type, 'roundness': edge_roundness}
-            )
-
-        # GANTI BAGIAN save_graph LAMA DENGAN INI:
         try:
-            # Jangan gunakan path fisik jika memungkinkan, gunakan temporary path
-            tmp_path = "link_analysis_live.html"
-            net.save_graph(tmp_path)
-            
-            with open(tmp_path, 'r', encoding='utf-8') as f:
-                html_data = f.read()
-            
+            # HTML dirakit di memori per session: tidak ada file bersama yang bisa saling timpa
+            with stage("html render") as info:
+                html_data = render_network_html(nodes_json, edges_json, vis_options, height="1000px", images_json=images_json)
+                info["bytes"] = len(html_data.encode("utf-8"))
+
+            if entity_map:
+                st.caption(f"🧬 Resolusi entitas aktif: {len(entity_map):,} nama digabung ke "
+                           f"{len(set(entity_map.values())):,} entitas (lihat tabel penggabungan di atas).")
+            if playback:
+                play = st.button("▶️ Putar Playback")
+                frame_caption = st.empty()
+                graph_box = st.empty()
+            else:
+                play = False
+                graph_box = st.container()
             # Tampilkan menggunakan komponen streamlit
-            components.html(html_data, height=1200, scrolling=True)
+            with graph_box:
+                show_network_html(html_data, height=1200)
+
+            if play:
+                # Posisi node diambil dari layout rentang penuh agar tidak berpindah antar frame
+                pinned = {node["id"]: (node["x"], node["y"]) for node in json.loads(
+                    get_positioned_nodes(file_etag, min_value, window, search_id, selected_target, break_down, lod,
+                                         layout_type, spring_length, node_distance, central_gravity, df, entity_index))}
+                frame_options = build_vis_options(layout_type, False, central_gravity, spring_length, server_layout=True)
+                playback_delay, playback_cumulative = playback
+                time_freq, time_b0, time_b1 = window
+                for b in range(time_b0, time_b1):
+                    frame = (time_freq, time_b0 if playback_cumulative else b, b + 1)
+                    frame_label = f"⏱️ {time_labels[b]} ({b - time_b0 + 1}/{time_b1 - time_b0})"
+                    # Timeline memuat bucket kosong (hari/minggu tanpa transaksi): frame sebelumnya dibiarkan
+                    if temporal_index.is_empty(*frame[1:]):
+                        frame_caption.caption(f"{frame_label} — tidak ada transaksi")
+                        time.sleep(playback_delay)
+                        continue
+                    # Tiap frame hanya selisih prefix di indeks temporal + elemen vis yang di-cache
+                    frame_nodes, frame_edges = get_network_data(file_etag, min_value, frame, search_id, selected_target,
+                                                                break_down, lod, df, entity_index)
+                    frame_nodes, frame_edges, frame_images = style_network(frame_nodes, frame_edges, file_etag, min_value,
+                                                                           graph_style, df, entity_index)
+                    frame_nodes = json.loads(frame_nodes)
+                    for node in frame_nodes:
+                        if node["id"] in pinned:
+                            node["x"], node["y"] = pinned[node["id"]]
+                    frame_caption.caption(frame_label)
+                    with graph_box.container():
+                        show_network_html(render_network_html(json.dumps(frame_nodes), frame_edges, frame_options,
+                                                              height="1000px", images_json=frame_images),
+                                          height=1200)
+                    time.sleep(playback_delay)
+
+            clusters = get_plot_edges(file_etag, min_value, window, search_id, selected_target, break_down, lod, df, entity_index)[1]
+            if not clusters.empty:
+                # Cluster yang di-expand tapi masih punya supernode: anggotanya melebihi Maks. Node
+                truncated = [g for g in (lod[3] if lod else ()) if cluster_id(g) in set(clusters["CLUSTER"])]
+                if truncated:
+                    st.warning(f"Anggota cluster yang di-expand melebihi Maks. Node; anggota bervolume kecil dari "
+                               f"{', '.join(truncated)} tetap digabung sebagai supernode.")
+                with st.expander(f"🔭 {len(clusters)} cluster ditampilkan sebagai supernode (◆)"):
+                    st.caption("Pilih cluster di sidebar 'Expand Cluster' untuk menampilkan anggotanya satu per satu.")
+                    st.dataframe(clusters, width="stretch")
+
+            if cycle_params:
+                cycle_summary, cycle_detail, cycle_truncated = get_cycles(file_etag, min_value, *cycle_params, df, entity_index)
+                with st.expander(f"🔁 {len(cycle_summary):,} siklus terdeteksi", expanded=not cycle_summary.empty):
+                    if cycle_truncated:
+                        st.warning("Hasil dibatasi; persempit jendela waktu/toleransi atau naikkan Minimum Transaction Value.")
+                    st.caption("Edge yang termasuk siklus ditandai oranye di graph.")
+                    st.dataframe(cycle_summary, width="stretch")
+                    st.download_button("⬇️ Export Detail Siklus (CSV)", cycle_detail.to_csv(index=False, sep=";"),
+                                       file_name="siklus.csv", mime="text/csv")
+
         except Exception as e:
             st.error(f"Gagal generate grafik: {e}")
 
     except Exception as e:
         # Pesan ini hanya muncul jika benar-benar ada error di data, bukan karena variabel hilang
         st.warning(f"Grafik tidak dapat dimuat: {e}")
+
+    # ==========================================
+    # METRIK JARINGAN
+    # ==========================================
+    # Dihitung dari graph penuh (bukan graph yang digambar), jadi tetap tampil walau render gagal.
+    # Isi expander tetap dijalankan walau tertutup, jadi perhitungan berat hanya dimulai jika
+    # diminta (checkbox) atau memang sudah dibutuhkan untuk ukuran/warna node.
+    with st.expander("📈 Metrik Jaringan"):
+        show_metrics = bool(size_by or color_by) or st.checkbox(
+            "Hitung Metrik Jaringan", value=False,
+            help="PageRank, betweenness, SCC & komunitas atas graph penuh; bisa lama untuk graph besar")
+        if show_metrics:
+            try:
+                metrics = get_node_metrics(file_etag, min_value, df, entity_index)
+                if search_id and search_id in metrics.index:
+                    st.dataframe(metrics.loc[[search_id]], width="stretch")
+                st.caption(f"{len(metrics):,} entitas, diurutkan menurut PageRank. "
+                           "KOMPONEN/SCC/KOMUNITAS: nomor grup, 1 = grup terbesar.")
+                st.dataframe(metrics.sort_values("PAGERANK", ascending=False).head(200), width="stretch")
+            except Exception as e:
+                st.error(f"Gagal menghitung metrik jaringan: {e}")
+
+    # ==========================================
+    # MONEY TRAIL TRACING (MULTI-HOP)
+    # ==========================================
+    with st.expander("🔎 Money Trail Tracing", expanded=False):
+        try:
+            t1, t2, t3, t4 = st.columns([1, 2, 1, 1])
+            codes = get_layer_codes(file_etag, df)
+            start_modes = ["Akun"] + (["Transaksi (NO)"] if "NO" in df.columns else []) + (["Kode Layer"] if codes else [])
+            start_mode = t1.selectbox("Mulai Dari", start_modes)
+            if start_mode == "Akun":
+                start_value = t2.selectbox("Akun Awal", all_entities, index=all_entities.index(search_id) if search_id else 0)
+            elif start_mode == "Transaksi (NO)":
+                start_value = t2.number_input("Nomor Transaksi (NO)", min_value=0, value=1, step=1)
+                if SOURCE_COLUMN in df.columns:
+                    # Mode seluruh folder: NO hanya unik di dalam satu file
+                    start_value = (t2.selectbox("File", df[SOURCE_COLUMN].cat.categories.tolist()), start_value)
+            else:
+                start_value = t2.selectbox("Kode Layer", codes)
+            direction = t3.radio("Arah", ["forward", "backward"], format_func=lambda d: "Maju (ke mana)" if d == "forward" else "Mundur (dari mana)")
+            max_hops = t4.slider("Maks. Hop", 1, 10, 5)
+
+            if start_value != "":
+                trail = get_money_trail(file_etag, start_mode, start_value, direction, max_hops, 20_000, df, entity_index)
+                if trail.empty:
+                    st.info("Tidak ada aliran dana yang dapat ditelusuri dari titik awal ini.")
+                else:
+                    st.caption(f"{len(trail):,} transaksi dalam {int(trail['HOP'].max())} hop. "
+                               "ALOKASI = porsi dana awal yang diteruskan (proporsional, urut waktu).")
+                    # Graph trail: satu edge per pasangan, nilai = total dana teralokasi
+                    trail_plot = trail.groupby(["PEMILIK REKENING", "NAMA LAWAN"], sort=False).agg(
+                        MUTASI=("ALOKASI", "sum"), FREKUENSI=("ALOKASI", "size")
+                    ).reset_index().nlargest(500, "MUTASI")
+                    trail_focus = start_value if start_mode == "Akun" else ""
+                    trail_sums = trail_plot.groupby("PEMILIK REKENING")["MUTASI"].sum().to_dict()
+                    trail_nodes, trail_edges = build_vis_elements(trail_plot, trail_focus, trail_sums, False)
+                    trail_layout = "Hierarchical (Left-Right)"
+                    show_network_html(
+                        render_network_html(json.dumps(trail_nodes), json.dumps(trail_edges),
+                                            build_vis_options(trail_layout, True, 0.0, spring_length), height="700px"),
+                        height=750,
+                    )
+                    st.dataframe(trail, width="stretch")
+        except Exception as e:
+            st.error(f"Gagal menelusuri aliran dana: {e}")
     # --- LANJUTKAN KODE SNA / NETWORK ANDA DI SINI ---
     # all_entities = sorted(list(set(df["PEMILIK REKENING"].unique()) | ...))
     # dst...
 else:
     st.info("Silakan pilih bucket dan file dari sidebar, lalu klik 'Proses Data Ini'.")
 
-def format_miliar(val):
-    if abs(val) >= 1_000_000_000:
-        return f"{val / 1_000_000_000:.2f} Miliar"
-    elif abs(val) >= 1_000_000:
-        return f"{val / 1_000_000:.2f} Juta"
-    return f"{val:,.0f}"
-
-
-
-# SAVE AND RENDER
-# path = "link_analysis_live.html"
-# net.save_graph(path)
-
-# # =====================
-# # RENDER DENGAN CONTAINER (SOLUSI FIX)
-# # =====================
-# with open(path, 'r', encoding='utf-8') as f:
-#     html_data = f.read()
-    
-#     # Gunakan container kosong untuk menampung komponen
-#     # Ini akan menggantikan visualisasi lama dengan yang baru setiap kali script rerun
-#     graph_container = st.container()
-#     with graph_container:
-#         components.html(html_data, height=850)
-
+# ==========================================
+# PANEL DEBUG (PROFIL PER TAHAP)
+# ==========================================
+if profiler is not None:
+    with st.expander("🐞 Profil Eksekusi", expanded=True):
+        if profiler.records:
+            st.caption(f"Total {profiler.total_seconds():.3f} s. Tahap dari fungsi ber-cache hanya muncul saat cache miss. "
+                       "Kolom memori & RSS adalah angka seluruh proses, termasuk session lain yang sedang berjalan.")
+            st.dataframe(profiler.to_frame(), width="stretch")
+            st.download_button("⬇️ Unduh Profil (JSON)", profiler.to_json(file=st.session_state.get('current_file')),
+                               file_name="sna_profile.json", mime="application/json")
+        else:
+            st.caption("Tidak ada tahap yang dijalankan pada rerun ini (semua dari cache).")
 
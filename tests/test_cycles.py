@@ -0,0 +1,84 @@
+"""
+Test sna.cycles pada siklus kecil yang diketahui: urutan waktu, jendela waktu,
+toleransi nominal, dan tabel ringkasan/detail.
+
+    python -m pytest tests
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from sna.cycles import cycle_pairs, cycle_tables, find_cycles  # noqa: E402
+from sna.graph_core import EntityIndex  # noqa: E402
+from sna.trace import TraceIndex  # noqa: E402
+
+
+def frame(rows):
+    df = pd.DataFrame(rows, columns=["PEMILIK REKENING", "NAMA LAWAN", "TGL/TRANS", "MUTASI"])
+    df["TGL/TRANS"] = pd.to_datetime(df["TGL/TRANS"])
+    df.insert(0, "NO", np.arange(1, len(df) + 1))
+    return df
+
+
+def triangle(last_amount=98.0):
+    return frame([
+        ("A", "B", "2024-01-01", 100.0),
+        ("B", "C", "2024-01-02", 95.0),
+        ("C", "A", "2024-01-03", last_amount),
+        ("C", "D", "2024-01-02", 95.0),
+    ])
+
+
+def cycles_of(df, **kwargs):
+    index = TraceIndex.build(EntityIndex.from_frame(df), df)
+    cycles, truncated = find_cycles(index, **kwargs)
+    summary, detail = cycle_tables(index, df, cycles)
+    return summary, detail, truncated
+
+
+def test_three_cycle_in_time_order():
+    summary, detail, truncated = cycles_of(triangle(), max_len=4, window_days=7, tolerance=0.1)
+    assert not truncated
+    # Satu siklus, dihitung sekali (bukan tiap rotasinya)
+    assert summary["JALUR"].tolist() == ["A → B → C → A"]
+    assert summary["PANJANG"].tolist() == [3]
+    assert summary["DURASI (HARI)"].tolist() == [2]
+    assert detail["NO"].tolist() == [1, 2, 3]
+    assert cycle_pairs(detail) == {("A", "B"), ("B", "C"), ("C", "A")}
+
+
+def test_three_cycle_out_of_time_order_is_ignored():
+    # Tidak ada rotasi A -> B -> C -> A yang tanggalnya berurutan
+    df = frame([
+        ("A", "B", "2024-01-02", 100.0),
+        ("B", "C", "2024-01-01", 95.0),
+        ("C", "A", "2024-01-03", 98.0),
+    ])
+    summary, _, _ = cycles_of(df, max_len=4, window_days=30, tolerance=0.1)
+    assert summary.empty
+
+
+def test_window_tolerance_and_max_len():
+    assert cycles_of(triangle(), window_days=1, tolerance=0.1)[0].empty
+    assert cycles_of(triangle(last_amount=50.0), window_days=7, tolerance=0.1)[0].empty
+    assert not cycles_of(triangle(last_amount=50.0), window_days=7, tolerance=0.6)[0].empty
+    assert cycles_of(triangle(), max_len=2, window_days=7, tolerance=0.1)[0].empty
+
+
+def test_round_trip_and_max_cycles():
+    df = frame([
+        ("A", "B", "2024-01-01", 100.0),
+        ("B", "A", "2024-01-01", 100.0),
+        ("C", "D", "2024-01-01", 100.0),
+        ("D", "C", "2024-01-02", 100.0),
+    ])
+    summary, _, truncated = cycles_of(df, max_len=3, window_days=7, tolerance=0)
+    assert sorted(summary["JALUR"]) == ["A → B → A", "C → D → C"]
+    assert not truncated
+    summary, _, truncated = cycles_of(df, max_len=3, window_days=7, tolerance=0, max_cycles=1)
+    assert truncated and len(summary) >= 1
@@ -0,0 +1,50 @@
+"""
+Test sna.entity_resolution: penggabungan lewat normalisasi, rekening, dan
+kemiripan nama, serta nama yang kosong setelah normalisasi (tidak digabung).
+
+    python -m pytest tests
+"""
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from sna.entity_resolution import apply_entity_map, normalize_names, resolve_entities  # noqa: E402
+
+
+def frame(owners, banks=None, accounts=None):
+    n = len(owners)
+    return pd.DataFrame({
+        "PEMILIK REKENING": owners,
+        "BANK": banks or ["BCA"] * n,
+        "NO REK": accounts or [None] * n,
+        "NAMA LAWAN": ["KAS BESAR"] * n,
+    })
+
+
+def test_normalized_names_merge():
+    df = frame(["PT. ENERGI TERBARU", "PT ENERGI TERBARU", "P.T. ENERGI  TERBARU", "CV LAIN"])
+    mapping = resolve_entities(df, by_account=False)
+    assert mapping == {"PT. ENERGI TERBARU": "PT ENERGI TERBARU", "P.T. ENERGI  TERBARU": "PT ENERGI TERBARU"}
+    resolved = apply_entity_map(df, mapping)
+    assert resolved["PEMILIK REKENING"].nunique() == 2
+
+
+def test_shared_account_and_fuzzy_names():
+    df = frame(["BUDI SANTOSO", "B SANTOSO", "TOKO MAKMUR JAYA", "TOKO MAKMUR JAYAA"],
+               accounts=["1234567", "1234567", None, None])
+    # Frekuensi sama: nama terpendek menjadi kanonik
+    assert resolve_entities(df, by_account=True) == {"BUDI SANTOSO": "B SANTOSO"}
+    mapping = resolve_entities(df, by_account=False, fuzzy_threshold=0.7)
+    assert mapping == {"TOKO MAKMUR JAYAA": "TOKO MAKMUR JAYA"}
+
+
+def test_blank_normalized_names_stay_separate():
+    names = ["-", "...", "?", "PT", "P.T.", "CV.", "PT ABC"]
+    assert normalize_names(names).tolist()[:3] == ["", "", ""]
+    # Rekening & kemiripan juga tidak boleh menyatukan nama kosong dengan nama lain
+    df = frame(names, accounts=["1234567"] * 3 + ["7654321"] * 3 + [None])
+    assert resolve_entities(df, by_account=True, fuzzy_threshold=0.3) == {}
@@ -0,0 +1,149 @@
+"""
+Test sna.ingest terhadap S3 tiruan moto (perlu `pip install -r requirements-dev.txt`, tidak
+dipakai aplikasi; tanpa MinIO sungguhan): ingest streaming per chunk harus sama
+dengan ingest biasa, dan file yang hanya bertambah baris memakai manifest-nya.
+
+    python -m pytest tests
+"""
+import sys
+from pathlib import Path
+
+import boto3
+import pandas as pd
+import pytest
+from moto import mock_aws
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from sna import ingest  # noqa: E402
+from sna.ingest import (  # noqa: E402
+    ANALYSIS_COLUMNS, cache_key_for, clean_financial_data, load_cleaned, read_manifest, read_statement, stream_ingest,
+)
+
+BUCKET = "sna-test"
+DATA_CSV = BASE_DIR / "dataset" / "data.csv"
+# NO REK / NO REK LAWAN dibaca sebagai angka oleh ingest biasa tetapi string saat streaming
+TEXT_COLUMNS = ["PEMILIK REKENING", "BANK", "NAMA LAWAN", "BANK LAWAN", *[f"LAYER {i}." for i in range(1, 11)]]
+VALUE_COLUMNS = ["NO", "TGL/TRANS", "MUTASI"]
+
+
+@pytest.fixture
+def s3():
+    with mock_aws():
+        client = boto3.client("s3", region_name="us-east-1")
+        client.create_bucket(Bucket=BUCKET)
+        yield client
+
+
+def comparable(df):
+    out = df[VALUE_COLUMNS + TEXT_COLUMNS].copy()
+    for col in TEXT_COLUMNS:
+        out[col] = out[col].astype("string")
+    out["TGL/TRANS"] = out["TGL/TRANS"].astype("datetime64[ns]")
+    return out.reset_index(drop=True)
+
+
+def test_stream_ingest_matches_regular_load(s3, monkeypatch):
+    s3.upload_file(str(DATA_CSV), BUCKET, "regular.csv")
+    s3.upload_file(str(DATA_CSV), BUCKET, "streamed.csv")
+    regular = load_cleaned(s3, BUCKET, "regular.csv")
+
+    # Semua CSV di atas 0 byte lewat jalur streaming, dengan chunk kecil agar ada banyak chunk
+    monkeypatch.setattr(ingest, "STREAMING_THRESHOLD_BYTES", 0)
+    monkeypatch.setattr(ingest, "STREAM_CHUNK_ROWS", 100)
+    streamed = load_cleaned(s3, BUCKET, "streamed.csv")
+
+    assert list(streamed.columns) == ANALYSIS_COLUMNS
+    assert all(isinstance(streamed[c].dtype, pd.CategoricalDtype) for c in TEXT_COLUMNS)
+    pd.testing.assert_frame_equal(comparable(streamed), comparable(regular))
+
+    # Cache Parquet hasil streaming dipakai lagi pada load berikutnya
+    head = s3.head_object(Bucket=BUCKET, Key=cache_key_for("streamed.csv"))
+    assert head["Metadata"]["source-etag"] == s3.head_object(Bucket=BUCKET, Key="streamed.csv")["ETag"].strip('"')
+    pd.testing.assert_frame_equal(comparable(load_cleaned(s3, BUCKET, "streamed.csv")), comparable(regular))
+
+
+def test_stream_ingest_falls_back_to_latin1_after_the_first_chunk(s3):
+    # Byte latin-1 di baris terakhir: utf-8 baru gagal setelah beberapa chunk ditulis
+    content = DATA_CSV.read_bytes().rstrip(b"\n")
+    last = content.rsplit(b"\n", 1)[1].split(b";")
+    last[1] = "PT CAF\xc9".encode("latin-1")
+    content = content.rsplit(b"\n", 1)[0] + b"\n" + b";".join(last) + b"\n"
+    s3.put_object(Bucket=BUCKET, Key="latin1.csv", Body=content)
+
+    df = stream_ingest(s3, BUCKET, "latin1.csv", etag=None, chunksize=100)
+    assert df["PEMILIK REKENING"].iloc[-1] == "PT CAFÉ"
+    assert len(df) == len(load_cleaned(s3, BUCKET, "latin1.csv"))
+
+
+def test_stream_ingest_of_an_empty_file(s3):
+    s3.put_object(Bucket=BUCKET, Key="empty.csv", Body=DATA_CSV.read_bytes().split(b"\n", 1)[0] + b"\n")
+    assert stream_ingest(s3, BUCKET, "empty.csv", etag=None).empty
+
+
+def full_parse(content, key="x.csv"):
+    return clean_financial_data(read_statement(content, key))
+
+
+def test_append_reuses_the_manifest(s3, monkeypatch):
+    content = DATA_CSV.read_bytes()
+    extra = b"".join(content.splitlines(keepends=True)[1:21])
+    s3.put_object(Bucket=BUCKET, Key="grow.csv", Body=content)
+    first = load_cleaned(s3, BUCKET, "grow.csv")
+    manifest = read_manifest(s3, BUCKET, "grow.csv")
+    assert manifest["parts"] == [] and manifest["history"] == [[manifest["etag"], len(first)]]
+
+    # Bagian lama tidak boleh di-download/parse ulang: hanya byte baru lewat Range
+    parsed = []
+    original = ingest.read_statement
+    monkeypatch.setattr(ingest, "read_statement", lambda data, name: parsed.append(len(data)) or original(data, name))
+    s3.put_object(Bucket=BUCKET, Key="grow.csv", Body=content + extra)
+    grown = load_cleaned(s3, BUCKET, "grow.csv")
+    assert parsed and max(parsed) < len(content)
+
+    manifest = read_manifest(s3, BUCKET, "grow.csv")
+    assert manifest["base_etag"] == manifest["history"][0][0]
+    assert len(manifest["parts"]) == 1
+    assert [rows for _, rows in manifest["history"]] == [len(first), len(first) + 20]
+    assert grown.attrs["sna_history"] == manifest["history"]
+    expected = full_parse(content + extra)[ANALYSIS_COLUMNS]
+    pd.testing.assert_frame_equal(comparable(grown), comparable(expected))
+
+
+def test_append_parts_are_compacted(s3, monkeypatch):
+    monkeypatch.setattr(ingest, "MAX_APPEND_PARTS", 1)
+    content = DATA_CSV.read_bytes()
+    lines = content.splitlines(keepends=True)[1:]
+    s3.put_object(Bucket=BUCKET, Key="grow.csv", Body=content)
+    load_cleaned(s3, BUCKET, "grow.csv")
+    for step in (lines[:5], lines[5:10]):
+        content += b"".join(step)
+        s3.put_object(Bucket=BUCKET, Key="grow.csv", Body=content)
+        df = load_cleaned(s3, BUCKET, "grow.csv")
+
+    # Part kedua melewati batas: digabung ke cache utama, part dihapus
+    manifest = read_manifest(s3, BUCKET, "grow.csv")
+    assert manifest["parts"] == [] and manifest["base_etag"] == manifest["etag"]
+    assert len(manifest["history"]) == 3
+    keys = {obj["Key"] for obj in s3.list_objects_v2(Bucket=BUCKET)["Contents"]}
+    assert not any(".part" in key for key in keys)
+    pd.testing.assert_frame_equal(comparable(df), comparable(full_parse(content)[ANALYSIS_COLUMNS]))
+
+
+def test_rewritten_prefix_falls_back_to_full_ingest(s3):
+    content = DATA_CSV.read_bytes()
+    s3.put_object(Bucket=BUCKET, Key="edit.csv", Body=content)
+    load_cleaned(s3, BUCKET, "edit.csv")
+
+    # Baris pertama diedit dan baris baru ditambahkan: bukan append murni
+    edited = content.replace(b"PT MAJU MUNDUR", b"PT MAJU JAYA", 1) + b"".join(content.splitlines(keepends=True)[1:4])
+    s3.put_object(Bucket=BUCKET, Key="edit.csv", Body=edited)
+    df = load_cleaned(s3, BUCKET, "edit.csv")
+
+    manifest = read_manifest(s3, BUCKET, "edit.csv")
+    etag = s3.head_object(Bucket=BUCKET, Key="edit.csv")["ETag"].strip('"')
+    assert manifest["parts"] == [] and manifest["base_etag"] == etag
+    assert manifest["history"] == [[etag, len(df)]]
+    assert df["PEMILIK REKENING"].iloc[0] == "PT MAJU JAYA"
+    pd.testing.assert_frame_equal(comparable(df), comparable(full_parse(edited)[ANALYSIS_COLUMNS]))
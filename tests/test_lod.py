@@ -0,0 +1,56 @@
+"""
+Test sna.lod: pengelompokan komunitas dan render budget, termasuk graph tanpa
+edge (jendela waktu atau filter nominal yang tidak menyisakan transaksi).
+
+    python -m pytest tests
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from sna.graph_core import build_csr  # noqa: E402
+from sna.lod import apply_render_budget, cluster_id, entity_communities  # noqa: E402
+
+NAMES = np.array(["A", "B", "C", "D", "E", "F"], dtype=object)
+
+
+def csr(n, pairs):
+    src = np.array([p[0] for p in pairs], dtype=np.int32)
+    dst = np.array([p[1] for p in pairs], dtype=np.int32)
+    return build_csr(n, src, dst, np.full(len(pairs), 1_000.0), np.ones(len(pairs), dtype=np.int64))
+
+
+def test_entity_communities_without_edges():
+    groups = entity_communities(csr(6, []), NAMES)
+    assert groups.empty
+
+
+def test_entity_communities_only_covers_active_entities():
+    groups = entity_communities(csr(6, [(0, 1), (1, 2), (2, 0), (3, 4)]), NAMES)
+    assert set(groups.index) == {"A", "B", "C", "D", "E"}
+    assert groups["A"] == groups["B"] == groups["C"]
+
+
+def test_render_budget_on_empty_edges():
+    empty = pd.DataFrame(columns=["PEMILIK REKENING", "NAMA LAWAN", "MUTASI", "FREKUENSI"])
+    plot, clusters = apply_render_budget(empty, pd.Series(dtype=object), max_nodes=2, max_edges=2)
+    assert plot.empty and clusters.empty
+
+
+def test_render_budget_merges_small_entities():
+    edges = pd.DataFrame({
+        "PEMILIK REKENING": ["A", "A", "C", "E"],
+        "NAMA LAWAN": ["B", "C", "D", "F"],
+        "MUTASI": [100.0, 50.0, 5.0, 1.0],
+        "FREKUENSI": [1, 1, 1, 1],
+    })
+    groups = pd.Series({"A": "X", "B": "X", "C": "Y", "D": "Y", "E": "Y", "F": "Y"})
+    plot, clusters = apply_render_budget(edges, groups, max_nodes=4, max_edges=10)
+    nodes = set(plot["PEMILIK REKENING"]) | set(plot["NAMA LAWAN"])
+    assert len(nodes) <= 4
+    assert cluster_id("Y") in set(clusters["CLUSTER"])
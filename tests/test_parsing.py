@@ -0,0 +1,53 @@
+"""
+Test sna.parsing: pola cepat nominal Indonesia, fallback ke parse lama untuk
+nilai di luar pola (termasuk nominal yang terlalu panjang untuk int64), dan tanggal.
+
+    python -m pytest tests
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from sna.parsing import parse_amount, parse_date  # noqa: E402
+
+
+def test_fast_path_amounts():
+    values = ["200.000.000.000,00", " 1.500,5 ", "-2.000", "7,", "9.999.999.999.999.999,99"]
+    assert parse_amount(values).tolist() == [200_000_000_000.0, 1_500.5, -2_000.0, 7.0, 9_999_999_999_999_999.99]
+    cents = parse_amount(values, as_cents=True)
+    assert cents.tolist() == [20_000_000_000_000, 150_050, -200_000, 700, 999_999_999_999_999_999]
+
+
+def test_legacy_fallback_and_missing():
+    # Desimal 3 digit di luar pola cepat; teks & kosong menjadi NaN
+    out = parse_amount(["1.234,567", "abc", None, ""])
+    assert out[0] == 1_234.567
+    assert out[1:].isna().all()
+    cents = parse_amount(["1.234,567", "abc"], as_cents=True)
+    assert cents[0] == 123_457 and cents.isna()[1]
+
+
+def test_overflowing_amounts_use_the_legacy_parse():
+    values = ["100.000.000.000.000.000,00", "123.456.789.012.345.678.901,00"]
+    out = parse_amount(values)
+    assert out.tolist() == [1e17, 123_456_789_012_345_678_901.0]
+    # Tidak muat sebagai sen int64: NA, bukan nominal negatif hasil overflow
+    assert parse_amount(values, as_cents=True).isna().all()
+
+
+def test_numeric_and_repeated_values():
+    assert parse_amount(pd.Series([1.5, 2.0]), as_cents=True).tolist() == [150, 200]
+    out = parse_amount(["1.000,00"] * 3 + ["2.000,00"])
+    assert out.tolist() == [1_000.0, 1_000.0, 1_000.0, 2_000.0]
+
+
+def test_parse_date_with_fallback():
+    out = parse_date(["24/10/2014", "2014-10-25", "bukan tanggal", None])
+    assert out[0] == pd.Timestamp("2014-10-24")
+    assert out[1] == pd.Timestamp("2014-10-25")
+    assert np.isnat(out[2:].to_numpy()).all()
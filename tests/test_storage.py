@@ -0,0 +1,105 @@
+"""
+Test sna.storage terhadap S3 tiruan moto (perlu `pip install -r requirements-dev.txt`, tidak
+dipakai aplikasi; tanpa MinIO sungguhan): listing berhalaman, BucketCache per
+sidik jari ETag, dan Prefetcher.
+
+    python -m pytest tests
+"""
+import sys
+from pathlib import Path
+
+import boto3
+import pytest
+from moto import mock_aws
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from sna.ingest import cache_key_for, load_cleaned  # noqa: E402
+from sna.storage import (  # noqa: E402
+    BucketCache, Prefetcher, bucket_fingerprint, list_all_objects, list_source_files, load_bucket,
+)
+
+BUCKET = "sna-test"
+DATA_CSV = BASE_DIR / "dataset" / "data.csv"
+
+
+@pytest.fixture
+def s3():
+    with mock_aws():
+        client = boto3.client("s3", region_name="us-east-1")
+        client.create_bucket(Bucket=BUCKET)
+        yield client
+
+
+def test_listing_follows_pagination(s3):
+    # list_objects_v2 mengembalikan paling banyak 1000 key per halaman
+    for i in range(1_005):
+        s3.put_object(Bucket=BUCKET, Key=f"part/{i:04d}.csv", Body=b"x")
+    s3.put_object(Bucket=BUCKET, Key=cache_key_for("part/0000.csv"), Body=b"cache")
+
+    assert len(list_all_objects(s3, BUCKET)) == 1_006
+    sources = list_source_files(s3, BUCKET)
+    assert len(sources) == 1_005
+    assert {obj["Key"] for obj in sources} == {f"part/{i:04d}.csv" for i in range(1_005)}
+
+
+def test_bucket_cache_hits_until_an_etag_changes(s3):
+    s3.upload_file(str(DATA_CSV), BUCKET, "a.csv")
+    s3.upload_file(str(DATA_CSV), BUCKET, "b.csv")
+    cache = BucketCache(max_items=2)
+
+    objects = list_source_files(s3, BUCKET)
+    fingerprint = bucket_fingerprint(objects)
+    assert cache.get((BUCKET, fingerprint)) is None
+    df, errors = load_bucket(s3, BUCKET, objects)
+    assert not errors and len(df) > 0
+    cache.put((BUCKET, fingerprint), (df, errors, None))
+
+    # Listing ulang tanpa perubahan: sidik jari sama, hasil dari cache
+    assert bucket_fingerprint(list_source_files(s3, BUCKET)) == fingerprint
+    assert cache.get((BUCKET, fingerprint))[0] is df
+
+    # Satu file diganti isinya: ETag berubah, sidik jari baru, cache miss
+    s3.put_object(Bucket=BUCKET, Key="b.csv", Body=DATA_CSV.read_bytes() + b"\n")
+    changed = bucket_fingerprint(list_source_files(s3, BUCKET))
+    assert changed != fingerprint
+    assert cache.get((BUCKET, changed)) is None
+
+    # Entry terlama dibuang jika melebihi max_items
+    cache.put((BUCKET, changed), (df, errors, None))
+    cache.put((BUCKET, "other"), (df, errors, None))
+    assert cache.get((BUCKET, fingerprint)) is None
+    assert cache.get((BUCKET, changed)) is not None
+
+
+def test_prefetch_result_and_discard(s3):
+    s3.upload_file(str(DATA_CSV), BUCKET, "a.csv")
+    s3.upload_file(str(DATA_CSV), BUCKET, "b.csv")
+    etags = {obj["Key"]: obj["ETag"] for obj in list_source_files(s3, BUCKET)}
+    prefetcher = Prefetcher(max_workers=1, max_items=4)
+
+    # Hit: hasil prefetch sama dengan load langsung, dan hanya bisa diambil sekali
+    prefetcher.submit("s1", ("a.csv", etags["a.csv"]), load_cleaned, s3, BUCKET, "a.csv", etags["a.csv"])
+    df = prefetcher.result("s1", ("a.csv", etags["a.csv"]), timeout=60)
+    assert df is not None and len(df) == len(load_cleaned(s3, BUCKET, "a.csv"))
+    assert prefetcher.result("s1", ("a.csv", etags["a.csv"])) is None
+
+    # Session lain tidak bisa mengambil prefetch milik session ini
+    prefetcher.submit("s1", ("b.csv", etags["b.csv"]), load_cleaned, s3, BUCKET, "b.csv", etags["b.csv"])
+    assert prefetcher.result("s2", ("b.csv", etags["b.csv"])) is None
+
+    # Pilihan baru dari session yang sama menggantikan prefetch lamanya
+    prefetcher.submit("s1", ("a.csv", etags["a.csv"]), load_cleaned, s3, BUCKET, "a.csv", etags["a.csv"])
+    assert prefetcher.result("s1", ("b.csv", etags["b.csv"])) is None
+
+    # discard membuang semua prefetch milik session
+    prefetcher.discard("s1")
+    assert prefetcher.result("s1", ("a.csv", etags["a.csv"])) is None
+
+
+def test_prefetch_failure_is_raised(s3):
+    prefetcher = Prefetcher(max_workers=1)
+    prefetcher.submit("s1", ("missing.csv", "etag"), load_cleaned, s3, BUCKET, "missing.csv", "etag")
+    with pytest.raises(Exception):
+        prefetcher.result("s1", ("missing.csv", "etag"), timeout=60)
@@ -0,0 +1,66 @@
+"""
+Test sna.temporal: jendela bucket dari prefix sum sama dengan filter baris,
+termasuk bucket kosong di tengah timeline (hari tanpa transaksi).
+
+    python -m pytest tests
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from sna.graph_core import EntityIndex  # noqa: E402
+from sna.temporal import TemporalIndex  # noqa: E402
+
+
+def frame():
+    # 2024-01-02 tidak punya transaksi
+    return pd.DataFrame({
+        "PEMILIK REKENING": ["A", "A", "B", "A"],
+        "NAMA LAWAN": ["B", "B", "C", "C"],
+        "TGL/TRANS": pd.to_datetime(["2024-01-01", "2024-01-01", "2024-01-03", "2024-01-03"]),
+        "MUTASI": [100.0, 50.0, 30.0, 5.0],
+    })
+
+
+def window_totals(index, entity_index, b0, b1):
+    edges = index.window(b0, b1)
+    names = entity_index.names
+    return {(names[s], names[d]): (a, f) for s, d, a, f in zip(edges.src, edges.dst, edges.amount, edges.freq)}
+
+
+def test_empty_bucket_in_the_timeline():
+    df = frame()
+    entity_index = EntityIndex.from_frame(df)
+    index = TemporalIndex.build(entity_index, df, freq="D")
+    assert index.labels() == ["2024-01-01", "2024-01-02", "2024-01-03"]
+
+    assert index.is_empty(1, 2)
+    empty = index.window(1, 2)
+    assert len(empty.src) == 0 and empty.out_indptr[-1] == 0 and len(empty.in_edges) == 0
+    assert not index.row_mask(df, 1, 2).any()
+
+    assert not index.is_empty(1, 3)
+    assert window_totals(index, entity_index, 0, 1) == {("A", "B"): (150.0, 2)}
+    assert window_totals(index, entity_index, 1, 3) == {("B", "C"): (30.0, 1), ("A", "C"): (5.0, 1)}
+    assert window_totals(index, entity_index, 0, 3) == {("A", "B"): (150.0, 2), ("B", "C"): (30.0, 1), ("A", "C"): (5.0, 1)}
+
+
+def test_min_value_and_weekly_buckets():
+    df = frame()
+    entity_index = EntityIndex.from_frame(df)
+    index = TemporalIndex.build(entity_index, df, min_value=40, freq="W")
+    # 2024-01-01 hari Senin: semua tanggal masuk satu minggu
+    assert index.labels() == ["2024-01-01"]
+    assert window_totals(index, entity_index, 0, 1) == {("A", "B"): (150.0, 2)}
+
+
+def test_no_rows_above_min_value():
+    df = frame()
+    index = TemporalIndex.build(EntityIndex.from_frame(df), df, min_value=1_000)
+    assert index.n_buckets == 0 and index.labels() == []
+    assert np.all(index.pair_indptr == 0)
@@ -0,0 +1,123 @@
+"""
+Test sna.trace pada transaksi kecil yang hasilnya bisa dihitung tangan:
+urutan tanggal maju/mundur, alokasi proporsional yang dibatasi nominal edge,
+pemotongan max_edges, dan pencocokan kode LAYER (kategori maupun string).
+
+    python -m pytest tests
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from sna.graph_core import EntityIndex  # noqa: E402
+from sna.ingest import compact_frame  # noqa: E402
+from sna.trace import TraceIndex, layer_codes, layer_rows, trace_flow, trace_table  # noqa: E402
+
+
+def frame(rows):
+    df = pd.DataFrame(rows, columns=["PEMILIK REKENING", "NAMA LAWAN", "TGL/TRANS", "MUTASI"])
+    df["TGL/TRANS"] = pd.to_datetime(df["TGL/TRANS"])
+    df.insert(0, "NO", np.arange(1, len(df) + 1))
+    return df
+
+
+def chain():
+    return frame([
+        ("A", "B", "2024-01-01", 100.0),   # NO 1
+        ("B", "C", "2024-01-02", 60.0),    # NO 2
+        ("B", "D", "2024-01-03", 60.0),    # NO 3
+        ("B", "E", "2023-12-31", 50.0),    # NO 4: sebelum dana A masuk
+        ("C", "F", "2024-01-05", 30.0),    # NO 5
+        ("A", "C", "2024-01-10", 40.0),    # NO 6: sesudah C -> F
+    ])
+
+
+def run(df, **kwargs):
+    entity_index = EntityIndex.from_frame(df)
+    index = TraceIndex.build(entity_index, df)
+    start_nodes = [entity_index.id_of(n) for n in kwargs.pop("nodes", [])]
+    start_rows = index.rows_of(kwargs.pop("rows", []))
+    result = trace_flow(index, start_nodes, start_rows, **kwargs)
+    table = trace_table(index, df, result)
+    return {int(no): (int(hop), alloc) for no, hop, alloc in zip(table["NO"], table["HOP"], table["ALOKASI"])}
+
+
+def test_forward_follows_dates_and_splits_proportionally():
+    trail = run(chain(), rows=[0], direction="forward")
+    # B menerima 100 lalu mengirim 60 + 60 setelahnya: masing-masing 100/120 bagian;
+    # B -> E terjadi sebelum dana masuk sehingga tidak ikut
+    assert set(trail) == {1, 2, 3, 5}
+    assert trail[1] == (1, 100.0)
+    assert trail[2][0] == 2 and np.isclose(trail[2][1], 50.0)
+    assert trail[3][0] == 2 and np.isclose(trail[3][1], 50.0)
+    # C menerima 50 tetapi C -> F hanya 30: alokasi dibatasi nominal edge
+    assert trail[5] == (3, 30.0)
+
+
+def test_backward_follows_dates_in_reverse():
+    trail = run(chain(), rows=[4], direction="backward")
+    # A -> C (10 Jan) terjadi setelah C -> F (5 Jan) sehingga bukan asal dana
+    assert set(trail) == {5, 2, 1}
+    assert trail[5] == (1, 30.0)
+    assert trail[2] == (2, 30.0)
+    assert trail[1] == (3, 30.0)
+
+
+def test_account_start_and_max_hops():
+    trail = run(chain(), nodes=["A"], direction="forward", max_hops=1)
+    assert trail == {1: (1, 100.0), 6: (1, 40.0)}
+
+
+def test_paths_merging_on_one_row_are_capped_at_its_amount():
+    df = frame([
+        ("A", "B", "2024-01-01", 100.0),
+        ("A", "C", "2024-01-01", 100.0),
+        ("B", "D", "2024-01-02", 80.0),
+        ("C", "D", "2024-01-02", 80.0),
+        ("D", "E", "2024-01-03", 50.0),
+    ])
+    trail = run(df, nodes=["A"], direction="forward")
+    # Dua jalur (masing-masing 80) sampai di D -> E: jumlahnya dibatasi 50
+    assert trail[5] == (3, 50.0)
+
+
+def test_max_edges_keeps_the_largest_allocations():
+    trail = run(chain(), nodes=["A"], direction="forward", max_edges=1)
+    assert trail == {1: (1, 100.0)}
+    assert len(run(chain(), nodes=["A"], direction="forward", max_edges=3)) == 3
+
+
+def layered(categorical):
+    df = chain()
+    df["LAYER 1."] = ["A.", "A.", "A.", None, " A. ", "B."]
+    df["LAYER 2."] = [None, "A.01.", "A.02.", None, "A.01.", None]
+    df["LAYER 3."] = [None, None, None, None, "A.01.01.", None]
+    return compact_frame(df) if categorical else df
+
+
+def test_layer_matching_on_categorical_and_string_columns():
+    for categorical in (True, False):
+        df = layered(categorical)
+        assert layer_rows(df, "A.").tolist() == [0, 1, 2, 4]
+        assert layer_rows(df, " A.01. ").tolist() == [1, 4]
+        assert layer_rows(df, "Z.").tolist() == []
+        assert layer_codes(df) == ["A.", "A.01.", "A.01.01.", "A.02.", "B."]
+
+
+def test_layer_codes_skip_unused_categories():
+    df = layered(True)
+    df["LAYER 2."] = df["LAYER 2."].cat.add_categories(["X.99."])
+    assert "X.99." not in layer_codes(df)
+
+
+def test_trace_table_reports_the_deepest_layer():
+    df = layered(True)
+    entity_index = EntityIndex.from_frame(df)
+    index = TraceIndex.build(entity_index, df)
+    table = trace_table(index, df, trace_flow(index, start_rows=index.rows_of(layer_rows(df, "A.01.01."))))
+    assert table["LAYER"].tolist() == ["A.01.01."]